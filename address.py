@@ -9,22 +9,31 @@ Flow:
     - The constructor stores the provided street/city/state/zip_code values on the
         instance so other modules (main, package, truck) can read them.
 
+    - Fields are fixed with __slots__ (no per-instance __dict__) and the
+        strings are interned, so the many packages sharing a street, city,
+        state or zip code share one string object each.
+
 Complexity:
     - Construction is O(1).
 """
+import sys
 
 class Address:
         """Simple address container.
 
         Process: store address components as attributes for easy access.
         Flow: callers create Address' once per package when parsing CSV package data.
+        A corrected address is a new Address; an Address may be shared and is
+        not modified once built.
         """
+        __slots__ = ("street", "city", "state", "zip_code")
+
         def __init__(self, street, city, state, zip_code):
-                # store raw address fields on the object
-                self.street = street
-                self.city = city
-                self.state = state
-                self.zip_code = zip_code
+                # store interned address fields on the object
+                self.street = sys.intern(street)
+                self.city = sys.intern(city)
+                self.state = sys.intern(state)
+                self.zip_code = sys.intern(zip_code)
 
         def print(self):
             return f"{self.street}, {self.city}, {self.state} {self.zip_code}"
@@ -0,0 +1,217 @@
+"""Address Normalization and Index for WGUPS Simulator
+
+Process:
+  - Canonicalize street strings so spelling differences do not hide a
+    match: quotes and "(ZIP)" removed (as parse_distance_csv() does), upper
+    case, punctuation and runs of whitespace collapsed, directionals and
+    street types abbreviated (SOUTH -> S, STREET -> ST) and unit suffixes
+    written one way ("APT 4", "Suite 4", "# 4" -> "#4").
+  - AddressIndex maps street -> distance matrix row. Exact spellings are a
+    plain dict hit; anything else is resolved once, in order:
+      1. canonical form
+      2. canonical form without the unit (when that identifies one row)
+      3. fuzzy: the closest canonical street with the same house number
+         and the same directional and street-type tokens, in order (difflib
+         ratio >= FUZZY_CUTOFF), so "100 N MAIN ST" never matches
+         "100 S MAIN ST" or "100 N MAIN AVE"
+    and the answer (row or None) is cached per spelling.
+
+Flow:
+  - The distance loaders (parse_distance_csv(), the compiled cache, edge
+    lists, matrix files) build an AddressIndex instead of a plain dict; it
+    still behaves like the {street: row} dict the routing helpers use.
+  - resolve_packages() runs once when packages are loaded: it sets every
+    package's address_row, rewrites streets matched by spelling to the
+    table's spelling and returns an AddressReport of fuzzy matches and
+    unresolved streets. Routing then works on address_row integers only.
+
+Complexity:
+  - Exact lookup: O(1). First lookup of a new spelling: O(L) to normalize,
+    plus O(h·L) for a fuzzy search over h streets sharing its house number.
+  - Building: O(n·L) for n table addresses of length L.
+"""
+from address import Address
+from difflib import SequenceMatcher
+import re
+
+# Minimum similarity (0..1) of canonical streets for a fuzzy match
+FUZZY_CUTOFF = 0.85
+
+_ZIP = re.compile(r"\(\d{5}\)")
+_PUNCTUATION = re.compile(r"[.,;]")
+_UNIT = re.compile(r"(?:#|\bAPT\b|\bAPARTMENT\b|\bUNIT\b|\bSTE\b|\bSUITE\b)\s*#?\s*([A-Z0-9-]+)\s*$")
+_ABBREVIATIONS = {
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+    "NORTHEAST": "NE", "NORTHWEST": "NW", "SOUTHEAST": "SE", "SOUTHWEST": "SW",
+    "STREET": "ST", "AVENUE": "AVE", "AV": "AVE", "BOULEVARD": "BLVD",
+    "ROAD": "RD", "DRIVE": "DR", "LANE": "LN", "COURT": "CT", "PLACE": "PL",
+    "CIRCLE": "CIR", "HIGHWAY": "HWY", "PARKWAY": "PKWY", "TERRACE": "TER",
+}
+# Canonical tokens a fuzzy match must reproduce exactly (directionals and street types)
+_SHAPE_TOKENS = frozenset(_ABBREVIATIONS.values())
+
+
+def normalize_street(text):
+    """
+    Return the canonical form of a street string.
+
+    Example: '5383 South 900 East  Apt. 104' -> '5383 S 900 E #104'.
+    Complexity: O(L) for a string of length L.
+    """
+    street = _ZIP.sub(" ", text.replace('"', " ")).upper()
+    street = _PUNCTUATION.sub(" ", street)
+    unit = _UNIT.search(street)
+    suffix = ""
+    if unit is not None:
+        suffix = f" #{unit.group(1)}"
+        street = street[:unit.start()]
+    return " ".join(_ABBREVIATIONS.get(token, token) for token in street.split()) + suffix
+
+
+def _without_unit(canonical):
+    """Return a canonical street without its '#unit' suffix. O(L)."""
+    head, _, unit = canonical.rpartition(" #")
+    return head if head and unit else canonical
+
+
+def _shape(canonical):
+    """Return the directional and street-type tokens of a canonical street, in order. O(L)."""
+    return tuple(token for token in _without_unit(canonical).split() if token in _SHAPE_TOKENS)
+
+
+def _house_number(canonical):
+    """Return the leading token (the house number) of a canonical street. O(L)."""
+    return canonical.split(" ", 1)[0]
+
+
+class AddressReport:
+    """
+    Outcome of AddressIndex.resolve_packages().
+
+    Fields:
+      - resolved: number of packages given an address_row
+      - fuzzy: (package id, street, table street) for fuzzy matches
+      - unresolved: (package id, street) with no row; these are not routed
+    """
+
+    def __init__(self):
+        self.resolved = 0
+        self.fuzzy = []
+        self.unresolved = []
+
+    def lines(self):
+        """Return printable report lines (empty when every match was exact). O(f + u)."""
+        out = [f"Address: package {pid} {street!r} matched {match!r}" for pid, street, match in self.fuzzy]
+        out += [f"Address: package {pid} {street!r} is not in the distance table"
+                for pid, street in self.unresolved]
+        return out
+
+
+class AddressIndex(dict):
+    """
+    {street: matrix row} for the distance table, resolving other spellings.
+
+    Process: the dict itself holds the table's own spellings, so existing
+    index[street] / index.get(street) calls stay O(1) for them; a miss is
+    resolved through normalization (see module docstring) and cached in
+    _aliases, which never changes len() or iteration.
+    Fields:
+      - addresses: table streets in row order
+      - fuzzy_matches: {spelling: table street} for matches found fuzzily
+    """
+
+    def __init__(self, addresses):
+        super().__init__((street, row) for row, street in enumerate(addresses))
+        self.addresses = list(addresses)
+        self.fuzzy_matches = {}
+        self._aliases = {}
+        self._canonical = {}
+        self._base = {}
+        self._by_number = {}
+        for row, street in enumerate(self.addresses):
+            canonical = normalize_street(street)
+            self._canonical.setdefault(canonical, row)
+            base = _without_unit(canonical)
+            # None marks a base shared by several units: not unique
+            self._base[base] = row if self._base.get(base, row) == row else None
+            self._by_number.setdefault(_house_number(canonical), []).append((canonical, row))
+
+    def resolve(self, street):
+        """
+        Return the row for any spelling of a table street, or None.
+
+        Complexity: O(1) after the first lookup of a spelling.
+        """
+        row = dict.get(self, street)
+        if row is not None:
+            return row
+        if street in self._aliases:
+            return self._aliases[street]
+        canonical = normalize_street(street)
+        row = self._canonical.get(canonical)
+        if row is None:
+            row = self._base.get(_without_unit(canonical))
+        if row is None:
+            row = self._fuzzy(canonical)
+            if row is not None:
+                self.fuzzy_matches[street] = self.addresses[row]
+        self._aliases[street] = row
+        return row
+
+    def _fuzzy(self, canonical):
+        """
+        Return the row of the most similar street with the same house number, or None.
+
+        Flow: candidates whose directional/street-type tokens differ are
+        skipped, however similar the rest of the spelling is.
+        Complexity: O(h·L).
+        """
+        best_row, best_ratio = None, FUZZY_CUTOFF
+        shape = _shape(canonical)
+        for candidate, row in self._by_number.get(_house_number(canonical), ()):
+            if _shape(candidate) != shape:
+                continue
+            ratio = SequenceMatcher(None, canonical, candidate).ratio()
+            if ratio >= best_ratio:
+                best_row, best_ratio = row, ratio
+        return best_row
+
+    def get(self, street, default=None):
+        row = self.resolve(street)
+        return default if row is None else row
+
+    def __missing__(self, street):
+        row = self.resolve(street)
+        if row is None:
+            raise KeyError(street)
+        return row
+
+    def __contains__(self, street):
+        return self.resolve(street) is not None
+
+    def resolve_packages(self, packages):
+        """
+        Set address_row on every package from (id, package) pairs.
+
+        Process: resolve each street once. A street matched by spelling (not
+        fuzzily) is replaced by the table's spelling so printed addresses
+        and truck locations agree with the distance table; a fuzzy match
+        keeps the package's street and is reported.
+        Flow: returns an AddressReport.
+        Complexity: O(p) plus one normalization per distinct new spelling.
+        """
+        report = AddressReport()
+        for pid, package in packages:
+            address = package.address
+            row = self.resolve(address.street)
+            package.address_row = row
+            if row is None:
+                report.unresolved.append((pid, address.street))
+                continue
+            report.resolved += 1
+            table_street = self.addresses[row]
+            if address.street in self.fuzzy_matches:
+                report.fuzzy.append((pid, address.street, table_street))
+            elif address.street != table_street:
+                package.address = Address(table_street, address.city, address.state, address.zip_code)
+        return report
@@ -0,0 +1,377 @@
+"""Benchmark Suite for WGUPS Simulator
+
+Process:
+  - Generate synthetic package/distance CSVs (synthetic_data.py) for each
+    size tier and time the loader, the hash map, nearest-stop selection,
+    a full simulate_truck_deliveries() day and fleet-wide status snapshots
+    of that day on them.
+  - Report operations per second (best of --repeat runs) and peak Python
+    memory (tracemalloc, measured in a separate untimed run).
+  - Write every result to a JSON file so runs can be compared; --compare
+    flags benchmarks whose ops/sec dropped by more than --tolerance.
+
+Flow:
+  - Tiers: tiny (40 packages / 27 addresses), small (1k / 200),
+    medium (10k / 1k) and large (100k / 5k). The large tier only runs
+    when named in --tiers.
+  - The full-day run is a cold start (empty LoaderCache, no compiled matrix)
+    with enough trucks for the tier, two thirds leaving at 8:00 and the rest
+    at 9:05 for delayed packages, one driver per truck.
+
+CLI (run from the project root):
+    python benchmark.py [--tiers tiny,small,medium,large] [--repeat 3] [--output benchmark_results.json]
+                        [--compare old.json] [--tolerance 0.2] [--no-memory]
+
+Complexity:
+  - Dominated by the large tier: O(a²) distance parsing for a = 5k
+    addresses and a 100k-package simulation.
+"""
+from hashmap import CustomHashMap
+from distance_matrix import DistanceMatrix
+from loader_cache import COMPILED_SUFFIX
+from scenario import Scenario
+from truck import Truck
+from datetime import datetime
+import synthetic_data
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import main
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+# name -> (packages, addresses)
+TIERS = {
+    "tiny": (40, 27),
+    "small": (1_000, 200),
+    "medium": (10_000, 1_000),
+    "large": (100_000, 5_000),
+}
+# The large tier takes minutes (mostly the traced full-day run); opt in with --tiers
+DEFAULT_TIERS = ("tiny", "small", "medium")
+DEFAULT_OUTPUT = "benchmark_results.json"
+# A benchmark whose first run takes longer than this (seconds) is not repeated
+SLOW_RUN = 2.0
+# Fast benchmarks keep repeating until this much time (seconds) has been spent
+MIN_TOTAL = 0.25
+MAX_RUNS = 1000
+# Timestamps per fleet_status_at run, spread over the working day
+SNAPSHOT_SAMPLES = 100
+
+
+class BenchmarkResult:
+    """One timed benchmark at one tier."""
+
+    def __init__(self, tier, packages, addresses, name, ops, unit, seconds, peak_bytes):
+        self.tier = tier
+        self.packages = packages
+        self.addresses = addresses
+        self.name = name
+        self.ops = ops
+        self.unit = unit
+        self.seconds = seconds
+        self.peak_bytes = peak_bytes
+
+    @property
+    def ops_per_sec(self):
+        return self.ops / self.seconds if self.seconds > 0 else float("inf")
+
+    def to_dict(self):
+        return {
+            "tier": self.tier,
+            "packages": self.packages,
+            "addresses": self.addresses,
+            "benchmark": self.name,
+            "ops": self.ops,
+            "unit": self.unit,
+            "seconds": self.seconds,
+            "ops_per_sec": self.ops_per_sec,
+            "peak_memory_bytes": self.peak_bytes,
+        }
+
+
+def _measure(run, setup=None, repeat=3, memory=True):
+    """
+    Time run(state) and return (best seconds, peak traced bytes or None).
+
+    Process: setup() (untimed) builds fresh state before every run. At
+    least `repeat` runs are made, more while the total stays under
+    MIN_TOTAL so sub-millisecond timings settle; runs stop once one takes
+    longer than SLOW_RUN. Peak memory comes from one extra run under
+    tracemalloc so tracing never skews the timing.
+    Complexity: between 2 and MAX_RUNS + 1 calls of run.
+    """
+    best = None
+    runs = 0
+    total = 0.0
+    while runs < max(1, repeat) or (total < MIN_TOTAL and runs < MAX_RUNS):
+        state = setup() if setup is not None else None
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        runs += 1
+        total += elapsed
+        if elapsed > SLOW_RUN:
+            break
+
+    peak = None
+    if memory:
+        state = setup() if setup is not None else None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run(state)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def _filled_map(n):
+    """Return a CustomHashMap holding ids 1..n. O(n)."""
+    m = CustomHashMap()
+    for key in range(1, n + 1):
+        m.add(key, key)
+    return m
+
+
+def _hashmap_add(n):
+    m = CustomHashMap()
+    for key in range(1, n + 1):
+        m.add(key, key)
+
+
+def _hashmap_get(m):
+    get = m.get
+    for key in range(1, len(m) + 1):
+        get(key)
+
+
+def _truck_loads(package_path, distance_path):
+    """
+    Split the tier's packages into Truck.MAX_PACKAGES-sized loads.
+
+    Flow: returns (loads, address_index, DistanceMatrix), each package
+    carrying its address_row as after loading.
+    Complexity: O(p + a²).
+    """
+    packages = main.parse_package_csv(package_path)
+    addresses, address_index, distances = main.parse_distance_csv(distance_path)
+    matrix = DistanceMatrix.from_table(addresses, address_index, distances)
+    address_index.resolve_packages(packages.items())
+    ordered = [pkg for _, pkg in sorted(packages.items())]
+    size = Truck.MAX_PACKAGES
+    loads = [ordered[i:i + size] for i in range(0, len(ordered), size)]
+    return loads, address_index, matrix
+
+
+def _nearest_neighbor_tours(state, use_stop_set):
+    """
+    Drive every load's nearest-neighbor tour from the HUB, one
+    _find_nearest_delivery() call per package. O(p·k), k = load size.
+    """
+    loads, address_index, matrix = state
+    for load in loads:
+        remaining = list(load)
+        stops = matrix.stop_set(remaining) if use_stop_set else None
+        location = "HUB"
+        while remaining:
+            package, _, _ = main._find_nearest_delivery(location, remaining, address_index, matrix, stops)
+            remaining.remove(package)
+            if stops is not None:
+                stops.discard(package)
+            location = package.address.street
+
+
+def _day_fleet(scenario, package_path, distance_path):
+    """Simulate the tier's day with a recorder and return its FleetSnapshot. O(simulation)."""
+    timeline = main.DeliveryTimeline()
+    main.simulate_truck_deliveries(main.END_OF_DAY, recorder=timeline, verbose=False, scenario=scenario,
+                                   package_path=package_path, distance_path=distance_path)
+    return timeline.finalize().fleet()
+
+
+def _fleet_status_samples(fleet):
+    """Query the status of every package at SNAPSHOT_SAMPLES times from 8:00 to 18:00. O(samples·n)."""
+    start, step = 8 * 3600.0, 10 * 3600.0 / SNAPSHOT_SAMPLES
+    for k in range(SNAPSHOT_SAMPLES):
+        fleet.status_at(start + k * step)
+
+
+def _synthetic_scenario(package_count):
+    """
+    Return a Scenario with enough trucks and drivers for package_count.
+
+    Process: 25% spare capacity, two thirds of the trucks at 8:00 and the
+    rest at 9:05 so delayed packages have a truck.
+    Complexity: O(t).
+    """
+    trucks = math.ceil(package_count / Truck.MAX_PACKAGES * 1.25) + 2
+    early = main.SIMULATION_DAY.replace(hour=8, minute=0)
+    late = main.SIMULATION_DAY.replace(hour=9, minute=5)
+    split = trucks * 2 // 3
+    return Scenario(name=f"synthetic-{package_count}",
+                    departures=[early] * split + [late] * (trucks - split),
+                    drivers=trucks)
+
+
+def _cold_start(distance_path):
+    """Forget cached input data so the next simulation parses from CSV."""
+    main._LOADER_CACHE = None
+    compiled = distance_path + COMPILED_SUFFIX
+    if os.path.exists(compiled):
+        os.remove(compiled)
+
+
+def run_tier(tier, data_dir, repeat=3, memory=True, report=None):
+    """
+    Generate one tier's data set and run every benchmark on it.
+
+    Flow: report(result) is called as each benchmark finishes.
+    Returns the list of BenchmarkResult.
+    """
+    packages, addresses = TIERS[tier]
+    package_path, distance_path = synthetic_data.generate_dataset(
+        os.path.join(data_dir, tier), packages, addresses)
+    cells = addresses * (addresses + 1) // 2
+    scenario = _synthetic_scenario(packages)
+    # The nearest-stop benchmarks only read their loads, so build them once
+    loads = []
+    fleets = []
+
+    def truck_loads():
+        if not loads:
+            loads.append(_truck_loads(package_path, distance_path))
+        return loads[0]
+
+    def day_fleet():
+        if not fleets:
+            fleets.append(_day_fleet(scenario, package_path, distance_path))
+        return fleets[0]
+
+    benchmarks = [
+        ("parse_package_csv", packages, "rows",
+         lambda _: main.parse_package_csv(package_path), None),
+        ("parse_distance_csv", cells, "cells",
+         lambda _: main.parse_distance_csv(distance_path), None),
+        ("hashmap_add", packages, "adds",
+         lambda _: _hashmap_add(packages), None),
+        ("hashmap_get", packages, "gets",
+         _hashmap_get, lambda: _filled_map(packages)),
+        ("hashmap_resize", packages, "items",
+         lambda m: m._resize(m.size * 2), lambda: _filled_map(packages)),
+        ("find_nearest_delivery", packages, "calls",
+         lambda state: _nearest_neighbor_tours(state, False),
+         truck_loads),
+        ("find_nearest_delivery_stopset", packages, "calls",
+         lambda state: _nearest_neighbor_tours(state, True),
+         truck_loads),
+        ("simulate_truck_deliveries", packages, "packages",
+         lambda _: main.simulate_truck_deliveries(main.END_OF_DAY, verbose=False, scenario=scenario,
+                                                  package_path=package_path, distance_path=distance_path),
+         lambda: _cold_start(distance_path)),
+        ("fleet_status_at", SNAPSHOT_SAMPLES, "snapshots",
+         _fleet_status_samples, day_fleet),
+    ]
+
+    results = []
+    for name, ops, unit, run, setup in benchmarks:
+        seconds, peak = _measure(run, setup, repeat, memory)
+        result = BenchmarkResult(tier, packages, addresses, name, ops, unit, seconds, peak)
+        results.append(result)
+        if report is not None:
+            report(result)
+    _cold_start(distance_path)
+    return results
+
+
+def _print_result(result):
+    peak = "-" if result.peak_bytes is None else f"{result.peak_bytes / 2**20:.1f} MiB"
+    print(f"{result.tier:<6} | {result.name:<29} | {result.ops_per_sec:>14,.0f} {result.unit + '/s':<11}"
+          f" | {result.seconds:>9.4f} s | {peak:>10}", flush=True)
+
+
+def compare_results(results, baseline_path, tolerance):
+    """
+    Print each benchmark's speed relative to a previous JSON run.
+
+    Flow: returns the (tier, benchmark) keys whose ops/sec fell by more than
+    `tolerance` (a fraction).
+    Complexity: O(r).
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["tier"], r["benchmark"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        old = baseline.get((result.tier, result.name))
+        if old is None or not old["ops_per_sec"]:
+            continue
+        ratio = result.ops_per_sec / old["ops_per_sec"]
+        flag = ""
+        if ratio < 1.0 - tolerance:
+            regressions.append((result.tier, result.name))
+            flag = "  REGRESSION"
+        print(f"{result.tier:<6} | {result.name:<29} | {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def run(argv=None):
+    """Command-line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(description="Benchmark the WGUPS simulator on synthetic data.")
+    parser.add_argument("--tiers", default=",".join(DEFAULT_TIERS),
+                        help=f"comma-separated tiers out of {','.join(TIERS)} (default: {','.join(DEFAULT_TIERS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark, best is kept")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON results file")
+    parser.add_argument("--compare", metavar="JSON", help="previous results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed ops/sec drop before --compare reports a regression")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory runs")
+    parser.add_argument("--data-dir", help="keep the generated CSVs here instead of a temp directory")
+    args = parser.parse_args(argv)
+
+    tiers = [t.strip() for t in args.tiers.split(",") if t.strip()]
+    unknown = [t for t in tiers if t not in TIERS]
+    if unknown:
+        parser.error(f"unknown tier(s): {', '.join(unknown)}")
+
+    print(f"{'tier':<6} | {'benchmark':<29} | {'throughput':>26} | {'best':>11} | {'peak mem':>10}")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        for tier in tiers:
+            results.extend(run_tier(tier, data_dir, args.repeat, not args.no_memory, _print_result))
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__ if np is not None else None,
+        "repeat": args.repeat,
+        "results": [r.to_dict() for r in results],
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        if compare_results(results, args.compare, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
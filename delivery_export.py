@@ -0,0 +1,333 @@
+"""Columnar Delivery Log Export for WGUPS Simulator
+
+Process:
+  - Flatten a recorded DeliveryTimeline into two column tables:
+      legs:        day, depot, truck, package_id (-1 for a return to the
+                   depot), from_row, to_row (distance matrix rows, -1 if
+                   unknown), depart, arrive, miles
+      transitions: day, depot, package_id, time, status (PackageStatus
+                   value): reaching the hub, DELAYED holds and their end,
+                   EN_ROUTE at leg start and DELIVERED at arrival
+    Times are seconds since 1970-01-01 on the simulated (naive) clock, so
+    numpy's datetime64[s] reads them directly; day counts days since then.
+  - Rows are buffered per table and written in chunks of CHUNK_ROWS, so
+    a multi-day run streams its days out without holding them all.
+
+Flow:
+  - Formats, picked by the first available unless one is requested:
+      parquet  one Parquet file per chunk under <dir>/<table>/ (pyarrow)
+      npz      <dir>/<table>.npz, one "<column>.<chunk>" array per chunk
+               appended to the archive (NumPy)
+      csv      <dir>/<table>.csv with a header row
+    Every format appends: running the export again adds rows after the
+    ones already written.
+  - ColumnarWriter.write_timeline() adds one day; multi_day.simulate_days()
+    calls it for every depot and day when given a writer.
+  - read_table() loads a table back as {column: array} in any format.
+
+CLI (run from the project root):
+    python delivery_export.py OUT_DIR [--format npz|parquet|csv] [--days N]
+
+Complexity:
+  - O(L + n + h) per day for L legs, n packages and h holds; the chunk
+    writes are one vectorized conversion per column.
+"""
+from Enums.package_status import PackageStatus
+from datetime import datetime
+from fleet_snapshot import INF
+import argparse
+import csv
+import os
+import sys
+import zipfile
+import main
+import multi_day
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pyarrow = None
+
+# Rows buffered per table before a chunk is written
+CHUNK_ROWS = 65536
+# Output formats in order of preference
+FORMATS = ("parquet", "npz", "csv")
+# Column names and dtypes of each table
+TABLES = {
+    "legs": (("day", "i4"), ("depot", "i2"), ("truck", "i2"), ("package_id", "i8"),
+             ("from_row", "i4"), ("to_row", "i4"), ("depart", "f8"), ("arrive", "f8"), ("miles", "f8")),
+    "transitions": (("day", "i4"), ("depot", "i2"), ("package_id", "i8"), ("time", "f8"), ("status", "i1")),
+}
+
+_EPOCH = datetime(1970, 1, 1)
+_DELAYED = PackageStatus.DELAYED.value
+_EN_ROUTE = PackageStatus.EN_ROUTE.value
+_DELIVERED = PackageStatus.DELIVERED.value
+
+
+def default_format():
+    """Return the best format the installed packages support. O(1)."""
+    if pyarrow is not None:
+        return "parquet"
+    if np is not None:
+        return "npz"
+    return "csv"
+
+
+def _epoch_seconds(moment):
+    """Return a datetime as seconds since 1970-01-01. O(1)."""
+    return (moment - _EPOCH).total_seconds()
+
+
+def timeline_legs(timeline, address_index):
+    """
+    Yield (truck, package_id, from_row, to_row, depart, arrive, miles) for
+    every delivery and return leg, per truck in driving order.
+
+    Flow: a truck starts at its depot (its start address) and is back there
+    after each return leg.
+    Complexity: O(L).
+    """
+    for log in timeline.trucks:
+        depot = address_index.get(log.start_address)
+        depot = -1 if depot is None else depot
+        location = depot
+        for pos, package_id in enumerate(log.leg_package_ids):
+            row = address_index.get(log.leg_addresses[pos])
+            row = -1 if row is None else row
+            arrival = log.leg_arrivals[pos]
+            yield (log.truck_num, package_id, location, row, _epoch_seconds(log.leg_starts[pos]),
+                   _epoch_seconds(arrival), float(log.leg_miles[pos]))
+            location = row
+            trip_end = log.returns.get(pos)
+            if trip_end is not None:
+                miles, back_at = trip_end
+                yield (log.truck_num, -1, location, depot, _epoch_seconds(arrival),
+                       _epoch_seconds(back_at), float(miles))
+                location = depot
+
+
+def timeline_transitions(timeline):
+    """
+    Yield (package_id, time, status) for every status change, per package.
+
+    Process: read the day's FleetSnapshot: the status a package has when it
+    reaches the hub (start of day unless streamed), each DELAYED hold and
+    the status it returns to, then EN_ROUTE and DELIVERED from its leg.
+    Complexity: O(n + h).
+    """
+    fleet = timeline.fleet()
+    origin = _epoch_seconds(fleet.origin)
+    holds = {}
+    for row, held_from, held_until in zip(fleet.hold_rows, fleet.hold_from, fleet.hold_until):
+        holds.setdefault(int(row), []).append((float(held_from), float(held_until)))
+    for k, pid in enumerate(fleet.ids):
+        pid = int(pid)
+        initial = int(fleet.initial[k])
+        visible = float(fleet.visible_from[k])
+        yield pid, origin + max(visible, 0.0), initial
+        for held_from, held_until in holds.get(k, ()):
+            yield pid, origin + held_from, _DELAYED
+            yield pid, origin + held_until, initial
+        start = float(fleet.leg_start[k])
+        if start != INF:
+            yield pid, origin + start, _EN_ROUTE
+            yield pid, origin + float(fleet.arrival[k]), _DELIVERED
+
+
+class ColumnarWriter:
+    """
+    Chunked, appending writer of the legs and transitions tables.
+
+    Fields:
+      - directory: output directory (created if missing)
+      - format: "parquet", "npz" or "csv" (default_format() when None)
+      - chunk_rows: rows buffered per table before a chunk is written
+      - rows: {table: rows written so far in this session}
+    """
+
+    def __init__(self, directory, fmt=None, chunk_rows=CHUNK_ROWS):
+        fmt = fmt or default_format()
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format {fmt!r}; use one of {', '.join(FORMATS)}")
+        if fmt == "parquet" and pyarrow is None:
+            raise ValueError("Parquet export needs pyarrow; use npz or csv")
+        if fmt == "npz" and np is None:
+            raise ValueError("npz export needs NumPy; use csv")
+        self.directory = directory
+        self.format = fmt
+        self.chunk_rows = int(chunk_rows)
+        self.rows = {table: 0 for table in TABLES}
+        self._buffers = {table: [] for table in TABLES}
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def write_timeline(self, timeline, address_index, day=None, depot=0):
+        """
+        Add one recorded day (finalized DeliveryTimeline) to both tables.
+
+        Flow: day (a datetime) defaults to the date of the timeline's first
+        departure; depot is the depot's position in a multi-depot run.
+        Complexity: O(L + n + h), plus any chunks that fill up.
+        """
+        if day is None:
+            day = timeline.fleet().origin
+        day = (day - _EPOCH).days
+        for leg in timeline_legs(timeline, address_index):
+            self._append("legs", (day, depot) + leg)
+        for change in timeline_transitions(timeline):
+            self._append("transitions", (day, depot) + change)
+
+    def _append(self, table, row):
+        """Buffer one row, writing the chunk when it is full. O(1) amortized."""
+        buffer = self._buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.chunk_rows:
+            self._flush(table)
+
+    def flush(self):
+        """Write every partly filled chunk. O(buffered rows)."""
+        for table in TABLES:
+            self._flush(table)
+
+    def close(self):
+        """Write what is buffered; the files stay complete after every chunk. O(buffered rows)."""
+        self.flush()
+
+    def _flush(self, table):
+        """Write the buffered rows of table as one chunk. O(rows)."""
+        buffer = self._buffers[table]
+        if not buffer:
+            return
+        columns = list(zip(*buffer))
+        self._buffers[table] = []
+        self.rows[table] += len(buffer)
+        if self.format == "csv":
+            self._write_csv(table, buffer)
+            return
+        arrays = {name: np.asarray(values, dtype=dtype)
+                  for (name, dtype), values in zip(TABLES[table], columns)}
+        if self.format == "npz":
+            self._write_npz(table, arrays)
+        else:
+            self._write_parquet(table, arrays)
+
+    def _write_csv(self, table, rows):
+        path = os.path.join(self.directory, table + ".csv")
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if new:
+                writer.writerow(name for name, _ in TABLES[table])
+            writer.writerows(rows)
+
+    def _write_npz(self, table, arrays):
+        path = os.path.join(self.directory, table + ".npz")
+        with zipfile.ZipFile(path, "a", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            chunk = _next_chunk(archive.namelist())
+            for name, values in arrays.items():
+                with archive.open(f"{name}.{chunk:06d}.npy", "w", force_zip64=True) as member:
+                    np.lib.format.write_array(member, values, allow_pickle=False)
+
+    def _write_parquet(self, table, arrays):
+        folder = os.path.join(self.directory, table)
+        os.makedirs(folder, exist_ok=True)
+        chunk = _next_chunk(name.replace("-", ".") for name in os.listdir(folder))
+        pyarrow.parquet.write_table(pyarrow.table(arrays), os.path.join(folder, f"part-{chunk:06d}.parquet"))
+
+
+def _next_chunk(names):
+    """Return one past the largest chunk number in "<name>.<chunk>[.npy]" names. O(m)."""
+    last = -1
+    for name in names:
+        parts = name.split(".")
+        if len(parts) >= 2 and parts[1].isdigit():
+            last = max(last, int(parts[1]))
+    return last + 1
+
+
+def read_table(directory, table):
+    """
+    Load a table written by ColumnarWriter as {column: array}.
+
+    Flow: whichever of the Parquet folder, .npz archive or .csv file exists
+    is read (in that order); columns are NumPy arrays when NumPy is
+    installed, lists otherwise.
+    Complexity: O(rows).
+    """
+    columns = TABLES[table]
+    folder = os.path.join(directory, table)
+    if os.path.isdir(folder):
+        if pyarrow is None:
+            raise ValueError("Reading Parquet needs pyarrow")
+        data = pyarrow.parquet.read_table(folder)
+        return {name: data.column(name).to_numpy() for name, _ in columns}
+    path = os.path.join(directory, table + ".npz")
+    if os.path.exists(path):
+        if np is None:
+            raise ValueError("Reading npz needs NumPy")
+        with np.load(path) as archive:
+            keys = sorted(archive.files)
+            return {name: np.concatenate([archive[key] for key in keys if key.split(".")[0] == name]
+                                         or [np.empty(0, dtype=dtype)])
+                    for name, dtype in columns}
+    path = os.path.join(directory, table + ".csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        values = list(zip(*reader)) or [()] * len(columns)
+    result = {}
+    for (name, dtype), raw in zip(columns, values):
+        convert = float if dtype.startswith("f") else int
+        result[name] = [convert(v) for v in raw]
+        if np is not None:
+            result[name] = np.asarray(result[name], dtype=dtype)
+    return result
+
+
+def run(argv=None):
+    """Command-line entry point: simulate and export the delivery log."""
+    parser = argparse.ArgumentParser(description="Export the simulated delivery log as column tables.")
+    parser.add_argument("out_dir", help="output directory (tables are appended if present)")
+    parser.add_argument("--format", choices=FORMATS, default=None,
+                        help=f"output format (default: {default_format()})")
+    parser.add_argument("--days", type=int, default=None,
+                        help="simulate N days with multi_day.py instead of the single main.py day")
+    parser.add_argument("--operations", metavar="FILE", help="multi_day.py operations file (implies multi-day)")
+    args = parser.parse_args(argv)
+
+    try:
+        with ColumnarWriter(args.out_dir, args.format) as writer:
+            if args.days is None and args.operations is None:
+                timeline = main._day_timeline()
+                _, (_, address_index, _) = main.load_input_data()
+                writer.write_timeline(timeline, address_index, main.SIMULATION_DAY)
+            else:
+                operations = multi_day.load_operations(args.operations) if args.operations else multi_day.Operations()
+                if args.days is not None:
+                    if args.days < 1:
+                        raise ValueError("--days must be at least 1")
+                    operations.days = args.days
+                multi_day.simulate_days(operations, export=writer)
+    except (OSError, ValueError) as exc:
+        print(f"Could not export: {exc}", file=sys.stderr)
+        return 2
+    print(f"Wrote {writer.rows['legs']} legs and {writer.rows['transitions']} status changes"
+          f" to {args.out_dir} ({writer.format})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,289 @@
+"""Dense Distance Matrix for WGUPS Simulator
+
+Process:
+  - Hold the symmetric address-to-address distance table in one contiguous
+    float64 buffer (a NumPy array when NumPy is installed, otherwise a flat
+    array('d')) instead of a ragged list of lists with None holes.
+  - Provide a StopSet that keeps a truck's remaining stop rows in parallel
+    arrays so "nearest remaining stop" is a single masked argmin.
+  - The buffer may also be a read-only memory map of a matrix file
+    (matrix_file.py): float32 cells are widened to float64 on read, and
+    PackedDistanceMatrix reads a packed upper triangle.
+
+Flow:
+  - DistanceMatrix.from_table() takes the (addresses, address_index,
+    distances) tuple returned by parse_distance_csv(), mirrors missing cells
+    and packs the result.
+  - matrix[i][j] keeps working like the list-of-lists it replaces.
+  - Each loaded Package carries an address_row so routing never looks up
+    street strings inside the selection loop.
+  - submatrix() gathers the distances between a few rows as one float64
+    block without touching the rest of a (possibly mapped) matrix.
+
+Complexity:
+  - Construction is O(n²).
+  - distance() is O(1); StopSet.nearest() is one vectorized pass over the
+    truck's stops with O(1) Python-level work.
+"""
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+INF = float("inf")
+
+
+class DistanceMatrix:
+    """
+    Symmetric n x n distance table backed by a contiguous float64 buffer.
+
+    Fields:
+      - addresses: list of street strings, row order
+      - address_index: dict street -> row
+      - size: number of rows/columns
+    """
+
+    def __init__(self, addresses, address_index, values):
+        self.addresses = addresses
+        self.address_index = address_index
+        self.size = len(addresses)
+        self._narrow = False
+        if np is not None:
+            self._data = np.asarray(values, dtype=np.float64).reshape(self.size, self.size)
+        else:
+            self._data = array("d", values)
+
+    @classmethod
+    def from_array(cls, addresses, address_index, data):
+        """
+        Wrap an existing cell buffer without copying it.
+
+        Flow: data is an n x n NumPy array (e.g. a numpy.memmap, float32 or
+        float64) or, without NumPy, a flat sequence of n² floats (e.g. a
+        memoryview over an mmap).
+        Complexity: O(1).
+        """
+        matrix = cls.__new__(cls)
+        matrix.addresses = addresses
+        matrix.address_index = address_index
+        matrix.size = len(addresses)
+        matrix._data = data
+        matrix._narrow = np is not None and data.dtype != np.float64
+        return matrix
+
+    @classmethod
+    def from_table(cls, addresses, address_index, distances):
+        """
+        Build a matrix from parse_distance_csv() output.
+
+        Process: copy every cell into a flat buffer, filling a missing cell
+        from its mirror. A pair missing in both directions is an error.
+        Complexity: O(n²).
+        """
+        n = len(addresses)
+        values = [0.0] * (n * n)
+        for i in range(n):
+            row = distances[i] if i < len(distances) else []
+            for j in range(n):
+                cell = row[j] if j < len(row) else None
+                if cell is None:
+                    mirror = distances[j] if j < len(distances) else []
+                    cell = mirror[i] if i < len(mirror) else None
+                if cell is None:
+                    raise ValueError(f"No distance between {addresses[i]!r} and {addresses[j]!r}")
+                values[i * n + j] = float(cell)
+        return cls(addresses, address_index, values)
+
+    def row_of(self, street):
+        """Return the row index for street, or None if unknown. O(1)."""
+        return self.address_index.get(street)
+
+    def distance(self, i, j):
+        """Return the distance between rows i and j as a float. O(1)."""
+        if np is not None:
+            return float(self._data[i, j])
+        return self._data[i * self.size + j]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        """Return row i so matrix[i][j] works like the old list-of-lists."""
+        if np is not None:
+            return _WideRow(self._data[i]) if self._narrow else self._data[i]
+        return self._data[i * self.size:(i + 1) * self.size]
+
+    def as_array(self):
+        """Return the backing n x n NumPy array, or None without NumPy. O(1)."""
+        return self._data if np is not None else None
+
+    def submatrix(self, rows, cols=None):
+        """
+        Return the float64 block of distances rows x cols (cols defaults to rows).
+
+        Flow: returns None without NumPy.
+        Complexity: O(len(rows) · len(cols)); only those cells are read.
+        """
+        if np is None:
+            return None
+        rows = np.asarray(rows, dtype=np.intp)
+        cols = rows if cols is None else np.asarray(cols, dtype=np.intp)
+        return self._data[np.ix_(rows, cols)].astype(np.float64, copy=False)
+
+    def to_lists(self):
+        """Return the matrix as a list of lists of floats. O(n²)."""
+        return [list(map(float, self[i])) for i in range(self.size)]
+
+    def stop_set(self, packages):
+        """Return a StopSet over packages (which must carry address_row)."""
+        return StopSet(self, packages)
+
+
+class PackedDistanceMatrix(DistanceMatrix):
+    """
+    Symmetric matrix stored as its upper triangle, diagonal included.
+
+    Process: row i holds cells (i, i..n-1) and starts at
+    i·n - i·(i-1)/2, so cell (i, j) lives at start(min(i, j)) + |i - j|;
+    the buffer has n(n+1)/2 cells instead of n².
+    Flow: matrix[i] returns a row proxy that supports matrix[i][j] and
+    matrix[i][array_of_rows]; as_array() is None (there is no square
+    array), so callers use submatrix() or cell lookups.
+    """
+
+    def __init__(self, addresses, address_index, data):
+        self.addresses = addresses
+        self.address_index = address_index
+        self.size = len(addresses)
+        self._data = data
+        self._narrow = False
+
+    def _cell(self, i, j):
+        """Return the buffer index of cell (i, j). O(1)."""
+        if i > j:
+            i, j = j, i
+        return i * self.size - i * (i - 1) // 2 + j - i
+
+    def distance(self, i, j):
+        return float(self._data[self._cell(i, j)])
+
+    def __getitem__(self, i):
+        return _PackedRow(self, i)
+
+    def as_array(self):
+        return None
+
+    def submatrix(self, rows, cols=None):
+        if np is None:
+            return None
+        rows = np.asarray(rows, dtype=np.intp)[:, None]
+        cols = rows.T if cols is None else np.asarray(cols, dtype=np.intp)[None, :]
+        return self._gather(rows, cols)
+
+    def _gather(self, rows, cols):
+        """Return cells (rows, cols), broadcast, as float64. O(cells)."""
+        low = np.minimum(rows, cols)
+        starts = low * self.size - low * (low - 1) // 2
+        return self._data[starts + np.abs(rows - cols)].astype(np.float64, copy=False)
+
+    def to_lists(self):
+        n = self.size
+        return [[self.distance(i, j) for j in range(n)] for i in range(n)]
+
+
+class _WideRow:
+    """Row of a float32 matrix that reads out float64 values."""
+    __slots__ = ("_row",)
+
+    def __init__(self, row):
+        self._row = row
+
+    def __getitem__(self, j):
+        return self._row[j].astype(np.float64)
+
+    def __len__(self):
+        return len(self._row)
+
+    def __iter__(self):
+        return iter(self._row.astype(np.float64))
+
+
+class _PackedRow:
+    """Row i of a PackedDistanceMatrix."""
+    __slots__ = ("_matrix", "_i")
+
+    def __init__(self, matrix, i):
+        self._matrix = matrix
+        self._i = i
+
+    def __getitem__(self, j):
+        matrix = self._matrix
+        if np is not None and not isinstance(j, (int, np.integer)):
+            return matrix._gather(np.intp(self._i), np.asarray(j, dtype=np.intp))
+        return float(matrix._data[matrix._cell(self._i, j)])
+
+    def __len__(self):
+        return self._matrix.size
+
+    def __iter__(self):
+        return (self[j] for j in range(self._matrix.size))
+
+
+class StopSet:
+    """
+    A truck's remaining stops as parallel row/mask arrays.
+
+    Process: rows[k] is the matrix row of packages[k]; remaining[k] turns
+    False when that package is delivered. Packages without a known row are
+    never selectable, matching _find_nearest_delivery().
+    """
+
+    def __init__(self, matrix, packages):
+        self.matrix = matrix
+        self.packages = list(packages)
+        self._position = {id(pkg): k for k, pkg in enumerate(self.packages)}
+        rows = [getattr(pkg, "address_row", None) for pkg in self.packages]
+        if np is not None:
+            self.rows = np.array([-1 if r is None else r for r in rows], dtype=np.intp)
+            self.remaining = self.rows >= 0
+        else:
+            self.rows = rows
+            self.remaining = [r is not None for r in rows]
+
+    def discard(self, package):
+        """Mark package as delivered. O(1)."""
+        k = self._position.get(id(package))
+        if k is not None:
+            self.remaining[k] = False
+
+    def nearest(self, from_row):
+        """
+        Return (package, row, distance) of the closest remaining stop.
+
+        Process: gather the distances from from_row to every stop, mask the
+        delivered ones with +inf and take the first argmin (ties resolve to
+        the earliest loaded package, as the list scan did).
+        Flow: returns (None, None, inf) when nothing is selectable.
+        Complexity: O(k) vectorized, O(1) Python overhead with NumPy.
+        """
+        if np is not None:
+            if not self.remaining.any():
+                return None, None, INF
+            dists = np.where(self.remaining, self.matrix[from_row][self.rows], INF)
+            k = int(dists.argmin())
+            dist = float(dists[k])
+            if dist == INF:
+                return None, None, INF
+            return self.packages[k], int(self.rows[k]), dist
+
+        best_k, best = None, INF
+        for k, row in enumerate(self.rows):
+            if self.remaining[k]:
+                dist = self.matrix.distance(from_row, row)
+                if dist < best:
+                    best_k, best = k, dist
+        if best_k is None:
+            return None, None, INF
+        return self.packages[best_k], self.rows[best_k], best
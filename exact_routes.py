@@ -0,0 +1,398 @@
+"""Exact Truck Routes for WGUPS Simulator
+
+Process:
+  - A truck carries at most Truck.MAX_PACKAGES packages and many share an
+    address, so its closed hub -> stops -> hub tour is small enough to solve
+    exactly. Stops are deduplicated to unique matrix rows first.
+  - Held-Karp dynamic program over stop subsets (bitmasks): best[S][j] is
+    the shortest path from the hub through every stop in S ending at j.
+    Subsets are processed one size at a time and, with NumPy, each
+    (size, j) step is a single vectorized min over all subsets containing
+    j, gathering from the previous size's costs only. Only the float64
+    costs are stored (no predecessor table), 8 bytes per (subset, stop):
+    38 MB at 18 stops.
+  - Beyond DP_MAX_STOPS (PURE_DP_MAX_STOPS without NumPy): depth-first
+    branch-and-bound. The incumbent starts as the LocalSearchOptimizer
+    tour; a branch is cut when its length plus the cheapest way into every
+    remaining stop and back into the hub cannot beat the incumbent.
+
+Flow:
+  - ExactRouteOptimizer is a route_optimizer.RouteOptimizer, so it plugs in
+    wherever the local search does: main.ROUTE_OPTIMIZER (then
+    _plan_truck_route() replaces the _find_nearest_delivery() order with
+    the exact tour when that is shorter and makes nothing late) or a
+    scenario's "optimizer": "exact".
+  - Each solve runs under time_budget. When the DP or the search does not
+    finish in time, the best tour found so far (at worst the local search
+    tour) is returned and RouteSolution.optimal is False.
+  - solve_tour() returns the RouteSolution; the command line compares the
+    nearest-neighbor, local-search and exact tours of the day's trucks (or
+    of random instances) to measure the optimality gap:
+        python exact_routes.py [--time-budget 2] [--random 20 --stops 14]
+
+Complexity:
+  - Held-Karp: O(2^m · m²) time, O(2^m · m) memory for m stops.
+  - Branch-and-bound: O(m!) worst case, usually far less; bounded by the
+    time budget.
+"""
+from route_optimizer import RouteOptimizer, LocalSearchOptimizer, tour_length
+from math import comb
+import argparse
+import random
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+INF = float("inf")
+# Largest number of stops solved by the Held-Karp DP (with / without NumPy)
+DP_MAX_STOPS = 18
+PURE_DP_MAX_STOPS = 12
+# Branch-and-bound checks its time budget every this many expanded nodes
+_CHECK_EVERY = 1024
+
+
+class RouteSolution:
+    """
+    Result of one solve_tour() call.
+
+    Fields:
+      - tour: hub row, stop rows, hub row
+      - length: miles
+      - method: "held-karp", "branch-and-bound" or "trivial"
+      - optimal: True when the tour is proven shortest
+      - seconds: solve time
+    """
+
+    def __init__(self, tour, length, method, optimal, seconds):
+        self.tour = tour
+        self.length = length
+        self.method = method
+        self.optimal = optimal
+        self.seconds = seconds
+
+
+def _local_distances(rows, distances):
+    """
+    Return the distances between rows as a NumPy array (or list of lists).
+
+    Complexity: O(k²); one submatrix() gather on a DistanceMatrix.
+    """
+    submatrix = getattr(distances, "submatrix", None)
+    block = submatrix(rows) if submatrix is not None else None
+    if block is None:
+        block = [[float(distances[a][b]) for b in rows] for a in rows]
+        if np is not None:
+            block = np.asarray(block, dtype=np.float64)
+    return block
+
+
+def held_karp(d, deadline=INF):
+    """
+    Shortest closed tour over local nodes 0..m (0 = hub) of matrix d.
+
+    Process: subsets of each size k get a compact index (their rank among
+    the size-k subsets), so cost[k] is an m x C(m, k) float64 block and
+    every step gathers from the previous size's block only. No predecessor
+    table is kept: the walk back finds, at each step, the stop whose cost
+    plus the connecting leg reproduces the stored value.
+    Flow: returns the stop order (local nodes 1..m) or None when `deadline`
+    (a perf_counter value) passes first.
+    Complexity: O(2^m · m²) time, 8 · 2^m · m bytes of costs.
+    """
+    m = len(d) - 1
+    if np is None:
+        return _held_karp_lists(d, deadline)
+    d = np.asarray(d, dtype=np.float64)
+    into = d[1:, 1:]
+    full = (1 << m) - 1
+
+    # Size and rank (combinatorial number system) of every subset
+    masks = np.arange(full + 1, dtype=np.int64)
+    size = np.zeros(full + 1, dtype=np.int64)
+    rank = np.zeros(full + 1, dtype=np.int64)
+    choose = np.array([[comb(n, r) for r in range(m + 2)] for n in range(m + 1)], dtype=np.int64)
+    for j in range(m):
+        bit = (masks >> j) & 1
+        rank += bit * choose[j][size + 1]
+        size += bit
+    # Subsets grouped by size, each group in rank order
+    by_size = np.argsort(size * (full + 1) + rank)
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(size, minlength=m + 1))))
+
+    cost = [None, np.full((m, m), INF)]
+    cost[1][np.arange(m), np.arange(m)] = d[0, 1:]
+    for k in range(2, m + 1):
+        if time.perf_counter() > deadline:
+            return None
+        layer = by_size[bounds[k]:bounds[k + 1]]
+        block = np.full((m, len(layer)), INF)
+        for j in range(m):
+            members = np.flatnonzero((layer >> j) & 1)
+            # Path through subset - {j} ending at i, then i -> j (i = j is INF)
+            candidates = np.take(cost[k - 1], rank[layer[members] ^ (1 << j)], axis=1)
+            candidates += into[:, j, None]
+            block[j, members] = candidates.min(axis=0)
+        cost.append(block)
+
+    def previous(mask, j):
+        prev = mask ^ (1 << j)
+        if prev == 0:
+            return -1
+        k = int(size[mask])
+        stored = cost[k][j, rank[mask]]
+        return int(np.abs(cost[k - 1][:, rank[prev]] + into[:, j] - stored).argmin())
+
+    last = int((cost[m][:, 0] + d[1:, 0]).argmin())
+    return _walk_back(previous, full, last)
+
+
+def _held_karp_lists(d, deadline):
+    """held_karp() without NumPy, over flat Python lists. O(2^m · m²)."""
+    m = len(d) - 1
+    full = (1 << m) - 1
+    best = [INF] * ((full + 1) * m)
+    parent = [-1] * ((full + 1) * m)
+    for j in range(m):
+        best[(1 << j) * m + j] = d[0][j + 1]
+    for mask in range(1, full + 1):
+        if mask & 255 == 0 and time.perf_counter() > deadline:
+            return None
+        base = mask * m
+        for j in range(m):
+            if not mask >> j & 1 or mask == 1 << j:
+                continue
+            prev = (mask ^ (1 << j)) * m
+            cost, choice = INF, -1
+            for i in range(m):
+                c = best[prev + i]
+                if c < INF:
+                    c += d[i + 1][j + 1]
+                    if c < cost:
+                        cost, choice = c, i
+            best[base + j] = cost
+            parent[base + j] = choice
+    base = full * m
+    last = min(range(m), key=lambda j: best[base + j] + d[j + 1][0])
+    return _walk_back(lambda mask, j: parent[mask * m + j], full, last)
+
+
+def _walk_back(parent, mask, last):
+    """Rebuild the stop order (local nodes 1..m) from parent(mask, j), the DP predecessor (-1 at the hub). O(m)."""
+    order = []
+    while last >= 0:
+        order.append(last + 1)
+        previous = parent(mask, last)
+        mask ^= 1 << last
+        last = previous
+    order.reverse()
+    return order
+
+
+def branch_and_bound(d, incumbent, deadline=INF):
+    """
+    Shortest closed tour over local nodes 0..m by depth-first search.
+
+    Process: extend the path nearest stop first; cut a branch when
+    length + sum of each remaining node's cheapest incoming edge (the hub
+    included, as the tour must return) reaches the incumbent's length.
+    Flow: `incumbent` is a stop order to beat. Returns (order, proven):
+    proven is False when `deadline` (perf_counter) stopped the search.
+    Complexity: O(m!) worst case.
+    """
+    n = len(d)
+    d = [[float(x) for x in row] for row in d]
+    cheapest_in = [min(d[u][v] for u in range(n) if u != v) for v in range(n)]
+    by_distance = [sorted((v for v in range(1, n) if v != u), key=lambda v: d[u][v]) for u in range(n)]
+    best_order = list(incumbent)
+    best_length = _order_length(d, best_order)
+    visited = [False] * n
+    path = []
+    expanded = 0
+    stopped = False
+
+    def search(node, length, bound):
+        nonlocal best_order, best_length, expanded, stopped
+        expanded += 1
+        if expanded % _CHECK_EVERY == 0 and time.perf_counter() > deadline:
+            stopped = True
+        if stopped:
+            return
+        if len(path) == n - 1:
+            total = length + d[node][0]
+            if total < best_length - 1e-9:
+                best_order, best_length = list(path), total
+            return
+        for v in by_distance[node]:
+            if visited[v]:
+                continue
+            step = length + d[node][v]
+            rest = bound - cheapest_in[v]
+            if step + rest >= best_length - 1e-9:
+                continue
+            visited[v] = True
+            path.append(v)
+            search(v, step, rest)
+            path.pop()
+            visited[v] = False
+
+    search(0, 0.0, sum(cheapest_in))
+    return best_order, not stopped
+
+
+def _order_length(d, order):
+    """Length of the closed tour 0 -> order -> 0. O(m)."""
+    length, prev = 0.0, 0
+    for node in order:
+        length += d[prev][node]
+        prev = node
+    return length + d[prev][0]
+
+
+def solve_tour(tour, distances, time_budget=1.0, heuristic=None):
+    """
+    Return a RouteSolution for the closed tour [hub, stops..., hub].
+
+    Process: deduplicate the stop rows, then run Held-Karp (up to
+    DP_MAX_STOPS) or branch-and-bound seeded with `heuristic`'s tour
+    (LocalSearchOptimizer by default). A DP that runs out of time falls
+    back to the heuristic tour.
+    Complexity: see module docstring.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    hub = tour[0]
+    rows = list(dict.fromkeys(row for row in tour[1:-1] if row != hub))
+    if len(rows) < 3:
+        closed = [hub] + rows + [hub]
+        return RouteSolution(closed, tour_length(closed, distances), "trivial", True,
+                             time.perf_counter() - started)
+
+    nodes = [hub] + rows
+    d = _local_distances(nodes, distances)
+    limit = DP_MAX_STOPS if np is not None else PURE_DP_MAX_STOPS
+    order, method, optimal = None, "held-karp", True
+    if len(rows) <= limit:
+        order = held_karp(d, deadline)
+    if order is None:
+        seed = (heuristic or LocalSearchOptimizer()).improve([hub] + rows + [hub], distances)
+        local = {row: k for k, row in enumerate(nodes)}
+        order, optimal = branch_and_bound(d, [local[row] for row in seed[1:-1]], deadline)
+        method = "branch-and-bound"
+    closed = [hub] + [nodes[k] for k in order] + [hub]
+    return RouteSolution(closed, tour_length(closed, distances), method, optimal,
+                         time.perf_counter() - started)
+
+
+class ExactRouteOptimizer(RouteOptimizer):
+    """
+    Optimal hub-to-hub tours within a time budget.
+
+    Fields:
+      - time_budget: seconds allowed per improve() call
+      - fallback: heuristic seeding branch-and-bound and tried second by
+        candidates() (LocalSearchOptimizer by default)
+      - last: RouteSolution of the latest call (None before the first)
+    """
+
+    def __init__(self, time_budget=1.0, fallback=None):
+        self.time_budget = float(time_budget)
+        self.fallback = fallback or LocalSearchOptimizer()
+        self.last = None
+
+    def improve(self, tour, distances):
+        """Return the exact (or best found in time) tour; never longer than tour. O(2^m · m²)."""
+        self.last = solve_tour(tour, distances, self.time_budget, self.fallback)
+        if self.last.length > tour_length(tour, distances):
+            return list(tour)
+        return self.last.tour
+
+    def candidates(self, tour, distances):
+        """
+        Return the exact tour, then the local search tour.
+
+        Flow: the shortest tour ignores deadlines; when _plan_truck_route()
+        rejects it for making a package late, the local search tour (often
+        nearly as short) is tried before falling back to the seed.
+        Complexity: improve() plus one local search.
+        """
+        return [self.improve(tour, distances), self.fallback.improve(tour, distances)]
+
+
+def _nearest_neighbor_tour(rows, hub, distances):
+    """Closed nearest-neighbor tour from the hub over rows. O(m²)."""
+    remaining = list(dict.fromkeys(rows))
+    tour = [hub]
+    while remaining:
+        nxt = min(remaining, key=lambda row: distances[tour[-1]][row])
+        remaining.remove(nxt)
+        tour.append(nxt)
+    return tour + [hub]
+
+
+def _day_tours():
+    """Yield (label, nearest-neighbor tour, distances) for each truck of the day's assignment."""
+    import main
+    from truck import Truck
+    from truck_assignment import assign_packages
+
+    packages, (_, address_index, distances) = main.load_input_data()
+    address_index.resolve_packages(packages.items())
+    trucks = [Truck(departure, "HUB") for departure in main.TRUCK_DEPARTURES]
+    assign_packages(
+        [pkg for _, pkg in sorted(packages.items(), key=lambda k: k[0])],
+        trucks, address_index, distances, main.SIMULATION_DAY,
+        address_rows={pid: address_index.get(fix[1]) for pid, fix in main.ADDRESS_CORRECTIONS.items()},
+        correction_times={pid: fix[0] for pid, fix in main.ADDRESS_CORRECTIONS.items()},
+    )
+    hub = address_index["HUB"]
+    for num, truck in enumerate(trucks, 1):
+        rows = [pkg.address_row for pkg in truck.get_packages() if pkg.address_row is not None]
+        yield f"truck {num}", _nearest_neighbor_tour(rows, hub, distances), distances
+
+
+def _random_tours(count, stops, seed):
+    """Yield (label, nearest-neighbor tour, distances) for random Euclidean instances."""
+    rng = random.Random(seed)
+    for k in range(count):
+        points = [(rng.uniform(0, 10), rng.uniform(0, 10)) for _ in range(stops + 1)]
+        distances = [[round(((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5, 1) for bx, by in points]
+                     for ax, ay in points]
+        yield f"random {k + 1}", _nearest_neighbor_tour(range(1, stops + 1), 0, distances), distances
+
+
+def main(argv=None):
+    """Print nearest-neighbor, local-search and exact tour lengths and the gaps. O(instances · solve)."""
+    parser = argparse.ArgumentParser(description="Measure the optimality gap of the route heuristics.")
+    parser.add_argument("--time-budget", type=float, default=2.0, help="seconds per exact solve")
+    parser.add_argument("--random", type=int, default=0, metavar="N",
+                        help="solve N random instances instead of the day's trucks")
+    parser.add_argument("--stops", type=int, default=14, help="stops per random instance")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    instances = _random_tours(args.random, args.stops, args.seed) if args.random else _day_tours()
+    local_search = LocalSearchOptimizer()
+    header = (f"{'Instance':<10} | {'Stops':>5} | {'NN mi':>7} | {'2opt mi':>7} | {'Exact mi':>8}"
+              f" | {'NN gap':>7} | {'2opt gap':>8} | {'Method':<16} | {'Proven':<6} | {'Seconds':>7}")
+    print(header)
+    print("-" * len(header))
+    for label, tour, distances in instances:
+        nn = tour_length(tour, distances)
+        improved = tour_length(local_search.improve(tour, distances), distances)
+        exact = solve_tour(tour, distances, args.time_budget, local_search)
+
+        def gap(length):
+            return (length / exact.length - 1.0) * 100.0 if exact.length else 0.0
+
+        print(f"{label:<10} | {len(exact.tour) - 2:>5} | {nn:>7.1f} | {improved:>7.1f} | {exact.length:>8.1f}"
+              f" | {gap(nn):>6.1f}% | {gap(improved):>7.1f}% | {exact.method:<16}"
+              f" | {'yes' if exact.optimal else 'no':<6} | {exact.seconds:>7.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""Vectorized Fleet Status Snapshots for WGUPS Simulator
+
+Process:
+  - Flatten a finalized DeliveryTimeline into parallel per-package arrays
+    in id order: status before any leg, time the package reached the hub
+    (streamed packages), start and arrival of its delivery leg and the
+    spans route events held it off a truck.
+  - The status of every package at time T is then a few array comparisons
+    (NumPy when installed, one list pass otherwise):
+        status = initial
+        status[held from <= T < held until] = DELAYED
+        status[leg start < T] = EN_ROUTE
+        status[leg start < T and arrival <= T] = DELIVERED
+    which is exactly DeliveryTimeline.package_at()'s rule, without building
+    a Package object per package per query.
+
+Flow:
+  - DeliveryTimeline.fleet() builds the FleetSnapshot once and caches it.
+  - status_codes(T) returns the PackageStatus value of every package (0 for
+    one not ingested yet); status_at(T) wraps that in a FleetStatus, an
+    id-ordered view with per-status counts, so no query re-sorts anything.
+  - Times may be datetimes or seconds after `origin` (midnight of the
+    simulated day); dashboards sampling many timestamps can pass seconds.
+
+Complexity:
+  - Building: O(n + h) for n packages and h held spans.
+  - status_codes(): O(n + h) element operations in a constant number of
+    NumPy passes; O(1) Python-level work per query.
+"""
+from Enums.package_status import PackageStatus
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+INF = float("inf")
+# Status code of a package not (yet) at the hub in the snapshot
+ABSENT = 0
+
+_DELAYED = PackageStatus.DELAYED.value
+_EN_ROUTE = PackageStatus.EN_ROUTE.value
+_DELIVERED = PackageStatus.DELIVERED.value
+_STATUSES = {status.value: status for status in PackageStatus}
+
+
+class FleetStatus:
+    """
+    Status of the whole fleet's packages at one time, in id order.
+
+    Fields:
+      - ids: package ids present at that time (ascending)
+      - codes: PackageStatus value per id
+      - delivered_at: seconds after origin of each delivery (NaN / None if
+        not delivered)
+    """
+
+    def __init__(self, origin, ids, codes, delivered_at):
+        self.origin = origin
+        self.ids = ids
+        self.codes = codes
+        self.delivered_at = delivered_at
+
+    def __len__(self):
+        return len(self.ids)
+
+    def items(self):
+        """Yield (id, PackageStatus) in id order. O(n)."""
+        for pid, code in zip(self.ids, self.codes):
+            yield int(pid), _STATUSES[int(code)]
+
+    def counts(self):
+        """Return {PackageStatus: number of packages}. O(n)."""
+        if np is not None:
+            tally = np.bincount(self.codes, minlength=len(_STATUSES) + 1)
+        else:
+            tally = [0] * (len(_STATUSES) + 1)
+            for code in self.codes:
+                tally[code] += 1
+        return {status: int(tally[value]) for value, status in _STATUSES.items()}
+
+    def delivery_time(self, k):
+        """Return the delivery datetime of the k-th package, or None. O(1)."""
+        seconds = self.delivered_at[k]
+        if seconds is None or seconds != seconds:
+            return None
+        return self.origin + timedelta(seconds=float(seconds))
+
+
+class FleetSnapshot:
+    """
+    Per-package delivery arrays of one recorded day.
+
+    Fields (parallel, id order; times in seconds after origin):
+      - ids, initial (PackageStatus values before any leg)
+      - visible_from: when a streamed package reached the hub (-inf otherwise)
+      - leg_start / arrival: its delivery leg (inf when never delivered)
+      - hold_rows / hold_from / hold_until: DELAYED spans by package position
+    """
+
+    def __init__(self, origin, ids, initial, visible_from, leg_start, arrival, holds=()):
+        self.origin = origin
+        holds = list(holds)
+        if np is not None:
+            self.ids = np.asarray(ids, dtype=np.int64)
+            self.initial = np.asarray(initial, dtype=np.int8)
+            self.visible_from = np.asarray(visible_from, dtype=np.float64)
+            self.leg_start = np.asarray(leg_start, dtype=np.float64)
+            self.arrival = np.asarray(arrival, dtype=np.float64)
+            self.hold_rows = np.asarray([h[0] for h in holds], dtype=np.intp)
+            self.hold_from = np.asarray([h[1] for h in holds], dtype=np.float64)
+            self.hold_until = np.asarray([h[2] for h in holds], dtype=np.float64)
+            self._all_visible = bool((self.visible_from == -INF).all())
+        else:
+            self.ids = list(ids)
+            self.initial = list(initial)
+            self.visible_from = list(visible_from)
+            self.leg_start = list(leg_start)
+            self.arrival = list(arrival)
+            self.hold_rows = [h[0] for h in holds]
+            self.hold_from = [h[1] for h in holds]
+            self.hold_until = [h[2] for h in holds]
+            self._all_visible = all(v == -INF for v in self.visible_from)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def seconds(self, moment):
+        """Return moment (datetime or seconds) as seconds after origin. O(1)."""
+        if isinstance(moment, datetime):
+            return (moment - self.origin).total_seconds()
+        return float(moment)
+
+    def status_codes(self, moment):
+        """
+        Return the PackageStatus value of every package at moment (ABSENT if
+        it was not ingested yet), in id order.
+
+        Complexity: O(n + h) in a few vectorized passes.
+        """
+        t = self.seconds(moment)
+        if np is None:
+            return self._status_codes_list(t)
+        codes = self.initial.copy()
+        if len(self.hold_rows):
+            held = (self.hold_from <= t) & (t < self.hold_until)
+            codes[self.hold_rows[held]] = _DELAYED
+        started = self.leg_start < t
+        codes[started] = _EN_ROUTE
+        codes[started & (self.arrival <= t)] = _DELIVERED
+        if not self._all_visible:
+            codes[self.visible_from > t] = ABSENT
+        return codes
+
+    def _status_codes_list(self, t):
+        """status_codes() without NumPy. O(n + h)."""
+        codes = list(self.initial)
+        for row, held_from, held_until in zip(self.hold_rows, self.hold_from, self.hold_until):
+            if held_from <= t < held_until:
+                codes[row] = _DELAYED
+        for k, (start, arrival, visible) in enumerate(zip(self.leg_start, self.arrival, self.visible_from)):
+            if visible > t:
+                codes[k] = ABSENT
+            elif start < t:
+                codes[k] = _DELIVERED if arrival <= t else _EN_ROUTE
+        return codes
+
+    def status_at(self, moment):
+        """
+        Return a FleetStatus of the packages present at moment.
+
+        Flow: when no package is streamed in later than moment, the arrays
+        are used as they are (no masking copy).
+        Complexity: O(n + h).
+        """
+        t = self.seconds(moment)
+        codes = self.status_codes(t)
+        if np is not None:
+            delivered_at = np.where(codes == _DELIVERED, self.arrival, np.nan)
+            if self._all_visible:
+                return FleetStatus(self.origin, self.ids, codes, delivered_at)
+            present = codes != ABSENT
+            return FleetStatus(self.origin, self.ids[present], codes[present], delivered_at[present])
+        keep = [k for k, code in enumerate(codes) if code != ABSENT]
+        return FleetStatus(
+            self.origin,
+            [self.ids[k] for k in keep],
+            [codes[k] for k in keep],
+            [self.arrival[k] if codes[k] == _DELIVERED else None for k in keep],
+        )
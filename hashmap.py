@@ -1,157 +1,282 @@
 """CustomHashMap module.
 
-This implementation was adapted from: https://www.youtube.com/watch?v=9HFbhPscPU0.
+The original separate-chaining version was adapted from:
+https://www.youtube.com/watch?v=9HFbhPscPU0.
 
 Process:
-  - Provide a small separate-chaining hash map used to store Package objects
-    keyed by package id. The map grows automatically when the load factor
-    exceeds `max_load`.
+  - Provide a small open-addressing hash map used to store Package objects
+    keyed by package id. Keys and values live in two dense lists in insertion
+    order; a separate slot index (linear probing) maps each key's hash slot
+    to its position in those lists. The map grows automatically when the
+    load factor exceeds `max_load`.
+  - Integer keys (package ids) are hashed with a Fibonacci multiplicative
+    hash directly on the integer; other hashable keys go through hash() first.
+    Keys are never converted to strings.
 
 Flow:
   - Callers create the map, add items with add(key, value) or map[key] = value,
     retrieve with get(key) or map[key], and remove with delete(key).
+  - keys()/items() return entries in insertion order, so copying one map
+    into another never feeds keys in hash-slot order (which clusters a
+    smaller linear-probing table).
+  - reserve(n) pre-sizes the slot index so n items fit without resizing.
+
+Instrumentation:
+  - While profiling.ACTIVE is set, add/get/lookups record their probe length
+    (slots past the home slot) as "hashmap.probe" and resizes count as
+    "hashmap.resize"; the length is derived from the final slot, so the
+    probe loops themselves are unchanged.
 
 Complexity notes:
   - Average-case add/get/delete are O(1) when the load factor is kept low.
-  - Resizing is O(n) and happens occasionally; amortized cost of add remains A(1).
+  - Resizing is O(n) and happens occasionally; amortized cost of add remains O(1).
 """
+import profiling
+
+# 2**64 / golden ratio; multiplying by it spreads consecutive ids across slots
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+# Slot index value of an unused slot
+_FREE = -1
+
+
+class _Deleted:
+    """Marker type for a deleted entry in the dense key list."""
+
+    def __repr__(self):
+        return "<deleted>"
+
+
+_DELETED = _Deleted()
 
 
 class CustomHashMap:
     """
-    Separate-chaining hash map with simple automatic growth.
+    Open-addressing (linear probing) hash map with automatic growth.
 
-    The implementation uses a list of buckets where each bucket is a Python
-    list of [key, value] pairs. Collisions are resolved by appending to the
-    bucket (chaining). The number of buckets is doubled when the load factor
-    exceeds `max_load` to keep bucket lengths small.
+    The slot index length is always a power of two so a slot is the top bits
+    of the 64-bit multiplicative hash; each slot holds a position in the
+    dense key/value lists or _FREE. Deletion shifts later slots of the probe
+    run back instead of leaving tombstones in the index; the dense lists are
+    compacted on the next resize. The index is doubled when the load factor
+    exceeds `max_load`.
     """
 
     def __init__(self, size=40, max_load=0.75):
-        # store number of buckets and initialize empty bucket lists
-        self.size = max(1, int(size))
-        self.map = [[] for _ in range(self.size)]
+        self.max_load = float(max_load)
         # count of stored key/value pairs
         self.count = 0
-        self.max_load = float(max_load)
+        self._keys = []
+        self._values = []
+        self._allocate(self._capacity_for(max(1, int(size))))
+
+    @staticmethod
+    def _capacity_for(slots):
+        """Return the smallest power of two >= slots (at least 8). O(1)."""
+        return max(8, 1 << (slots - 1).bit_length())
+
+    def _allocate(self, capacity):
+        """Reset the slot index to `capacity` free slots. O(capacity)."""
+        self.size = capacity
+        self._shift = 64 - (capacity.bit_length() - 1)
+        self._index = [_FREE] * capacity
 
     def _get_hash(self, key):
         """
-        Compute a simple polynomial rolling hash and return bucket index.
+        Return the home slot of key.
 
-        Process: build an integer hash from the string form of the key, then
-        reduce it modulo `self.size` to obtain the bucket index.
-        Flow: used by add/get/delete to choose which bucket to operate on.
-        Complexity: O(k) where k is length of str(key) (usually small).
+        Process: take the integer itself (or hash(key) for other types),
+        multiply by the 64-bit golden-ratio constant and keep the top bits.
+        Flow: add/get/_find inline this for speed.
+        Complexity: O(1).
         """
-        h = 0
-        for char in str(key):
-            h = (h * 31 + ord(char)) % self.size
-        return h
+        h = key if type(key) is int else hash(key)
+        return ((h * _GOLDEN) & _MASK64) >> self._shift
 
     def _resize(self, new_size):
         """
-        Resize the bucket array to new_size and rehash all items.
+        Rebuild the slot index with new_size slots.
 
-        Process: snapshot existing items, allocate a new bucket list of the
-        requested size, reset counters, and re-insert each item (which
-        recomputes bucket indices under the new size).
-        Flow: invoked by add() when the load factor exceeds `max_load`.
+        Process: drop deleted entries from the dense lists (keeping insertion
+        order), allocate a new index (rounded up to a power of two) and place
+        each position at the first free slot of its key's probe run. Keys are
+        known to be distinct, so no equality checks are needed.
+        Flow: invoked by add() when the load factor exceeds `max_load`, and
+        by reserve().
         Complexity: O(n) where n is number of stored items.
         """
-        old_items = [(pair[0], pair[1]) for bucket in self.map for pair in bucket]
-        self.size = max(1, int(new_size))
-        self.map = [[] for _ in range(self.size)]
-        self.count = 0
-        for k, v in old_items:
-            # re-inserting will increment self.count appropriately
-            self.add(k, v)
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.count("hashmap.resize")
+        if self.count != len(self._keys):
+            live = [(k, v) for k, v in zip(self._keys, self._values) if k is not _DELETED]
+            self._keys = [k for k, _ in live]
+            self._values = [v for _, v in live]
+        self._allocate(self._capacity_for(max(1, int(new_size))))
+        index = self._index
+        mask = self.size - 1
+        shift = self._shift
+        for pos, k in enumerate(self._keys):
+            i = (((k if type(k) is int else hash(k)) * _GOLDEN) & _MASK64) >> shift
+            while index[i] != _FREE:
+                i = (i + 1) & mask
+            index[i] = pos
+
+    def reserve(self, n):
+        """
+        Pre-size the map so n items fit without any further resize.
+
+        Complexity: O(n) if the map grows, otherwise O(1).
+        """
+        needed = int(n / self.max_load) + 1
+        if needed > self.size:
+            self._resize(needed)
+
+    def _find(self, key):
+        """Return (slot, position) of key; position is -1 if missing. Average O(1)."""
+        index, keys = self._index, self._keys
+        mask = self.size - 1
+        i = home = (((key if type(key) is int else hash(key)) * _GOLDEN) & _MASK64) >> self._shift
+        while True:
+            pos = index[i]
+            if pos == _FREE:
+                break
+            k = keys[pos]
+            if k is key or k == key:
+                break
+            i = (i + 1) & mask
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.observe("hashmap.probe", (i - home) & mask)
+        return i, -1 if pos == _FREE else pos
 
     def add(self, key, value):
         """
         Insert or update a key/value pair.
 
-        Process: compute bucket index, update if key exists, otherwise append
-        a new pair and increment count. If load factor exceeds `max_load`,
-        trigger a resize (doubling the bucket count).
+        Process: probe from the key's home slot; update the value if the key
+        is found, otherwise append it to the dense lists, point the first
+        free slot at it and increment count. If load factor exceeds
+        `max_load`, trigger a resize (doubling the slot count).
 
         Flow: callers use add() to populate the map during CSV parsing.
         Complexity: average O(1), occasional O(n) during resize.
         """
-        idx = self._get_hash(key)
-        bucket = self.map[idx]
-        for pair in bucket:
-            if pair[0] == key:
-                # update existing entry
-                pair[1] = value
-                return True
-        # append new key/value pair
-        bucket.append([key, value])
+        index, keys = self._index, self._keys
+        mask = self.size - 1
+        i = home = (((key if type(key) is int else hash(key)) * _GOLDEN) & _MASK64) >> self._shift
+        while True:
+            pos = index[i]
+            if pos == _FREE:
+                break
+            k = keys[pos]
+            if k is key or k == key:
+                break
+            i = (i + 1) & mask
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.observe("hashmap.probe", (i - home) & mask)
+        if pos != _FREE:
+            # update existing entry
+            self._values[pos] = value
+            return True
+        index[i] = len(keys)
+        keys.append(key)
+        self._values.append(value)
         self.count += 1
-        # check load factor and grow if necessary
-        if (self.count / self.size) > self.max_load:
-            self._resize(self.size * 2)
+        # check load factor and grow if necessary (deleted entries are
+        # compacted away instead when they make up the excess)
+        if len(keys) > self.size * self.max_load:
+            grow = self.count > self.size * self.max_load / 2
+            self._resize(self.size * 2 if grow else self.size)
         return True
 
     def get(self, key):
         """
         Retrieve value by key or return None if missing.
 
-        Process: hash to locate bucket and linear-scan the bucket for key.
-        Complexity: average O(1), worst-case O(n) if many items collide.
+        Process: probe from the key's home slot until the key or a free slot
+        is found.
+        Complexity: average O(1).
         """
-        idx = self._get_hash(key)
-        for pair in self.map[idx]:
-            if pair[0] == key:
-                return pair[1]
-        return None
+        index, keys = self._index, self._keys
+        mask = self.size - 1
+        i = home = (((key if type(key) is int else hash(key)) * _GOLDEN) & _MASK64) >> self._shift
+        while True:
+            pos = index[i]
+            if pos == _FREE:
+                break
+            k = keys[pos]
+            if k is key or k == key:
+                break
+            i = (i + 1) & mask
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.observe("hashmap.probe", (i - home) & mask)
+        return None if pos == _FREE else self._values[pos]
 
     def delete(self, key):
         """
         Remove key and return True if removed, False otherwise.
 
-        Process: locate bucket and pop the matching pair. Decrement count so
-        load factor remains accurate.
+        Process: mark the dense entry deleted, free its slot, then walk the
+        rest of the probe run and shift back every slot whose key's home is
+        not between the hole and its current slot (backward-shift deletion).
+        Decrement count so load factor remains accurate.
         Complexity: average O(1).
         """
-        idx = self._get_hash(key)
-        bucket = self.map[idx]
-        for i, pair in enumerate(bucket):
-            if pair[0] == key:
-                bucket.pop(i)
-                self.count -= 1
-                return True
-        return False
+        hole, pos = self._find(key)
+        if pos < 0:
+            return False
+        index, keys = self._index, self._keys
+        keys[pos] = _DELETED
+        self._values[pos] = None
+        mask = self.size - 1
+        j = hole
+        while True:
+            j = (j + 1) & mask
+            moved = index[j]
+            if moved == _FREE:
+                break
+            home = self._get_hash(keys[moved])
+            # slot j may stay if its home lies cyclically in (hole, j]
+            if hole <= j:
+                stays = hole < home <= j
+            else:
+                stays = home > hole or home <= j
+            if not stays:
+                index[hole] = moved
+                hole = j
+        index[hole] = _FREE
+        self.count -= 1
+        return True
 
     def keys(self):
         """
-        Return a list of keys in bucket order.
+        Return a list of keys in insertion order.
 
-        Note: bucket order depends on the current number of buckets and the
-        hash function; it does not reflect numeric ordering of keys.
         Complexity: O(n).
         """
-        return [pair[0] for bucket in self.map for pair in bucket]
+        return [k for k in self._keys if k is not _DELETED]
 
     def items(self):
         """
-        Return a list of (key, value) pairs in bucket order.
+        Return a list of (key, value) pairs in insertion order.
 
         Complexity: O(n).
         """
-        return [(pair[0], pair[1]) for bucket in self.map for pair in bucket]
+        return [(k, v) for k, v in zip(self._keys, self._values) if k is not _DELETED]
 
     def __len__(self):
         return self.count
 
+    def __contains__(self, key):
+        return self._find(key)[1] >= 0
+
     def __setitem__(self, key, value):
         self.add(key, value)
 
     def __getitem__(self, key):
-        val = self.get(key)
-        if val is None:
+        pos = self._find(key)[1]
+        if pos < 0:
             raise KeyError(key)
-        return val
+        return self._values[pos]
 
     def __str__(self):
-        return str(self.items())
\ No newline at end of file
+        return str(self.items())
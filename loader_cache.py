@@ -0,0 +1,367 @@
+"""Input Loader Cache for WGUPS Simulator
+
+Process:
+  - Keep the parsed package table and distance matrix in memory so repeated
+    simulation runs skip CSV reading, ZIP stripping and the O(n²) symmetric
+    fill done by the parsers in main.py.
+  - Persist the distance table in a compiled binary form next to its CSV so
+    a cold start can skip CSV parsing entirely. For the road-network modes
+    (shortest_paths.DISTANCE_INPUTS) the compiled file holds the completed
+    shortest-path table, so the all-pairs solve also runs once per file
+    version.
+
+Flow:
+  - Each cache entry is keyed by the absolute file path and remembers the
+    file's size, mtime and SHA-256 digest when it was parsed.
+  - On lookup the cheap (size, mtime) check is tried first; if it differs the
+    digest is compared, and only a changed digest triggers a re-parse.
+  - Packages are rebuilt as fresh objects on every call because the simulator
+    mutates them. The distance data is returned shared and must be treated as
+    read-only.
+
+  - A compiled file is read with one bulk read of its cells (np.frombuffer
+    with NumPy); a complete square table is wrapped as a DistanceMatrix
+    without decoding any cell in Python, and the list-of-lists form is only
+    built if a caller asks for it.
+
+Complexity:
+  - Cache hit: O(1) for distances, O(p) for packages (object rebuild only).
+  - Compiled file: one O(n²) bulk read; O(n²) Python decode only for the
+    list-of-lists form.
+  - Cache miss: one parse, plus O(n²) to write the compiled matrix.
+"""
+from address import Address
+from package import Package
+from hashmap import CustomHashMap
+from distance_matrix import DistanceMatrix
+from package_table import PackageTable
+from address_index import AddressIndex
+from shortest_paths import TABLE, load_distance_table
+from matrix_file import open_matrix_file
+from array import array
+import hashlib
+import math
+import os
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+# Suffix appended to the distance CSV path for the compiled matrix file
+COMPILED_SUFFIX = ".compiled"
+
+_MAGIC = b"WGDM"
+_VERSION = 1
+# magic, version, source size, source mtime_ns, source sha256, addresses, rows
+_HEADER = struct.Struct("<4sHQq32sII")
+
+
+def _file_fingerprint(path):
+    """Return (size, mtime_ns) for path. Complexity: O(1)."""
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _file_digest(path):
+    """Return the SHA-256 digest of the file contents. Complexity: O(file size)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+class _CacheEntry:
+    """Parsed data plus the fingerprint of the file it came from."""
+
+    def __init__(self, fingerprint, digest, data):
+        self.fingerprint = fingerprint
+        self.digest = digest
+        self.data = data
+        self.matrix = None
+        # (addresses, address_index, row_lengths, cells) read from a compiled file
+        self.compiled = None
+
+
+def write_compiled_distances(path, fingerprint, digest, addresses, distances):
+    """
+    Write a compiled distance matrix file.
+
+    Process: header with the source fingerprint, then length-prefixed UTF-8
+    addresses, per-row lengths and all cells as float64 (None stored as NaN).
+    Complexity: O(n²).
+    """
+    values = array("d")
+    row_lengths = array("I")
+    for row in distances:
+        row_lengths.append(len(row))
+        values.extend(math.nan if cell is None else cell for cell in row)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, fingerprint[0], fingerprint[1],
+                             digest, len(addresses), len(distances)))
+        for addr in addresses:
+            raw = addr.encode("utf-8")
+            f.write(struct.pack("<I", len(raw)))
+            f.write(raw)
+        row_lengths.tofile(f)
+        values.tofile(f)
+    os.replace(tmp_path, path)
+
+
+def read_compiled_distances(path, fingerprint, source_path):
+    """
+    Read a compiled distance matrix if it still matches the source CSV.
+
+    Process: validate the header against the current (size, mtime) or, if
+    those changed, against the source file's digest.
+    Flow: returns (digest, addresses, address_index, row_lengths, cells) or
+    None when the file is missing, corrupt or stale. cells holds every row's
+    cells back to back as float64 (NaN = missing): a read-only NumPy array
+    when NumPy is installed, otherwise an array('d').
+    Complexity: one O(n²) bulk read, no per-cell Python work.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                return None
+            magic, version, size, mtime_ns, digest, n_addr, n_rows = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _VERSION:
+                return None
+            if (size, mtime_ns) != fingerprint and digest != _file_digest(source_path):
+                return None
+
+            addresses = []
+            for _ in range(n_addr):
+                (length,) = struct.unpack("<I", f.read(4))
+                addresses.append(f.read(length).decode("utf-8"))
+            row_lengths = array("I")
+            row_lengths.fromfile(f, n_rows)
+            count = sum(row_lengths)
+            if np is not None:
+                raw = f.read(count * 8)
+                if len(raw) != count * 8:
+                    return None
+                cells = np.frombuffer(raw, dtype="<f8")
+            else:
+                cells = array("d")
+                cells.fromfile(f, count)
+    except (OSError, EOFError, struct.error, UnicodeDecodeError):
+        return None
+    return digest, addresses, AddressIndex(addresses), row_lengths, cells
+
+
+def _table_rows(row_lengths, cells):
+    """Split compiled cells into the parser's list of rows (NaN -> None). O(n²)."""
+    if np is not None:
+        cells = cells.tolist()
+    distances = []
+    pos = 0
+    for length in row_lengths:
+        distances.append([None if v != v else v for v in cells[pos:pos + length]])
+        pos += length
+    return distances
+
+
+def _square_matrix(addresses, address_index, row_lengths, cells):
+    """
+    Wrap compiled cells as a DistanceMatrix when they form a complete table.
+
+    Flow: returns None unless there are n rows of n cells with no NaN
+    (a table with gaps goes through DistanceMatrix.from_table()).
+    Complexity: O(n²) NaN check (vectorized with NumPy); cells are not copied.
+    """
+    n = len(addresses)
+    if len(row_lengths) != n or any(length != n for length in row_lengths):
+        return None
+    if np is not None:
+        if np.isnan(cells).any():
+            return None
+        return DistanceMatrix.from_array(addresses, address_index, cells.reshape(n, n))
+    if any(v != v for v in cells):
+        return None
+    return DistanceMatrix.from_array(addresses, address_index, cells)
+
+
+class LoaderCache:
+    """
+    File-change aware cache around the package and distance CSV parsers.
+
+    Process: wrap the parser callables and remember their results per file.
+    Flow:
+      - load_packages(path) -> CustomHashMap of fresh Package objects.
+      - load_package_table(path, day) -> fresh columnar PackageTable.
+      - load_distances(path, mode) -> (addresses, address_index, distances), shared.
+      - load_distance_matrix(path, mode) -> DistanceMatrix built once per file version.
+      - load_matrix_file(path) -> memory-mapped matrix (matrix_file.py),
+        mapped once per file version.
+    """
+
+    def __init__(self, package_parser, distance_parser, use_compiled=True):
+        self.package_parser = package_parser
+        self.distance_parser = distance_parser
+        self.use_compiled = use_compiled
+        self._packages = {}
+        self._distances = {}
+        self._matrix_files = {}
+
+    def clear(self):
+        """Drop every in-memory entry (compiled files are kept)."""
+        self._packages.clear()
+        self._distances.clear()
+        self._matrix_files.clear()
+
+    def _lookup(self, entries, key, fingerprint, path):
+        """
+        Return a still-valid entry for key or None.
+
+        Process: accept on identical (size, mtime); otherwise fall back to a
+        content digest so a touched-but-unchanged file is not re-parsed.
+        """
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        if entry.fingerprint == fingerprint:
+            return entry
+        if entry.digest == _file_digest(path):
+            entry.fingerprint = fingerprint
+            return entry
+        return None
+
+    def load_packages(self, path):
+        """
+        Return a fresh package map for path, parsing only if the file changed.
+
+        Complexity: O(p) on a hit (objects rebuilt in original insert order).
+        """
+        entry, parsed = self._package_entry(path)
+        if parsed is not None:
+            return parsed
+
+        packages = CustomHashMap()
+        packages.reserve(len(entry.data))
+        for key_id, pid, street, city, state, zip_code, deadline, weight, truck_number, notes in entry.data:
+            pkg = Package(pid, Address(street, city, state, zip_code), deadline, weight, truck_number, notes)
+            packages.add(key_id, pkg)
+        return packages
+
+    def load_package_table(self, path, day):
+        """
+        Return a fresh PackageTable for path, parsing only if the file changed.
+
+        Complexity: O(p) on a hit; no Package objects are built.
+        """
+        entry, _ = self._package_entry(path)
+        table = PackageTable(day)
+        for key_id, pid, street, city, state, zip_code, deadline, weight, truck_number, notes in entry.data:
+            table.append(key_id, street, city, state, zip_code, deadline, weight, truck_number, notes)
+        return table
+
+    def _package_entry(self, path):
+        """
+        Return (entry, parsed) for a package file.
+
+        Flow: parsed is the parser's fresh map on a miss, otherwise None.
+        """
+        key = os.path.abspath(path)
+        fingerprint = _file_fingerprint(path)
+        entry = self._lookup(self._packages, key, fingerprint, path)
+        if entry is not None:
+            return entry, None
+        parsed = self.package_parser(path)
+        rows = []
+        for pid, pkg in parsed.items():
+            addr = pkg.address
+            rows.append((pid, pkg.id, addr.street, addr.city, addr.state,
+                         addr.zip_code, pkg.deadline, pkg.weight, pkg.truck_number, pkg.notes))
+        entry = _CacheEntry(fingerprint, _file_digest(path), rows)
+        self._packages[key] = entry
+        return entry, parsed
+
+    def load_distances(self, path, mode=TABLE):
+        """
+        Return (addresses, address_index, distances) for path read as `mode`.
+
+        Flow: memory cache -> compiled file next to the CSV -> CSV parser (and
+        write a new compiled file). Each mode has its own entry and compiled
+        file (<csv>.compiled for TABLE, <csv>.<mode>.compiled otherwise).
+        Complexity: O(1) on a memory hit.
+        """
+        entry = self._distance_entry(path, mode)
+        if entry.data is None:
+            addresses, address_index, row_lengths, cells = entry.compiled
+            entry.data = (addresses, address_index, _table_rows(row_lengths, cells))
+        return entry.data
+
+    def _distance_entry(self, path, mode):
+        """
+        Return the cache entry of a distance file, reading or parsing it if needed.
+
+        Flow: an entry read from a compiled file keeps its raw cells in
+        `compiled` and has no `data` until load_distances() decodes them.
+        Complexity: O(1) on a memory hit.
+        """
+        key = (os.path.abspath(path), mode)
+        fingerprint = _file_fingerprint(path)
+        entry = self._lookup(self._distances, key, fingerprint, path)
+        if entry is not None:
+            return entry
+
+        compiled_path = path + COMPILED_SUFFIX if mode == TABLE else f"{path}.{mode}{COMPILED_SUFFIX}"
+        compiled = None
+        if self.use_compiled:
+            compiled = read_compiled_distances(compiled_path, fingerprint, path)
+
+        if compiled is not None:
+            entry = _CacheEntry(fingerprint, compiled[0], None)
+            entry.compiled = compiled[1:]
+        else:
+            digest = _file_digest(path)
+            data = load_distance_table(path, mode, self.distance_parser)
+            if self.use_compiled:
+                try:
+                    write_compiled_distances(compiled_path, fingerprint, digest, data[0], data[2])
+                except OSError:
+                    # Read-only input directory; the in-memory cache still applies
+                    pass
+            entry = _CacheEntry(fingerprint, digest, data)
+
+        self._distances[key] = entry
+        return entry
+
+    def load_distance_matrix(self, path, mode=TABLE):
+        """
+        Return a DistanceMatrix for path, built once per cached table.
+
+        Flow: a complete table read from a compiled file is wrapped without
+        copying (DistanceMatrix.from_array); otherwise the rows are packed
+        with DistanceMatrix.from_table().
+        Complexity: O(1) on a hit, O(n²) the first time (a bulk NaN check
+        for a compiled table).
+        """
+        entry = self._distance_entry(path, mode)
+        if entry.matrix is None and entry.compiled is not None:
+            entry.matrix = _square_matrix(*entry.compiled)
+        if entry.matrix is None:
+            entry.matrix = DistanceMatrix.from_table(*self.load_distances(path, mode))
+        return entry.matrix
+
+    def load_matrix_file(self, path):
+        """
+        Return the memory-mapped matrix in path, remapped only when it changes.
+
+        Flow: only (size, mtime) is compared; hashing a multi-gigabyte matrix
+        file would defeat the O(1) open.
+        Complexity: O(1) on a hit, O(n) to map a new file.
+        """
+        key = os.path.abspath(path)
+        fingerprint = _file_fingerprint(path)
+        entry = self._matrix_files.get(key)
+        if entry is None or entry.fingerprint != fingerprint:
+            entry = _CacheEntry(fingerprint, None, open_matrix_file(path))
+            self._matrix_files[key] = entry
+        return entry.data
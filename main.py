@@ -12,23 +12,103 @@ Flow:
     distance matrix used by routing helpers.
   - simulate_truck_deliveries() is the interactive
     loop used to simulate truck delivery operation.
+  - simulate_from_timeline() answers the same snapshot queries from a
+    full day simulated once and recorded in a DeliveryTimeline.
+  - A package stream (package_stream.py; `--stream FILE|-`) adds packages
+    that reach the hub during the day to the same run.
+  - run() starts the interactive menu, or with command-line arguments
+    (e.g. `--at 10:30 --package 9 --format json`) answers one snapshot query
+    without prompts or pauses and writes it to stdout.
 """
 
-from address import Address
+from address_index import AddressIndex
 from truck import Truck
 from hashmap import CustomHashMap
 from package import Package
 from datetime import datetime, timedelta
 from Enums.package_status import PackageStatus
+from timeline import DeliveryTimeline
+from loader_cache import LoaderCache
+from distance_matrix import DistanceMatrix
+from package_table import PackageTable
+from route_optimizer import LocalSearchOptimizer, tour_length
+from exact_routes import ExactRouteOptimizer
+from route_cache import RouteCache, CachedRouteOptimizer
+from truck_assignment import assign_packages, parse_package_notes
+from simulation_engine import DeliverySimulation
+from package_stream import open_package_stream, package_from_row
+from route_repair import RoutePlan
+from time_windows import plan_time_windows, clock_minutes
+from shortest_paths import TABLE, load_distance_table
+from matrix_file import open_matrix_file
+from scenario import Scenario
+import profiling
+from collections import deque
+import argparse
 import csv
+import json
+import os
 import re
 import sys
 import time
 
 # CONST VARS
 TRUCK_SPEED = 18.0
+# Answer menu snapshots from a once-simulated event timeline instead of re-simulating
+USE_EVENT_TIMELINE = True
+# Reuse parsed CSV data between simulation runs until an input file changes
+USE_LOADER_CACHE = True
+# Route on the dense array-backed DistanceMatrix with vectorized nearest-stop selection
+USE_DISTANCE_MATRIX = True
+# Fewest stops on a truck for the vectorized StopSet selection; smaller loads scan the
+# stops in Python, which is faster below about 30 stops (a 16-package truck always scans)
+STOP_SET_MIN_STOPS = 32
+# Improves each truck's nearest-neighbor tour before it departs (None = pure nearest-neighbor;
+# ExactRouteOptimizer(time_budget=1.0) solves each truck's tour exactly, see exact_routes.py)
+ROUTE_OPTIMIZER = LocalSearchOptimizer(time_budget=0.05)
+# Remember optimized tours per truck stop set in this SQLite file (route_cache.py) so repeat
+# dispatches skip routing and near matches warm-start it (None = always route)
+ROUTE_CACHE_FILE = None
+# Simulated calendar day and latest time a full-day timeline is simulated to
+SIMULATION_DAY = datetime(2020, 1, 1)
+END_OF_DAY = SIMULATION_DAY.replace(hour=23, minute=59, second=59)
+# Drivers available at the hub; a truck only leaves when one of them is free
+NUM_DRIVERS = 2
+# Earliest departure time of each truck (truck number = position + 1)
+TRUCK_DEPARTURES = (
+    SIMULATION_DAY.replace(hour=8, minute=0),
+    SIMULATION_DAY.replace(hour=9, minute=5),
+    SIMULATION_DAY.replace(hour=10, minute=20),
+)
+# Build truck loads from the package notes column instead of the hardcoded id lists
+USE_AUTO_ASSIGNMENT = True
+# Plan each dispatched truck's order around package deadlines (time_windows.py)
+USE_TIME_WINDOWS = False
+# Distance CSV layout: TABLE (complete matrix), SPARSE_TABLE (matrix with gaps) or
+# EDGE_LIST (from,to,miles); the graph layouts are completed with all-pairs shortest paths
+DISTANCE_INPUT = TABLE
+# Memory-map this matrix file (matrix_file.py) instead of reading the distance CSV (None = CSV)
+DISTANCE_MATRIX_FILE = None
+# Keep packages in the columnar PackageTable (PackageView objects) instead of Package objects
+USE_PACKAGE_TABLE = False
+# Package id -> (time the correct address is known, street, city, zip code)
+ADDRESS_CORRECTIONS = {
+    9: (SIMULATION_DAY.replace(hour=10, minute=20), "410 S State St", "Salt Lake City", "84111"),
+}
 DEFAULT_PACKAGE_CSV_ADDRESS = "./Input Files/WGUPS Package File.csv"
 DEFAULT_DISTANCE_CSV_ADDRESS = "./Input Files/WGUPS Distance File.csv"
+# Output formats accepted by the non-interactive command line
+OUTPUT_FORMATS = ("text", "json", "csv", "ndjson")
+PACKAGE_FIELDS = ("id", "address", "city", "zip_code", "weight", "deadline", "truck", "status", "delivery_time")
+TRUCK_FIELDS = ("truck", "current_address", "miles", "packages_left")
+COUNT_FIELDS = ("status", "packages")
+
+# Lazily built full-day DeliveryTimeline shared by menu queries
+_DAY_TIMELINE = None
+# Lazily built LoaderCache wrapping parse_package_csv/parse_distance_csv
+_LOADER_CACHE = None
+# Lazily opened RouteCache on ROUTE_CACHE_FILE
+_ROUTE_CACHE = None
 
 def _print_package_info(package):
     """
@@ -45,6 +125,9 @@ def _print_package_info(package):
         delivery = dt.strftime("%H:%M:%S")
     else:
         delivery = "N/A"
+    truck = package.assigned_truck_number
+    if truck is None:
+        truck = "N/A"
 
     # Custom print formatting for a normalized output
     print(
@@ -54,11 +137,34 @@ def _print_package_info(package):
         f"| Zip Code: {package.address.zip_code:<2} "
         f"| Weight: {package.weight:<2} Kg "
         f"| Deadline: {package.deadline:<10} "
-        f"| Truck: {package.assigned_truck_number:<2} "
+        f"| Truck: {truck:<2} "
         f"| Status: {package.get_status_str():<10} "
         f"| Delivery Time: {delivery}"
     )
 
+def _parse_snapshot_time(text):
+    """
+    Parses a military time "HH:MM" (or "EOD") into a snapshot datetime.
+    Raises ValueError on anything else. Complexity: O(1).
+    """
+    text = text.strip()
+    if text.upper() == "EOD":
+        return END_OF_DAY.replace(second=0)
+    hh, mm = map(int, text.split(":"))
+    return SIMULATION_DAY.replace(hour=hh, minute=mm, second=0)
+
+def _simulate_snapshot(end_time):
+    """
+    Returns the package master list at end_time for the menu options.
+
+    Process: use the recorded timeline when USE_EVENT_TIMELINE is set,
+    otherwise re-run the simulation up to end_time.
+    Flow: the dictionary is in package id order either way.
+    """
+    if USE_EVENT_TIMELINE:
+        return simulate_from_timeline(end_time)
+    return dict(sorted(simulate_truck_deliveries(end_time).items()))
+
 def main_menu():
     """
     Top-level interactive loop.
@@ -82,24 +188,20 @@ def main_menu():
             # Choose what time to simulate delivery process till
             target_time = input("Enter a military time in the format HH:mm (or 'EOD' for end-of-day):\n").strip()
             print()
-            if target_time.upper() == "EOD":
-                snapshot_dt = datetime(2020, 1, 1, 23, 59, 0)
-            else:
-                try:
-                    hh, mm = map(int, target_time.split(":"))
-                    snapshot_dt = datetime(2020, 1, 1, hh, mm, 0)
-                except Exception:
-                    print("Invalid time format. Use HH:MM (e.g. 09:05) or 'EOD'. Returning to menu.")
-                    input("Press Enter to return to the main menu...")
-                    continue
+            try:
+                snapshot_dt = _parse_snapshot_time(target_time)
+            except ValueError:
+                print("Invalid time format. Use HH:MM (e.g. 09:05) or 'EOD'. Returning to menu.")
+                input("Press Enter to return to the main menu...")
+                continue
 
             # Run the simulation up to the requested end_time and get master list
             # The Master List is a logbook of the statues of all package information
-            master_package_list = simulate_truck_deliveries(snapshot_dt)
+            master_package_list = _simulate_snapshot(snapshot_dt)
 
-            # Hashmap is currently unsorted so we sort by package id here
-            for _, package in sorted(master_package_list.items(), key=lambda k: k[0]):
-                _print_package_info(package)    
+            # Snapshots come back in package id order
+            for package in master_package_list.values():
+                _print_package_info(package)
             print()
             input("Press Enter to return to the main menu...")    
 
@@ -116,20 +218,16 @@ def main_menu():
                 continue
 
             target_time = input("Enter a military time in the format HH:mm (or 'EOD' for end-of-day):\n").strip()
-            if target_time.upper() == "EOD":
-                snapshot_dt = datetime(2020, 1, 1, 23, 59, 0)
-            else:
-                try:
-                    hh, mm = map(int, target_time.split(":"))
-                    snapshot_dt = datetime(2020, 1, 1, hh, mm, 0)
-                except Exception:
-                    print("Invalid time format. Use HH:MM (e.g. 09:05) or 'EOD'. Returning to menu.")
-                    input("Press Enter to return to the main menu...")
-                    continue
+            try:
+                snapshot_dt = _parse_snapshot_time(target_time)
+            except ValueError:
+                print("Invalid time format. Use HH:MM (e.g. 09:05) or 'EOD'. Returning to menu.")
+                input("Press Enter to return to the main menu...")
+                continue
 
             # Run the simulation up to the requested snapshot and get master list
             # The Master List is a logbook of the statues of all package information
-            master_package_list = simulate_truck_deliveries(snapshot_dt)
+            master_package_list = _simulate_snapshot(snapshot_dt)
 
             # Validate input is a valid package number
             # Find specific package info and print to console
@@ -173,32 +271,41 @@ def _calculate_return_to_hub(curr_truck, address_index, distances, ROUTE_TIME, T
     curr_truck.current_address = "HUB"
     return ROUTE_TIME + timedelta(minutes=return_minutes)
 
-def _find_nearest_delivery(curr_location, packages, address_index, distances):
+def _find_nearest_delivery(curr_location, packages, address_index, distances, stops=None):
     """
     Find the next closest package destination from the current location.
 
     Process:
       - Look up the current address index.
-      - Iterate through all undelivered packages, checking their address index.
+      - Iterate through all undelivered packages, using the matrix row each
+        was resolved to at load time (address_row; None is skipped).
       - Compute the distance from the current location to each package’s address.
       - Track the package with the smallest distance.
 
     Flow:
       - Returns a tuple (nearest_pkg, nearest_idx, nearest_dist).
       - If no valid package is found, returns (None, None, inf).
+      - When a StopSet (`stops`) for the truck is given, the selection is a
+        single masked argmin over the DistanceMatrix row instead.
 
     Complexity: O(n), where n = number of packages on the truck.
     """
+    if profiling.ACTIVE is not None:
+        profiling.ACTIVE.count("find_nearest_delivery")
+        profiling.ACTIVE.observe("find_nearest_delivery.candidates", len(packages))
 
     # Initialize variables to return
     curr_idx = address_index[curr_location]
+    if stops is not None:
+        return stops.nearest(curr_idx)
+
     nearest_dist = float('inf')
     nearest_pkg = None
     nearest_idx = None
     
     # Iterate through package list
     for package in packages:
-        pkg_idx = address_index.get(package.address.street)
+        pkg_idx = package.address_row
         if pkg_idx is None:
             continue
             
@@ -211,7 +318,225 @@ def _find_nearest_delivery(curr_location, packages, address_index, distances):
             
     return nearest_pkg, nearest_idx, nearest_dist
 
-def simulate_truck_deliveries(end_time):
+def _stop_set(packages, distances):
+    """
+    Returns a StopSet over packages for vectorized nearest-stop selection, or
+    None when the plain scan is faster (not a DistanceMatrix, or fewer than
+    STOP_SET_MIN_STOPS packages).
+    Complexity: O(k) for k packages.
+    """
+    if isinstance(distances, DistanceMatrix) and len(packages) >= STOP_SET_MIN_STOPS:
+        return distances.stop_set(packages)
+    return None
+
+def _deadline_time(package, day):
+    """
+    Returns the package deadline as a datetime on `day`, or None for EOD.
+    Complexity: O(1) (the deadline text is parsed once, into deadline_minutes).
+    """
+    minutes = package.deadline_minutes
+    if minutes is None:
+        return None
+    return day.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+def _late_packages(order, start_time, address_index, distances, speed, hub="HUB"):
+    """
+    Returns the ids of packages in `order` that would arrive after their deadline.
+
+    Process: drive the order from `hub` at `speed` mph, accumulating leg times
+    exactly like the truck loops, and compare each arrival to its deadline.
+    Complexity: O(k), k = packages in the order.
+    """
+    late = set()
+    curr_idx = address_index[hub]
+    clock = start_time
+    for package in order:
+        dist = distances[curr_idx][package.address_row]
+        clock = clock + timedelta(minutes=(dist / speed) * 60.0)
+        curr_idx = package.address_row
+        due = _deadline_time(package, start_time)
+        if due is not None and clock > due:
+            late.add(package.id)
+    return late
+
+def _plan_truck_route(curr_truck, address_index, distances, optimizer, speed, seed=None, hub="HUB"):
+    """
+    Builds the delivery order a truck will drive, improved by `optimizer`.
+
+    Process:
+      - Seed with the nearest-neighbor order `_find_nearest_delivery` produces,
+        or with `seed` (e.g. a deadline time-window order) when given.
+      - Collapse packages sharing an address into one stop and optimize the
+        closed hub -> stops -> hub tour of matrix rows.
+      - Keep the first of the optimizer's candidate tours that is shorter and
+        makes no package late that the seed delivered on time (at `speed` mph).
+    Flow: returns a deque of packages in driving order. Packages whose address
+    is not in the distance table are left out, as the nearest-neighbor loop
+    would never select them.
+    Complexity: O(k²) seed plus the optimizer's budget.
+    """
+    if seed is not None:
+        seed = list(seed)
+    else:
+        remaining = list(curr_truck.get_packages())
+        stops = _stop_set(remaining, distances)
+        seed = []
+        location = curr_truck.current_address
+        while remaining:
+            package, _, _ = _find_nearest_delivery(location, remaining, address_index, distances, stops)
+            if package is None:
+                break
+            seed.append(package)
+            remaining.remove(package)
+            if stops is not None:
+                stops.discard(package)
+            location = package.address.street
+    if optimizer is None:
+        return deque(seed)
+
+    # Group packages by stop, preserving the seed order inside each stop
+    by_row = {}
+    for package in seed:
+        by_row.setdefault(package.address_row, []).append(package)
+    hub_idx = address_index[hub]
+    tour = [hub_idx] + list(by_row) + [hub_idx]
+
+    seed_length = tour_length(tour, distances)
+    start_time = curr_truck.departure_time
+    seed_late = None
+    for improved in optimizer.candidates(tour, distances):
+        if tour_length(improved, distances) >= seed_length:
+            continue
+        order = [package for row in improved[1:-1] for package in by_row[row]]
+        if seed_late is None:
+            seed_late = _late_packages(seed, start_time, address_index, distances, speed, hub)
+        if not _late_packages(order, start_time, address_index, distances, speed, hub) - seed_late:
+            return deque(order)
+    return deque(seed)
+
+def _cached_optimizer(optimizer):
+    """
+    Wraps optimizer in a CachedRouteOptimizer on ROUTE_CACHE_FILE when that is set.
+
+    Flow: the RouteCache is opened once and shared by every run of the
+    process; None (no optimizer) is returned unchanged.
+    Complexity: O(capacity) the first time (loading the file), O(1) after.
+    """
+    global _ROUTE_CACHE
+    if optimizer is None or ROUTE_CACHE_FILE is None:
+        return optimizer
+    if _ROUTE_CACHE is None or _ROUTE_CACHE.path != ROUTE_CACHE_FILE:
+        if _ROUTE_CACHE is not None:
+            _ROUTE_CACHE.close()
+        _ROUTE_CACHE = RouteCache(ROUTE_CACHE_FILE)
+    return CachedRouteOptimizer(optimizer, _ROUTE_CACHE)
+
+def _start_truck_route(curr_truck, address_index, distances, optimizer, speed,
+                       time_windows=False, deadline_report=None, hub="HUB"):
+    """
+    Prepares a dispatched truck's stop selection and returns its selector.
+
+    Process:
+      - Packages carry their distance matrix row (address_row) from loading.
+      - With `time_windows`, order the stops around their deadlines
+        (time_windows.py), then let `optimizer` shorten that order without
+        making anything late; packages no schedule can deliver on time
+        ("infeasible") or that the plan delivers late ("late") are added to
+        `deadline_report` (id -> reason).
+      - Otherwise plan the optimized route when `optimizer` is set, or set up
+        nearest-neighbor selection (vectorized StopSet on a DistanceMatrix
+        for STOP_SET_MIN_STOPS or more stops, a scan of the stops otherwise).
+    Flow: the returned function gives (package, distance) for the next leg
+    from the truck's current address, or (None, inf) when nothing is left.
+    `hub` is the depot the truck returns to (multi_day.py runs several).
+    A planned route is returned as a RoutePlan, which route events can
+    repair in place.
+    Complexity: O(k) setup plus route planning (O(k²) for time windows).
+    """
+    # Deadline-driven order, optionally shortened by the optimizer
+    if time_windows:
+        windows = plan_time_windows(
+            curr_truck.get_packages(),
+            address_index[curr_truck.current_address],
+            address_index[hub],
+            clock_minutes(curr_truck.departure_time),
+            distances,
+            speed,
+        )
+        if deadline_report is not None:
+            deadline_report.update((pid, "infeasible") for pid in windows.infeasible)
+            deadline_report.update((pid, "late") for pid in windows.late)
+        return RoutePlan(
+            _plan_truck_route(curr_truck, address_index, distances, optimizer, speed, seed=windows.order, hub=hub),
+            address_index[curr_truck.current_address],
+            address_index[hub],
+            distances,
+        )
+
+    # Optimized delivery order, driven instead of picking the nearest stop each leg
+    if optimizer is not None:
+        return RoutePlan(
+            _plan_truck_route(curr_truck, address_index, distances, optimizer, speed, hub=hub),
+            address_index[curr_truck.current_address],
+            address_index[hub],
+            distances,
+        )
+
+    stops = _stop_set(curr_truck.get_packages(), distances)
+
+    def next_delivery():
+        # Find next package: nearest address
+        package, _, distance = _find_nearest_delivery(
+            curr_truck.current_address,
+            curr_truck.get_packages(),
+            address_index,
+            distances,
+            stops
+        )
+        if package is not None and stops is not None:
+            stops.discard(package)
+        return package, distance
+
+    return next_delivery
+
+def _load_manual_assignment(master_list_packages, trucks, id_lists=None):
+    """
+    Loads the trucks from package id lists (truck number -> ids).
+
+    Process: Used when USE_AUTO_ASSIGNMENT is off or a scenario lists its own
+    loads; defaults to the three hand-tuned lists. Each id list is loaded in
+    order onto its truck and the truck number recorded on the package.
+    Flow: raises ValueError for an unknown truck number or package id, or a
+    truck given more than Truck.MAX_PACKAGES packages.
+    Complexity: O(n).
+    """
+    if id_lists is None:
+        id_lists = {
+            # Package Id list
+            1: [1, 13, 14, 15, 16, 20, 29, 30, 31, 34, 37, 40, 27, 33, 19],
+            # Truck 2: packages that must be on Truck 2 AND delayed-on-flight packages (arrive ~9:05)
+            2: [3, 18, 36, 38, 6, 25, 28, 32, 35, 39],
+            3: [2, 4, 5, 7, 8, 9, 10, 11, 12, 17, 21, 22, 23, 24, 26],
+        }
+
+    # Load packages
+    for num, ids in id_lists.items():
+        if not 1 <= num <= len(trucks):
+            raise ValueError(f"Assignment names truck {num} but only {len(trucks)} trucks exist")
+        for id in ids:
+            package = master_list_packages.get(id)
+            if package is None:
+                raise ValueError(f"Assignment names unknown package {id}")
+            truck = trucks[num - 1]
+            if len(truck.get_packages()) >= Truck.MAX_PACKAGES:
+                raise ValueError(f"Assignment gives truck {num} more than {Truck.MAX_PACKAGES} packages")
+            truck.add_package(package)
+            package.assigned_truck_number = num
+
+def simulate_truck_deliveries(end_time, recorder=None, verbose=True, scenario=None,
+                              package_path=DEFAULT_PACKAGE_CSV_ADDRESS,
+                              distance_path=DEFAULT_DISTANCE_CSV_ADDRESS,
+                              package_stream=None, route_events=None):
     """
     Simulates the delivery process for all WGUPS trucks up to a given time. Used for both "all
     package" and "siongualr package" menu options
@@ -219,13 +544,15 @@ def simulate_truck_deliveries(end_time):
     Process:
       - Load package and distance data from given CSV Files.
       - Apply special rules (delayed packages, corrected addresses).
-      - Initialize three trucks with specific departure times:
+      - Initialize the trucks with their earliest departure times (TRUCK_DEPARTURES):
           * Truck 1: 8:00 AM (time-sensitive packages).
           * Truck 2: 9:05 AM (waits for delayed packages).
-          * Truck 3: 10:20 AM at the earliest, or once Truck 1 returns to hub.
+          * Truck 3: 10:20 AM at the earliest, or once a driver returns to hub.
       - Assign packages to trucks
-      - For each truck, repeatedly select the nearest package destination using
-        `_find_nearest_delivery` and simulate travel/delivery until:
+      - Schedule delayed-package arrivals and address corrections as events and
+        run the DeliverySimulation event loop with NUM_DRIVERS drivers. Each
+        dispatched truck repeatedly takes its next stop (planned route or
+        `_find_nearest_delivery`) until:
           * All packages on the truck are delivered, or
           * The simulation snapshot time (`end_time`) is reached.
       - If a truck finishes all deliveries, calculate its return trip to the hub.
@@ -233,235 +560,194 @@ def simulate_truck_deliveries(end_time):
         delivery times as appropriate.
 
     Flow:
-      - Trucks are processed in sequence: Truck 1 → Truck 2 → Truck 3.
+      - A truck leaves once it is scheduled, its packages are at the hub with
+        correct addresses and a driver is free; events run in time order.
       - Each delivery leg updates mileage, current address, and package metadata.
       - Partial legs are supported if `end_time` occurs mid-delivery.
       - Returns a dictionary of all packages (id → Package object) with updated state.
-      - Also prints per-truck statistics and total mileage traveled.
+      - Also prints per-truck statistics and total mileage traveled (unless
+        `verbose` is False).
+      - If a `recorder` (DeliveryTimeline) is given, every load, leg, address
+        correction and hub return is reported to it as it happens.
+      - A `scenario` (scenario.Scenario) overrides truck speed, departures,
+        drivers, assignment, delays, the optimizer and time-window routing;
+        unset fields use the CONST VARS.
+      - With time-window routing (USE_TIME_WINDOWS), packages that cannot
+        meet their deadline are printed with the summary.
+      - `package_path`/`distance_path` select other input CSV files.
+      - Package streets are resolved to matrix rows once, up front
+        (address_index.py); fuzzy matches and streets not in the distance
+        table are printed with the summary.
+      - `package_stream` is an iterable of (arrival_time, Package) records
+        (see package_stream.py) ingested into the package map during the
+        run and loaded onto trucks at or returning to the hub.
+      - `route_events` is an iterable of (time, route_repair.RouteEvent);
+        each repairs only the affected truck's remaining route when the
+        clock reaches it, and the repairs are printed with the summary.
 
     Complexity:
       - Package lookups in the hash map: O(1) average.
-      - Route simulation per truck: O(n²) worst case (nearest-neighbor heuristic across n packages).
-      - Overall: O(n²), where n = number of packages.
+      - Route selection per truck: O(n²) worst case (nearest-neighbor heuristic across n packages).
+      - Event loop: O(E log E), E = delivery legs plus truck/package events.
     """
+    scenario = scenario or Scenario()
+    speed = scenario.setting("truck_speed", TRUCK_SPEED)
+    optimizer = ROUTE_OPTIMIZER
+    if scenario.optimizer == "exact":
+        optimizer = ExactRouteOptimizer()
+    elif scenario.optimizer is not None:
+        optimizer = (ROUTE_OPTIMIZER or LocalSearchOptimizer()) if scenario.optimizer else None
+    optimizer = _cached_optimizer(optimizer)
+    assignment = scenario.setting("assignment", "auto" if USE_AUTO_ASSIGNMENT else "manual")
+    delays = scenario.setting("delays", {})
+    time_windows = scenario.setting("time_windows", USE_TIME_WINDOWS)
+    deadline_report = {}
+
     # Load CSV Data
-    master_list_packages = parse_package_csv(DEFAULT_PACKAGE_CSV_ADDRESS)
-    _, address_index, distances = parse_distance_csv(DEFAULT_DISTANCE_CSV_ADDRESS)
+    master_list_packages, (_, address_index, distances) = load_input_data(package_path, distance_path)
 
     # Update values for special cases
-    # Delayed Packages, updating statuses
-    for pid in (6, 25, 28, 32):
-        curr_package = master_list_packages.get(pid)
-        curr_package.package_status = PackageStatus.DELAYED
-        master_list_packages.add(pid, curr_package)
-
-    # If given end time is past 10:20, update package 9 address
-    if end_time >= datetime(2020, 1, 1, 10, 20, 0):
-        curr_package = master_list_packages.get(9)
-        curr_package.address.street = "410 S State St"
-        curr_package.address.city = "Salt Lake City" 
-        curr_package.address.zip_code = "84111"
-        master_list_packages.add(9, curr_package)
-
-    # Truck start times
-    truck_1 = Truck(datetime(2020, 1, 1, 8, 0, 0), "HUB")
-    truck_2 = Truck(datetime(2020, 1, 1, 9, 5, 0), "HUB")
-    truck_3 = Truck(datetime(2020, 1, 1, 10, 20, 0), "HUB")
-
-    # Package Id list
-    t1_ids = [1, 13, 14, 15, 16, 20, 29, 30, 31, 34, 37, 40, 27, 33, 19]
-    # Truck 2: packages that must be on Truck 2 AND delayed-on-flight packages (arrive ~9:05)
-    t2_ids = [3, 18, 36, 38, 6, 25, 28, 32, 35, 39]
-    t3_ids = [2, 4, 5, 7, 8, 9, 10, 11, 12, 17, 21, 22, 23, 24, 26]
-
-    # Load packages
-    for id in t1_ids:
-        package = master_list_packages.get(id)
-        package.assigned_truck_number = 1
-        truck_1.add_package(package)
-
-    for id in t2_ids:
-        package = master_list_packages.get(id)
-
-        # Reformat address here so it matches address in address_index
-        if id in (25, 26):
-            package.address.street = "5383 S 900 East #104"
-
-        package.assigned_truck_number = 2
-        truck_2.add_package(package)
-
-
-    for id in t3_ids:
-        package = master_list_packages.get(id)
-
-        # Reformat address here so it matches address in address_index
-        if id in (25, 26):
-            package.address.street = "5383 S 900 East #104"
+    # Delayed Packages (notes say "Delayed on flight ... until"), updating statuses
+    arrivals = []
+    for pid, curr_package in master_list_packages.items():
+        if pid in delays:
+            available_at = delays[pid]
+        else:
+            available_at = parse_package_notes(curr_package.notes, SIMULATION_DAY).available_at
+        if available_at is not None:
+            curr_package.package_status = PackageStatus.DELAYED
+            arrivals.append((available_at, curr_package))
+
+    # Resolve every package address to its matrix row once (normalized and
+    # fuzzy matching, e.g. "5383 South 900 East #104" -> "5383 S 900 East #104")
+    address_report = address_index.resolve_packages(master_list_packages.items())
+
+    # Earliest truck start times; actual departures are decided by events
+    trucks = [Truck(departure, "HUB") for departure in scenario.setting("departures", TRUCK_DEPARTURES)]
+
+    if assignment == "auto":
+        # Build loads from the notes column and distance matrix; corrected
+        # addresses are planned for even before the correction is applied
+        assign_packages(
+            [pkg for _, pkg in sorted(master_list_packages.items(), key=lambda k: k[0])],
+            trucks,
+            address_index,
+            distances,
+            SIMULATION_DAY,
+            address_rows={pid: address_index.get(fix[1]) for pid, fix in ADDRESS_CORRECTIONS.items()},
+            correction_times={pid: fix[0] for pid, fix in ADDRESS_CORRECTIONS.items()},
+            available_times=delays,
+            speed=speed,
+        )
+    elif assignment == "manual":
+        _load_manual_assignment(master_list_packages, trucks)
+    else:
+        _load_manual_assignment(master_list_packages, trucks, assignment)
+
+    if recorder is not None:
+        for num, truck in enumerate(trucks, 1):
+            recorder.record_truck(num, truck)
+
+    # Run the event-driven simulation; package arrivals and address
+    # corrections hold a truck at the hub until they have happened
+    simulation = DeliverySimulation(
+        trucks,
+        address_index,
+        distances,
+        end_time,
+        speed,
+        scenario.setting("drivers", NUM_DRIVERS),
+        lambda truck: _start_truck_route(truck, address_index, distances, optimizer, speed,
+                                         time_windows, deadline_report),
+        recorder=recorder,
+    )
+    for available_at, curr_package in arrivals:
+        simulation.add_package_arrival(available_at, curr_package)
+    for pid, (fixed_at, street, city, zip_code) in ADDRESS_CORRECTIONS.items():
+        simulation.add_address_correction(fixed_at, master_list_packages.get(pid), street, city, zip_code)
+    if package_stream is not None:
+        simulation.add_package_stream(package_stream, master_list_packages)
+    for event_time, event in route_events or ():
+        simulation.add_route_event(event_time, event)
+    with profiling.span("simulation.run"):
+        simulation.run()
+
+    if recorder is not None:
+        recorder.record_packages(master_list_packages)
 
-        package.assigned_truck_number = 3
-        truck_3.add_package(package)
+    # Console Output - Trucks
+    if verbose:
+        address_report.unresolved.extend((p.id, p.address.street) for p in simulation.unroutable)
+        for line in address_report.lines():
+            print(line)
+        for change in simulation.route_changes:
+            print(f"Route change: {change}")
+        for package in simulation.stranded:
+            print(f"Undeliverable: package {package.id} ({package.notes}) has no truck in service")
+        for pid, reason in sorted(deadline_report.items()):
+            package = master_list_packages.get(pid)
+            if reason == "infeasible":
+                print(f"Deadline: package {pid} cannot reach {package.address.street} by {package.deadline} on any route")
+            else:
+                print(f"Deadline: package {pid} is planned to miss its {package.deadline} deadline")
+        _print_fleet_summary(trucks)
+    return {k: v for k, v in master_list_packages.items()}
 
-    # Start truck routing simulation
-    for curr_truck in (truck_1, truck_2):
-        ROUTE_TIME = curr_truck.departure_time
+def _print_fleet_summary(trucks):
+    """
+    Prints every truck's key info followed by the fleet's total mileage
+    Runtime: O(t), t = number of trucks
+    """
+    # Use num for truck number
+    num = 1
+    for truck in trucks:
+        _print_truck_information(truck, num)
+        num += 1
 
-        # Continue picking nearest package until no packages left or we've reached end_time
-        while ROUTE_TIME < end_time and len(curr_truck.get_packages()) > 0:
-            # Find package with nearest address
-            currLowest_pkg, _, currLowest = _find_nearest_delivery(
-                curr_truck.current_address,
-                curr_truck.get_packages(), 
-                address_index,
-                distances
-            )
+    total = trucks[0].miles_traveled_today
+    for truck in trucks[1:]:
+        total += truck.miles_traveled_today
+    print(f"Total Mileage: {total}")
+    print()
 
-            # No packages
-            if currLowest_pkg is None:
-                break
+def build_day_timeline(package_stream=None):
+    """
+    Simulates the full day once and records it as a DeliveryTimeline.
 
-            # Compute travel time for this leg
-            distance = currLowest
-            travel_minutes = (distance / TRUCK_SPEED) * 60.0
-            leg_duration = timedelta(minutes=travel_minutes)
-            arrival_time = ROUTE_TIME + leg_duration
-
-            # If we can complete this delivery before or at snapshot -> deliver
-            if arrival_time <= end_time:
-                # Advance clock, Update miles, Set status to delivered
-                ROUTE_TIME = arrival_time
-                curr_truck.miles_traveled_today += distance
-                curr_truck.current_address = currLowest_pkg.address.street
-
-                # Set package metadata
-                currLowest_pkg.package_status = PackageStatus.DELIVERED
-                currLowest_pkg.delivery_time = ROUTE_TIME
-                
-                # Remove package from truck
-                try:
-                    curr_truck.remove_package(currLowest_pkg)
-                except Exception:
-                    try:
-                        curr_truck.get_packages().remove(currLowest_pkg)
-                    except Exception:
-                        pass
-
-                # Set truck's departure_time for next leg
-                curr_truck.departure_time = ROUTE_TIME
-                continue
+    Process: run simulate_truck_deliveries() to the end of the day with a
+    recorder attached and no console output, then freeze the event log.
+    Complexity: same as one simulate_truck_deliveries() run, O(n²).
+    """
+    timeline = DeliveryTimeline()
+    simulate_truck_deliveries(END_OF_DAY, recorder=timeline, verbose=False,
+                              package_stream=package_stream)
+    return timeline.finalize()
 
-            # Partial leg: cannot finish before end_time -> advance partially and mark en route
-            available_seconds = (end_time - ROUTE_TIME).total_seconds()
-            leg_seconds = leg_duration.total_seconds()
-            if available_seconds <= 0:
-                break
-            # Find fraction and multiply to distance
-            fraction = min(1.0, available_seconds / leg_seconds)
-            partial_miles = distance * fraction
-            curr_truck.miles_traveled_today += partial_miles
-            # Advance clock to end_time
-            ROUTE_TIME = end_time
-            # Change package status to en route
-            currLowest_pkg.package_status = PackageStatus.EN_ROUTE
-            if not hasattr(currLowest_pkg, "load_time"):
-                currLowest_pkg.load_time = curr_truck.departure_time
-            # Update truck departure_time to snapshot so subsequent logic sees correct time
-            curr_truck.departure_time = ROUTE_TIME
-            # Stop processing this truck (END TIME REACHED)
-            break 
-
-        # If truck is empty, calculate the distance from current address to hub and add mileage
-        if len(curr_truck.get_packages()) == 0:
-            ROUTE_TIME = _calculate_return_to_hub(curr_truck, address_index, distances, ROUTE_TIME, TRUCK_SPEED)
-            curr_truck.departure_time = ROUTE_TIME
-            curr_truck.current_address = "HUB"
-
-    # Set truck_3 departure as 10:20, truck_1 will finish and return to HUB before this (~9:40 am)
-    if len(truck_3.get_packages()) > 0:
-        planned_depart = datetime(2020, 1, 1, 10, 20, 0)
-        if planned_depart <= end_time:
-            truck_3.departure_time = planned_depart
-            ROUTE_TIME = truck_3.departure_time
-            
-            # Continue picking nearest package until no packages left or we've reached end_time
-            while ROUTE_TIME < end_time and len(truck_3.get_packages()) > 0:
-                # Find package with nearest address
-                currLowest_pkg, _, currLowest = _find_nearest_delivery(
-                    truck_3.current_address,
-                    truck_3.get_packages(), 
-                    address_index,
-                    distances
-                )
-
-                # No packages
-                if currLowest_pkg is None:
-                    break
-
-                # Compute travel time for this leg
-                distance = currLowest
-                travel_minutes = (distance / TRUCK_SPEED) * 60.0
-                leg_duration = timedelta(minutes=travel_minutes)
-                arrival_time = ROUTE_TIME + leg_duration
-
-                # If we can complete this delivery before or at snapshot -> deliver
-                if arrival_time <= end_time:
-                    # Advance clock, Update miles, Set status to delivered
-                    ROUTE_TIME = arrival_time
-                    truck_3.miles_traveled_today += distance
-                    truck_3.current_address = currLowest_pkg.address.street
-
-                    # Set package metadata
-                    currLowest_pkg.package_status = PackageStatus.DELIVERED
-                    currLowest_pkg.delivery_time = ROUTE_TIME
-                    
-                    # Remove package from truck
-                    try:
-                        truck_3.remove_package(currLowest_pkg)
-                    except Exception:
-                        try:
-                            truck_3.get_packages().remove(currLowest_pkg)
-                        except Exception:
-                            pass
-
-                    # Set truck's departure_time for next leg
-                    truck_3.departure_time = ROUTE_TIME
-                    continue
-
-                # Partial leg: cannot finish before end_time -> advance partially and mark en route
-                available_seconds = (end_time - ROUTE_TIME).total_seconds()
-                leg_seconds = leg_duration.total_seconds()
-                if available_seconds <= 0:
-                    break
-                # Find fraction and multiply to distance
-                fraction = min(1.0, available_seconds / leg_seconds)
-                partial_miles = distance * fraction
-                truck_3.miles_traveled_today += partial_miles
-                # Advance clock to end_time
-                ROUTE_TIME = end_time
-                # Change package status to en route
-                currLowest_pkg.package_status = PackageStatus.EN_ROUTE
-                if not hasattr(currLowest_pkg, "load_time"):
-                    currLowest_pkg.load_time = truck_3.departure_time
-                # Update truck departure_time to snapshot so subsequent logic sees correct time
-                truck_3.departure_time = ROUTE_TIME
-                # Stop processing this truck (END TIME REACHED)
-                break
+def simulate_from_timeline(end_time, timeline=None):
+    """
+    Drop-in replacement for simulate_truck_deliveries() backed by a recorded day.
 
-            # If truck is empty, calculate the distance from current address to hub and add mileage
-            if len(truck_3.get_packages()) == 0:
-                ROUTE_TIME = _calculate_return_to_hub(truck_3, address_index, distances, ROUTE_TIME, TRUCK_SPEED)
-                truck_3.departure_time = ROUTE_TIME 
-                truck_3.current_address = "HUB"
+    Process: binary-search the recorded event log for end_time, print the same
+    truck summary and return the same id -> Package dictionary.
+    Flow: the day is simulated once on first use and cached in _DAY_TIMELINE.
+    Complexity: O(n + t log L) per query.
+    """
+    if timeline is None:
+        timeline = _day_timeline()
 
-    # Console Output - Trucks
-    # Use num for truck number
-    num = 1
-    for truck in (truck_1, truck_2, truck_3):
-        _print_truck_information(truck, num)
-        num += 1
+    packages, trucks = timeline.snapshot(end_time)
+    _print_fleet_summary(trucks)
+    return packages
 
-    print(f"Total Mileage: {truck_1.miles_traveled_today + truck_2.miles_traveled_today + truck_3.miles_traveled_today}")
-    print()
-    return {k: v for k, v in master_list_packages.items()}
+def _day_timeline():
+    """
+    Returns the shared full-day DeliveryTimeline, building it on first use.
+    Complexity: O(1) once built.
+    """
+    global _DAY_TIMELINE
+    if _DAY_TIMELINE is None:
+        _DAY_TIMELINE = build_day_timeline()
+    return _DAY_TIMELINE
 
 def _print_truck_information(truck, truck_num):
     """
@@ -470,6 +756,48 @@ def _print_truck_information(truck, truck_num):
     """
     print(f"Truck {truck_num} | Current Location: {truck.current_address} | Mileage: {truck.miles_traveled_today} miles | Number of Packages Left: {len(truck.packages)}")    
 
+def load_input_data(package_path=DEFAULT_PACKAGE_CSV_ADDRESS, distance_path=DEFAULT_DISTANCE_CSV_ADDRESS):
+    """
+    Loads the package map and distance table, through the LoaderCache if enabled.
+
+    Process: when USE_LOADER_CACHE is set, reuse parsed data (and the compiled
+    distance matrix on disk) until either CSV changes; otherwise parse directly.
+    Returns: (packages, (addresses, address_index, distances)); the distance
+    data may be shared between calls and must not be mutated. distances is a
+    DistanceMatrix when USE_DISTANCE_MATRIX is set; packages is a PackageTable
+    when USE_PACKAGE_TABLE is set, otherwise a CustomHashMap. The distance CSV
+    is read as DISTANCE_INPUT (see shortest_paths.py), so road-network data
+    arrives here already completed to shortest-path distances. With
+    DISTANCE_MATRIX_FILE set, distances is that file memory-mapped instead
+    and distance_path is not read.
+    """
+    global _LOADER_CACHE
+    if not USE_LOADER_CACHE:
+        if DISTANCE_MATRIX_FILE is not None:
+            matrix = open_matrix_file(DISTANCE_MATRIX_FILE)
+            table = (matrix.addresses, matrix.address_index, matrix)
+        else:
+            table = load_distance_table(distance_path, DISTANCE_INPUT, parse_distance_csv)
+            if USE_DISTANCE_MATRIX:
+                table = (table[0], table[1], DistanceMatrix.from_table(*table))
+        packages = parse_package_csv(package_path)
+        if USE_PACKAGE_TABLE:
+            packages = PackageTable.from_packages(packages.items(), SIMULATION_DAY)
+        return packages, table
+    if _LOADER_CACHE is None:
+        _LOADER_CACHE = LoaderCache(parse_package_csv, parse_distance_csv)
+    if USE_PACKAGE_TABLE:
+        packages = _LOADER_CACHE.load_package_table(package_path, SIMULATION_DAY)
+    else:
+        packages = _LOADER_CACHE.load_packages(package_path)
+    if DISTANCE_MATRIX_FILE is not None:
+        matrix = _LOADER_CACHE.load_matrix_file(DISTANCE_MATRIX_FILE)
+        return packages, (matrix.addresses, matrix.address_index, matrix)
+    if USE_DISTANCE_MATRIX:
+        matrix = _LOADER_CACHE.load_distance_matrix(distance_path, DISTANCE_INPUT)
+        return packages, (matrix.addresses, matrix.address_index, matrix)
+    return packages, _LOADER_CACHE.load_distances(distance_path, DISTANCE_INPUT)
+
 def parse_package_csv(path):
     """
     Loads WGUPS package data:
@@ -479,24 +807,11 @@ def parse_package_csv(path):
     """
     # Create the map that will store package id -> Package object
     map = CustomHashMap()
-    with open(path, newline='', encoding="utf-8") as file:
+    with profiling.span("parse_package_csv"), open(path, newline='', encoding="utf-8") as file:
         reader = csv.reader(file)
         for row in reader:
-            # Build Address object from CSV columns
-            address = Address(
-                street=row[1].strip(),
-                city=row[2].strip(),
-                state=row[3].strip(),
-                zip_code=row[4].strip()
-            )
-
-            # Build Package object from CSV columns
-            pkg = Package(
-                id=int(row[0]),
-                address=address,
-                deadline=row[5].strip(),
-                weight=int(row[6]),
-            )
+            # Build Package (and Address) object from CSV columns
+            pkg = package_from_row(row)
             # Insert into the map keyed by package id
             map.add(pkg.id, pkg)
     file.close()
@@ -510,6 +825,11 @@ def parse_distance_csv(path):
       - Builds full distance matrix with mirrored values.
     Returns: (addresses, address_index, distances)
     """
+    with profiling.span("parse_distance_csv"):
+        return _parse_distance_rows(path)
+
+def _parse_distance_rows(path):
+    """Reads and completes the distance table for parse_distance_csv(). O(n²)."""
     addresses = []
     address_index = {}
     distances = []
@@ -551,7 +871,8 @@ def parse_distance_csv(path):
 
     """
     Process:
-      - Build a dictionary that maps each address to its index in the list.
+      - Build an AddressIndex that maps each address (and, once normalized,
+        other spellings of it) to its index in the list.
       - Fill in missing (None) entries in the distance matrix by mirroring
         the corresponding non-None value from the opposite cell.
 
@@ -561,7 +882,7 @@ def parse_distance_csv(path):
 
     Complexity: O(n²), where n = number of addresses.
     """
-    address_index = {addr: i for i, addr in enumerate(addresses)}
+    address_index = AddressIndex(addresses)
 
     n = len(addresses)
     for i in range(n):
@@ -603,8 +924,178 @@ __        ______ _   _ ____  ____    ____            _
     return choice
 
 
-def run():
+def _package_record(package):
+    """
+    Returns a package's snapshot fields as a dict keyed by PACKAGE_FIELDS.
+    Complexity: O(1).
+    """
+    dt = getattr(package, "delivery_time", None)
+    return {
+        "id": package.id,
+        "address": package.address.street,
+        "city": package.address.city,
+        "zip_code": package.address.zip_code,
+        "weight": package.weight,
+        "deadline": package.deadline,
+        "truck": package.assigned_truck_number,
+        "status": package.package_status.name,
+        "delivery_time": dt.isoformat() if hasattr(dt, "isoformat") else None,
+    }
+
+def _truck_record(truck, truck_num):
+    """
+    Returns a truck's snapshot fields as a dict keyed by TRUCK_FIELDS.
+    Complexity: O(1).
+    """
+    return {
+        "truck": truck_num,
+        "current_address": truck.current_address,
+        "miles": round(truck.miles_traveled_today, 6),
+        "packages_left": len(truck.packages),
+    }
+
+def _write_records(records, fields, output_format, out):
+    """
+    Writes records (dicts) to `out` as json, ndjson or csv.
+
+    Process: ndjson and csv are written row by row as records are produced;
+    json is a single array.
+    Complexity: O(r) for r records.
+    """
+    if output_format == "json":
+        json.dump(list(records), out)
+        out.write("\n")
+    elif output_format == "ndjson":
+        for record in records:
+            out.write(json.dumps(record))
+            out.write("\n")
+    else:
+        writer = csv.DictWriter(out, fieldnames=fields, lineterminator="\n")
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+
+def _build_arg_parser():
+    """Returns the argparse parser for the non-interactive command line."""
+    parser = argparse.ArgumentParser(
+        description="WGUPS routing simulator. Without arguments the interactive menu starts."
+    )
+    parser.add_argument("--at", required=True, metavar="HH:MM",
+                        help="snapshot time in military time, or EOD")
+    parser.add_argument("--package", type=int, action="append", metavar="ID",
+                        help="only report this package id (repeatable)")
+    parser.add_argument("--trucks", action="store_true",
+                        help="report truck locations and mileage instead of packages")
+    parser.add_argument("--counts", action="store_true",
+                        help="report the number of packages in each status instead of packages")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="text",
+                        help="output format (default: text)")
+    parser.add_argument("--stream", metavar="FILE",
+                        help="ingest packages during the day from FILE ('-' for stdin); "
+                             "lines are HH:MM followed by a package CSV row")
+    parser.add_argument("--follow", action="store_true",
+                        help="with --stream FILE, keep reading lines appended to FILE")
+    parser.add_argument("--metrics", action="store_true",
+                        help="print hot-path counters and timers (profiling.py) to stderr")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write the timed sections as a Chrome trace JSON file")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="run under cProfile and write pstats data to FILE")
+    return parser
+
+def run_cli(argv, out=sys.stdout):
+    """
+    Answers one snapshot query from command-line arguments, no prompts or sleeps.
+
+    Process: parse the arguments, look the time up in the full-day timeline
+    and write the selected packages (or trucks) to `out` in the chosen format.
+    Flow: returns the process exit code; 1 when a requested package is unknown.
+    `--metrics`/`--trace` collect hot-path counters and timers for the run
+    and `--profile` writes a cProfile stats file (see profiling.py).
+    Complexity: O(n + t log L) per query once the day is simulated.
+    """
+    parser = _build_arg_parser()
+    args = parser.parse_args(argv)
+    metrics = profiling.enable(trace=args.trace is not None) if args.metrics or args.trace else None
+    try:
+        with profiling.profiled(args.profile):
+            return _answer_snapshot(parser, args, out)
+    finally:
+        if metrics is not None:
+            profiling.disable()
+            if args.metrics:
+                for line in metrics.report():
+                    print(line, file=sys.stderr)
+            if args.trace:
+                metrics.write_chrome_trace(args.trace)
+
+def _answer_snapshot(parser, args, out):
+    """Runs the query of run_cli() for parsed arguments; returns the exit code."""
+    reports = [flag for flag, chosen in (("--package", args.package), ("--trucks", args.trucks),
+                                         ("--counts", args.counts)) if chosen]
+    if len(reports) > 1:
+        parser.error(f"{' and '.join(reports)} cannot be combined; choose one report")
+    try:
+        snapshot_dt = _parse_snapshot_time(args.at)
+    except ValueError:
+        parser.error(f"invalid --at value {args.at!r}; use HH:MM (e.g. 09:05) or EOD")
+
+    if args.stream:
+        try:
+            stream = open_package_stream(args.stream, SIMULATION_DAY, follow=args.follow)
+        except FileNotFoundError:
+            parser.error(f"stream file not found: {args.stream}")
+        try:
+            timeline = build_day_timeline(stream)
+        except ValueError as exc:
+            print(f"Invalid stream record: {exc}", file=sys.stderr)
+            return 1
+    else:
+        timeline = _day_timeline()
+
+    if args.counts:
+        # One vectorized status pass over the whole fleet, no Package objects
+        counts = timeline.fleet().status_at(snapshot_dt).counts()
+        if args.format == "text":
+            for status, count in counts.items():
+                print(f"{status.name:<16} {count}", file=out)
+            return 0
+        records = ({"status": status.name, "packages": count} for status, count in counts.items())
+        _write_records(records, COUNT_FIELDS, args.format, out)
+        return 0
+
+    packages, trucks = timeline.snapshot(snapshot_dt)
+
+    if args.trucks:
+        if args.format == "text":
+            _print_fleet_summary(trucks)
+            return 0
+        records = (_truck_record(truck, num) for num, truck in enumerate(trucks, 1))
+        _write_records(records, TRUCK_FIELDS, args.format, out)
+        return 0
+
+    ids = args.package if args.package else list(packages)
+    missing = [pid for pid in ids if pid not in packages]
+    if missing:
+        print(f"Package(s) not found: {', '.join(map(str, missing))}", file=sys.stderr)
+        return 1
+    if args.format == "text":
+        for pid in ids:
+            _print_package_info(packages[pid])
+        return 0
+    _write_records((_package_record(packages[pid]) for pid in ids), PACKAGE_FIELDS, args.format, out)
+    return 0
+
+def run(argv=None):
     """Entry point wrapper for running the WGUPS routing program."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        try:
+            sys.exit(run_cli(argv))
+        except BrokenPipeError:
+            # The reading end (e.g. `head`) closed early; silence the flush at exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(0)
     try:
         main_menu()
     except KeyboardInterrupt:
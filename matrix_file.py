@@ -0,0 +1,177 @@
+"""Memory-Mapped Distance Matrix Files for WGUPS Simulator
+
+Process:
+  - Store a distance matrix as one binary file: a fixed header, the address
+    strings, then the cells as raw little-endian float32 or float64, either
+    the full n x n square or, packed, only the upper triangle with the
+    diagonal (n(n+1)/2 cells).
+  - Open the file as a read-only memory map (numpy.memmap, or mmap plus a
+    memoryview without NumPy). No cell is read until it is used, and every
+    process that maps the file shares the same page-cache pages.
+
+Flow:
+  - write_matrix_file() streams any matrix (DistanceMatrix or list of
+    lists) to disk one row at a time.
+  - open_matrix_file() returns a DistanceMatrix (square) or a
+    PackedDistanceMatrix (triangle) over the mapping; the routing helpers
+    use either like the list-of-lists table.
+  - main.DISTANCE_MATRIX_FILE makes load_input_data() map a file instead of
+    parsing the distance CSV (scenario_runner workers then share its pages).
+  - Command line: python matrix_file.py DISTANCES.csv OUT [--dtype float32] [--packed]
+
+Complexity:
+  - write: O(n²) time, one row of memory.
+  - open: O(n) for the address strings; the cells are mapped in O(1).
+  - Disk: 8n² bytes (float64) or 4n² (float32), about half when packed;
+    for 20k addresses that is 3.2 GB, 1.6 GB or 0.8 GB.
+"""
+from address_index import AddressIndex
+from distance_matrix import DistanceMatrix, PackedDistanceMatrix
+from shortest_paths import load_distance_table
+from array import array
+import argparse
+import mmap
+import os
+import struct
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+DTYPES = {"float32": 4, "float64": 8}
+
+_MAGIC = b"WGMX"
+_VERSION = 1
+# magic, version, bytes per cell, packed flag, addresses, data offset
+_HEADER = struct.Struct("<4sHBBQQ")
+# Cells start on a page boundary so the mapping is aligned
+_ALIGN = 4096
+
+
+def _dtype_name(itemsize):
+    return "float32" if itemsize == 4 else "float64"
+
+
+def _row_values(matrix, i):
+    """Return row i of any matrix as a list of floats (None for a gap). O(n)."""
+    return [None if cell is None else float(cell) for cell in matrix[i]]
+
+
+def write_matrix_file(path, addresses, matrix, dtype="float64", packed=False):
+    """
+    Write matrix (n x n, rows in `addresses` order) as a matrix file.
+
+    Process: header and addresses, padding to the next page, then each row
+    (or each row's upper part i..n-1 when packed) in the chosen precision.
+    Flow: raises ValueError for an unknown dtype or a missing cell. The file
+    is written to a temporary name and renamed, so readers never map a
+    partial file.
+    Complexity: O(n²) time, O(n) memory.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype {dtype!r}; expected one of {', '.join(DTYPES)}")
+    itemsize = DTYPES[dtype]
+    n = len(addresses)
+    names = b"".join(struct.pack("<I", len(raw)) + raw for raw in (a.encode("utf-8") for a in addresses))
+    data_offset = -(-(_HEADER.size + len(names)) // _ALIGN) * _ALIGN
+    dense = matrix.as_array() if hasattr(matrix, "as_array") else None
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, itemsize, int(packed), n, data_offset))
+        f.write(names)
+        f.write(b"\0" * (data_offset - _HEADER.size - len(names)))
+        for i in range(n):
+            start = i if packed else 0
+            if dense is not None:
+                dense[i, start:].astype("<f4" if itemsize == 4 else "<f8").tofile(f)
+                continue
+            values = _row_values(matrix, i)[start:]
+            if any(v is None for v in values):
+                raise ValueError(f"Row {addresses[i]!r} has missing distances")
+            cells = array("f" if itemsize == 4 else "d", values)
+            if sys.byteorder != "little":
+                cells.byteswap()
+            cells.tofile(f)
+    os.replace(tmp_path, path)
+
+
+def read_matrix_header(path):
+    """
+    Return (addresses, dtype name, packed, data offset) of a matrix file.
+
+    Flow: raises ValueError if path is not a matrix file.
+    Complexity: O(n) for the address strings.
+    """
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError(f"{path} is not a distance matrix file")
+        magic, version, itemsize, packed, n, data_offset = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION or itemsize not in (4, 8):
+            raise ValueError(f"{path} is not a distance matrix file (version {_VERSION})")
+        names = f.read(data_offset - _HEADER.size)
+    addresses = []
+    pos = 0
+    for _ in range(n):
+        (length,) = struct.unpack_from("<I", names, pos)
+        addresses.append(names[pos + 4:pos + 4 + length].decode("utf-8"))
+        pos += 4 + length
+    return addresses, _dtype_name(itemsize), bool(packed), data_offset
+
+
+def open_matrix_file(path):
+    """
+    Memory-map a matrix file as a DistanceMatrix or PackedDistanceMatrix.
+
+    Process: read the header and addresses, then map the cells read-only.
+    Flow: without NumPy the cells are a memoryview over mmap (native byte
+    order must be little-endian).
+    Complexity: O(n); no cell is read.
+    """
+    addresses, dtype, packed, data_offset = read_matrix_header(path)
+    n = len(addresses)
+    count = n * (n + 1) // 2 if packed else n * n
+    address_index = AddressIndex(addresses)
+    if np is not None:
+        cell = np.dtype("<f4" if dtype == "float32" else "<f8")
+        shape = (count,) if packed else (n, n)
+        if count:
+            data = np.memmap(path, dtype=cell, mode="r", offset=data_offset, shape=shape)
+        else:
+            # numpy.memmap cannot map zero bytes
+            data = np.zeros(shape, cell)
+    else:
+        if sys.byteorder != "little":
+            raise ValueError("Matrix files need NumPy on a big-endian machine")
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        itemsize = DTYPES[dtype]
+        data = memoryview(mapped)[data_offset:data_offset + count * itemsize].cast("f" if itemsize == 4 else "d")
+    if packed:
+        return PackedDistanceMatrix(addresses, address_index, data)
+    return DistanceMatrix.from_array(addresses, address_index, data)
+
+
+def main(argv=None):
+    """Convert a distance CSV into a matrix file. O(n²)."""
+    import main as simulator
+
+    parser = argparse.ArgumentParser(description="Write a memory-mappable distance matrix file.")
+    parser.add_argument("distances", help="distance CSV (read as main.DISTANCE_INPUT)")
+    parser.add_argument("output", help="matrix file to write")
+    parser.add_argument("--dtype", choices=tuple(DTYPES), default="float64")
+    parser.add_argument("--packed", action="store_true", help="store only the upper triangle")
+    args = parser.parse_args(argv)
+    addresses, address_index, distances = load_distance_table(
+        args.distances, simulator.DISTANCE_INPUT, simulator.parse_distance_csv)
+    matrix = DistanceMatrix.from_table(addresses, address_index, distances)
+    write_matrix_file(args.output, addresses, matrix, args.dtype, args.packed)
+    print(f"Wrote {len(addresses)} addresses ({args.dtype}{', packed' if args.packed else ''}) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+"""Monte Carlo Travel Times for WGUPS Simulator
+
+Process:
+  - Estimate how likely deadlines are met when traffic varies, instead of
+    only whether they are met at the constant TRUCK_SPEED.
+  - Fixed routes (simulate()): take the recorded day's routes and replay
+    them R times at once with NumPy. Every leg of every replication gets
+    its own lognormal speed multiplier (mean 1, log spread `sigma`), times
+    the factor of the RUSH_HOURS window the leg starts in. Each leg is one
+    set of (R,) array operations, so the Python-level work is per leg,
+    not per replication.
+  - Re-routed variants (simulate_rerouted()): draw a whole-day speed
+    multiplier per replication and run the full simulator at that speed
+    across scenario_runner's process pool, so assignment, routing and
+    driver dispatch react to the slower or faster day.
+
+Flow:
+  - The replay keeps each truck's recorded stop order. A trip leaves at
+    the later of its floor (the truck's earliest departure for its first
+    trip, the recorded start for later ones) and the first free driver
+    (NUM_DRIVERS drivers, each free again when its truck is back). Waits
+    recorded between legs (e.g. for an address correction) stay at their
+    absolute times. With sigma 0 and no rush hours the replay reproduces
+    the recorded day.
+  - Both modes return a MonteCarloResult: on-time probability per package
+    and mileage and finish-time percentiles per truck; format_report()
+    renders it.
+
+CLI (run from the project root):
+    python monte_carlo.py [--replications N] [--sigma S] [--seed K]
+                          [--rerouted N] [--workers W]
+
+Complexity:
+  - Fixed routes: O(R·(L + t·d)) array work for L legs, t trips and d
+    drivers, O(L) Python steps. Without NumPy the same replay runs once
+    per replication.
+  - Re-routed: one full simulation per replication, spread over workers.
+"""
+from scenario import Scenario
+from datetime import timedelta
+import argparse
+import math
+import random
+import sys
+import main
+import scenario_runner
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+# Replications of the fixed-route replay
+REPLICATIONS = 10000
+# Log standard deviation of the per-leg speed multiplier (0 = constant speed)
+SPEED_SIGMA = 0.15
+# (start minute, end minute, speed factor) of slower times of day
+RUSH_HOURS = ((7 * 60, 9 * 60, 0.8), (16 * 60, 18 * 60, 0.8))
+# Percentiles reported for truck mileage and finish time
+PERCENTILES = (50, 90, 95)
+
+
+class MonteCarloResult:
+    """
+    Outcome of a batch of replications.
+
+    Fields:
+      - mode: "fixed routes" or "re-routed"
+      - replications: number of replications summarized
+      - on_time: package id -> share of replications delivered by deadline
+      - deadlines: package id -> deadline text (e.g. "10:30 AM", "EOD")
+      - truck_miles / truck_finish: truck number -> {percentile: miles /
+        time back at the hub}; a truck that never came back has no entry
+        in truck_finish
+    """
+
+    def __init__(self, mode, replications):
+        self.mode = mode
+        self.replications = replications
+        self.on_time = {}
+        self.deadlines = {}
+        self.truck_miles = {}
+        self.truck_finish = {}
+
+
+class _Trip:
+    """One truck trip of the recorded day; times in seconds after midnight."""
+
+    __slots__ = ("truck", "start", "floor", "miles", "holds", "package_ids", "return_miles")
+
+    def __init__(self, truck, start, floor):
+        self.truck = truck
+        self.start = start
+        self.floor = floor
+        self.miles = []
+        self.holds = []
+        self.package_ids = []
+        self.return_miles = None
+
+
+def _trips(timeline, origin):
+    """
+    Split the recorded truck logs into trips, ordered by recorded start.
+
+    Complexity: O(L + t log t).
+    """
+    def seconds(moment):
+        return (moment - origin).total_seconds()
+
+    trips = []
+    for t, log in enumerate(timeline.trucks):
+        trip = None
+        first = True
+        for pos, package_id in enumerate(log.leg_package_ids):
+            start = seconds(log.leg_starts[pos])
+            hold = -math.inf
+            if trip is None:
+                trip = _Trip(t, start, seconds(log.departure_time) if first else start)
+                trips.append(trip)
+                first = False
+            elif start > seconds(log.leg_arrivals[pos - 1]) + 1e-6:
+                hold = start
+            trip.miles.append(float(log.leg_miles[pos]))
+            trip.holds.append(hold)
+            trip.package_ids.append(package_id)
+            trip_end = log.returns.get(pos)
+            if trip_end is not None:
+                trip.return_miles = float(trip_end[0])
+                trip = None
+    trips.sort(key=lambda trip: trip.start)
+    return trips
+
+
+def _due_seconds(timeline, origin):
+    """
+    Return ({package id: deadline in seconds after midnight}, {id: deadline text}).
+
+    Flow: EOD packages are due by main.END_OF_DAY.
+    Complexity: O(n).
+    """
+    packages, _ = timeline.snapshot(main.END_OF_DAY)
+    end_of_day = (main.END_OF_DAY - origin).total_seconds()
+    due, text = {}, {}
+    for pid, package in packages.items():
+        deadline = main._deadline_time(package, origin)
+        due[pid] = end_of_day if deadline is None else (deadline - origin).total_seconds()
+        text[pid] = package.deadline
+    return due, text
+
+
+def _rush_factor(seconds):
+    """Return the RUSH_HOURS speed factor at seconds after midnight (array or float)."""
+    minutes = (seconds / 60.0) % 1440
+    if np is not None and isinstance(minutes, np.ndarray):
+        factor = np.ones_like(minutes)
+        for low, high, scale in RUSH_HOURS:
+            factor[(minutes >= low) & (minutes < high)] *= scale
+        return factor
+    factor = 1.0
+    for low, high, scale in RUSH_HOURS:
+        if low <= minutes < high:
+            factor *= scale
+    return factor
+
+
+def _percentile(ordered, q):
+    """Return the nearest-rank q-th percentile of an ascending sequence. O(1)."""
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _replay(trips, truck_count, drivers, speed, due, replications, sigma, rng):
+    """
+    Replay the trips for every replication at once.
+
+    Process: per leg, draw R speed multipliers, scale by the rush-hour
+    factor at each replication's leg start and advance R clocks.
+    Flow: returns ({package id: on-time count}, finish times as an (R, t)
+    array, NaN for a truck that never returned).
+    Complexity: O(R·(L + t·d)).
+    """
+    rows = np.arange(replications)
+    free = np.full((replications, drivers), -np.inf)
+    back = np.full((replications, truck_count), np.nan)
+    counts = {}
+    mu = -sigma * sigma / 2.0
+
+    def drive(clock, miles):
+        if sigma > 0:
+            multiplier = rng.lognormal(mu, sigma, replications)
+        else:
+            multiplier = np.ones(replications)
+        return clock + miles / (speed * multiplier * _rush_factor(clock)) * 3600.0
+
+    for trip in trips:
+        driver = free.argmin(axis=1)
+        clock = np.maximum(trip.floor, free[rows, driver])
+        previous = back[:, trip.truck]
+        clock = np.where(previous > clock, previous, clock)
+        for miles, hold, pid in zip(trip.miles, trip.holds, trip.package_ids):
+            if hold > -math.inf:
+                clock = np.maximum(clock, hold)
+            clock = drive(clock, miles)
+            counts[pid] = int(np.count_nonzero(clock <= due.get(pid, math.inf)))
+        if trip.return_miles is not None:
+            clock = drive(clock, trip.return_miles)
+            back[:, trip.truck] = clock
+            free[rows, driver] = clock
+        else:
+            free[rows, driver] = np.inf
+    return counts, back
+
+
+def _replay_once(trips, truck_count, drivers, speed, due, sigma, rnd):
+    """
+    _replay() for a single replication without NumPy.
+
+    Flow: returns ({package id: 1 if on time else 0}, [finish or None per truck]).
+    Complexity: O(L + t·d).
+    """
+    free = [-math.inf] * drivers
+    back = [None] * truck_count
+    counts = {}
+    mu = -sigma * sigma / 2.0
+
+    def drive(clock, miles):
+        multiplier = rnd.lognormvariate(mu, sigma) if sigma > 0 else 1.0
+        return clock + miles / (speed * multiplier * _rush_factor(clock)) * 3600.0
+
+    for trip in trips:
+        driver = min(range(drivers), key=free.__getitem__)
+        clock = max(trip.floor, free[driver])
+        if back[trip.truck] is not None:
+            clock = max(clock, back[trip.truck])
+        for miles, hold, pid in zip(trip.miles, trip.holds, trip.package_ids):
+            clock = drive(max(clock, hold), miles)
+            counts[pid] = 1 if clock <= due.get(pid, math.inf) else 0
+        if trip.return_miles is not None:
+            clock = drive(clock, trip.return_miles)
+            back[trip.truck] = clock
+            free[driver] = clock
+        else:
+            free[driver] = math.inf
+    return counts, back
+
+
+def simulate(replications=REPLICATIONS, sigma=SPEED_SIGMA, seed=None, timeline=None):
+    """
+    Replay the recorded day's fixed routes under random travel times.
+
+    Flow: timeline defaults to main.py's shared full-day timeline; mileage
+    is fixed by the routes, so its percentiles are the recorded miles.
+    Complexity: see module docstring.
+    """
+    timeline = timeline or main._day_timeline()
+    origin = timeline.fleet().origin
+    trips = _trips(timeline, origin)
+    due, deadlines = _due_seconds(timeline, origin)
+    truck_count = len(timeline.trucks)
+    drivers = main.NUM_DRIVERS
+    speed = main.TRUCK_SPEED
+
+    if np is not None:
+        counts, back = _replay(trips, truck_count, drivers, speed, due, replications, sigma,
+                               np.random.default_rng(seed))
+        finishes = [np.sort(back[:, t][~np.isnan(back[:, t])]).tolist() for t in range(truck_count)]
+    else:
+        rnd = random.Random(seed)
+        counts = dict.fromkeys(due, 0)
+        finishes = [[] for _ in range(truck_count)]
+        for _ in range(replications):
+            once, back = _replay_once(trips, truck_count, drivers, speed, due, sigma, rnd)
+            for pid, on_time in once.items():
+                counts[pid] += on_time
+            for t, finish in enumerate(back):
+                if finish is not None:
+                    finishes[t].append(finish)
+        for values in finishes:
+            values.sort()
+
+    result = MonteCarloResult("fixed routes", replications)
+    result.deadlines = deadlines
+    result.on_time = {pid: counts.get(pid, 0) / replications for pid in sorted(due)}
+    for t, log in enumerate(timeline.trucks):
+        result.truck_miles[log.truck_num] = {q: float(log.miles) for q in PERCENTILES}
+        if len(finishes[t]) == replications:
+            result.truck_finish[log.truck_num] = {
+                q: origin + timedelta(seconds=_percentile(finishes[t], q)) for q in PERCENTILES
+            }
+    return result
+
+
+def simulate_rerouted(replications, sigma=SPEED_SIGMA, seed=None, workers=None):
+    """
+    Run full simulations at randomly drawn day speeds across a process pool.
+
+    Process: replication i runs as a Scenario whose truck_speed is
+    TRUCK_SPEED times a lognormal multiplier (mean 1, log spread sigma);
+    scenario_runner.run_scenarios() spreads them over `workers` processes.
+    Flow: replications that fail (e.g. a load no truck can carry) are left
+    out of the summary.
+    Complexity: one full simulation per replication.
+    """
+    rnd = random.Random(seed)
+    mu = -sigma * sigma / 2.0
+    scenarios = [
+        Scenario(f"replication {i + 1}",
+                 truck_speed=main.TRUCK_SPEED * (rnd.lognormvariate(mu, sigma) if sigma > 0 else 1.0))
+        for i in range(replications)
+    ]
+    results = [r for r in scenario_runner.run_scenarios(scenarios, workers) if r.error is None]
+    _, deadlines = _due_seconds(main._day_timeline(), main.SIMULATION_DAY)
+
+    summary = MonteCarloResult("re-routed", len(results))
+    summary.deadlines = deadlines
+    if not results:
+        return summary
+    missed = dict.fromkeys(deadlines, 0)
+    for r in results:
+        for pid in r.late_ids + r.undelivered_ids:
+            missed[pid] = missed.get(pid, 0) + 1
+    summary.on_time = {pid: 1.0 - count / len(results) for pid, count in sorted(missed.items())}
+    truck_count = max(len(r.truck_miles) for r in results)
+    for t in range(truck_count):
+        miles = sorted(r.truck_miles[t] for r in results if t < len(r.truck_miles))
+        summary.truck_miles[t + 1] = {q: _percentile(miles, q) for q in PERCENTILES}
+        finishes = sorted(r.finish_times[t] for r in results
+                          if t < len(r.finish_times) and r.finish_times[t] is not None)
+        if len(finishes) == len(results):
+            summary.truck_finish[t + 1] = {q: _percentile(finishes, q) for q in PERCENTILES}
+    return summary
+
+
+def format_report(result, show_all=False):
+    """
+    Render a MonteCarloResult: truck percentiles, then packages.
+
+    Flow: only packages with a deadline or an on-time probability below
+    100% are listed unless show_all is set.
+    Complexity: O(t + n).
+    """
+    lines = [f"Monte Carlo ({result.mode}): {result.replications} replications"]
+    header = f"{'Truck':<5}"
+    for q in PERCENTILES:
+        header += f" | {'Miles P' + str(q):>9}"
+    for q in PERCENTILES:
+        header += f" | {'Back P' + str(q):>8}"
+    lines += [header, "-" * len(header)]
+    for num, miles in sorted(result.truck_miles.items()):
+        line = f"{num:<5}"
+        for q in PERCENTILES:
+            line += f" | {miles[q]:>9.1f}"
+        finish = result.truck_finish.get(num)
+        for q in PERCENTILES:
+            line += f" | {finish[q].strftime('%H:%M') if finish else '-':>8}"
+        lines.append(line)
+
+    lines += ["", f"{'Package':>7} | {'Deadline':<9} | {'On time':>7}"]
+    for pid, share in result.on_time.items():
+        deadline = result.deadlines.get(pid, "")
+        if show_all or share < 1.0 or deadline != "EOD":
+            lines.append(f"{pid:>7} | {deadline:<9} | {share:>7.1%}")
+    return "\n".join(lines)
+
+
+def run(argv=None):
+    """Command-line entry point: run the replications and print the report."""
+    parser = argparse.ArgumentParser(description="Monte Carlo deadline risk under random travel times.")
+    parser.add_argument("--replications", type=int, default=REPLICATIONS,
+                        help=f"fixed-route replications (default: {REPLICATIONS})")
+    parser.add_argument("--sigma", type=float, default=SPEED_SIGMA,
+                        help=f"log spread of the speed multipliers (default: {SPEED_SIGMA})")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--rerouted", type=int, metavar="N", default=None,
+                        help="instead run N full re-routed simulations at random day speeds")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes for --rerouted (default: one per CPU core)")
+    parser.add_argument("--all", action="store_true", help="list every package")
+    args = parser.parse_args(argv)
+    if args.replications < 1 or (args.rerouted is not None and args.rerouted < 1):
+        parser.error("replications must be at least 1")
+    if args.sigma < 0:
+        parser.error("--sigma must not be negative")
+
+    if args.rerouted is not None:
+        result = simulate_rerouted(args.rerouted, args.sigma, args.seed, args.workers)
+    else:
+        result = simulate(args.replications, args.sigma, args.seed)
+    print(format_report(result, args.all))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,511 @@
+"""Multi-Day, Multi-Depot Operations for WGUPS Simulator
+
+Process:
+  - Simulate N consecutive days across several depots. A depot is an
+    address in the distance table with its own trucks (departure times of
+    day) and drivers; its trucks leave from and return to that address.
+  - Each day's workload is the packages received that day plus every
+    package carried over (not delivered by the end of an earlier day).
+    A package is served by the depot nearest its address, decided once.
+  - Per depot and day, one DeliverySimulation runs with the depot as its
+    hub. A workload that fits the depot's trucks in one trip each is
+    loaded up front by truck_assignment.assign_packages(), as main.py does
+    for the single day. A larger one (or one assign_packages() cannot
+    place) is fed through the engine's package stream, so any volume fits:
+    trucks are filled in order (deadline packages first, then a
+    nearest-neighbor chain of stops from the depot, so a truckload is a
+    compact area), and a truck that returns goes out again with the rest.
+    Whatever is still undelivered at the end of the day is carried over.
+
+Flow:
+  - load_operations() reads a JSON operations file into an Operations;
+    simulate_days() returns one DepotDayStats per day and depot, and
+    format_table() renders them with per-day and overall totals.
+  - Distance data is loaded once (main.load_input_data(), LoaderCache) and
+    shared by every day and depot.
+  - Packages come from a daily CSV (the package row prefixed with its day
+    number, 1 = first day) read one day at a time, or, by default, the
+    package file received again every day (day d's copies get ids
+    (d - 1) * stride + id, stride a power of ten above the largest id).
+  - Delayed-until notes hold a package until that time on the day it is
+    received; main.ADDRESS_CORRECTIONS hold the default file's copies until
+    their correction time and deliver them to the corrected address.
+    "Can only be on truck N" refers to the N-th truck of the package's depot,
+    so such a package goes to the nearest depot with at least N trucks.
+    Must-go-with notes are enforced for a workload loaded up front; the
+    default file's copies have their notes renumbered to the same day's
+    copies. Streamed workloads do not enforce them.
+
+Operations file format:
+    {
+      "days": 5,
+      "start": "2020-01-01",
+      "truck_speed": 18,
+      "packages": "daily_packages.csv",
+      "depots": [
+        {"name": "WGU", "street": "HUB", "departures": ["08:00", "09:05"], "drivers": 2},
+        {"name": "South", "street": "6351 South 900 East", "departures": ["08:00"], "drivers": 1}
+      ]
+    }
+  Every field is optional; the defaults are one day, main.SIMULATION_DAY,
+  main.TRUCK_SPEED, the package file every day and a single "HUB" depot
+  with main.TRUCK_DEPARTURES and main.NUM_DRIVERS.
+
+CLI (run from the project root):
+    python multi_day.py [operations.json] [--days N]
+
+Complexity:
+  - Per day: O(p·D) to pick depots for p packages over D depots, O(r²) to
+    order each depot's r distinct stops, then the simulation itself
+    (O(E log E) plus routing). Only the day's workload and the carry-over
+    are touched, never earlier days' delivered packages.
+"""
+from hashmap import CustomHashMap
+from package_stream import package_from_row
+from truck import Truck
+from truck_assignment import assign_packages, parse_package_notes, _order_rows, _MUST_GO_WITH
+from simulation_engine import DeliverySimulation
+from timeline import DeliveryTimeline
+from Enums.package_status import PackageStatus
+from address import Address
+from package import Package
+from datetime import datetime, timedelta
+from itertools import groupby
+import argparse
+import csv
+import json
+import re
+import sys
+import main
+
+
+def _time_of_day(text):
+    """Parse 'HH:MM' into (hour, minute). O(1)."""
+    try:
+        hh, mm = map(int, str(text).split(":"))
+    except ValueError:
+        raise ValueError(f"Invalid time {text!r}; use HH:MM (e.g. 09:05)") from None
+    return hh, mm
+
+
+def _on_day(moment, day):
+    """Return moment's time of day on day. O(1)."""
+    return day.replace(hour=moment.hour, minute=moment.minute, second=moment.second,
+                       microsecond=moment.microsecond)
+
+
+class Depot:
+    """
+    One hub with its own trucks.
+
+    Fields:
+      - name: label shown in result tables
+      - street: distance-table address trucks leave from and return to
+      - departures: (hour, minute) earliest departure per truck
+      - drivers: drivers available at the depot
+    """
+
+    def __init__(self, name, street, departures, drivers):
+        self.name = name
+        self.street = street
+        self.departures = list(departures)
+        self.drivers = drivers
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a Depot from one parsed JSON object; ValueError on bad fields. O(t)."""
+        unknown = set(data) - {"name", "street", "departures", "drivers"}
+        if unknown:
+            raise ValueError(f"Unknown depot field(s): {', '.join(sorted(unknown))}")
+        street = data.get("street", "HUB")
+        departures = data.get("departures")
+        if departures is None:
+            departures = [(t.hour, t.minute) for t in main.TRUCK_DEPARTURES]
+        else:
+            departures = [_time_of_day(t) for t in departures]
+        return cls(str(data.get("name", street)), street, departures, int(data.get("drivers", main.NUM_DRIVERS)))
+
+
+class Operations:
+    """
+    A multi-day run.
+
+    Fields:
+      - start: first simulated day (midnight)
+      - days: number of consecutive days
+      - depots: list of Depot
+      - truck_speed: miles per hour
+      - packages_path: daily package CSV, or None for the package file every day
+    """
+
+    def __init__(self, depots=None, days=1, start=None, truck_speed=None, packages_path=None):
+        self.depots = depots or [Depot.from_dict({})]
+        self.days = days
+        self.start = start or main.SIMULATION_DAY
+        self.truck_speed = truck_speed or main.TRUCK_SPEED
+        self.packages_path = packages_path
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build Operations from a parsed JSON object.
+
+        Flow: raises ValueError on an unknown field or malformed value.
+        Complexity: O(D) for D depots.
+        """
+        unknown = set(data) - {"days", "start", "truck_speed", "packages", "depots"}
+        if unknown:
+            raise ValueError(f"Unknown operations field(s): {', '.join(sorted(unknown))}")
+        operations = cls(
+            depots=[Depot.from_dict(d) for d in data.get("depots", [])],
+            days=int(data.get("days", 1)),
+            truck_speed=float(data["truck_speed"]) if data.get("truck_speed") is not None else None,
+            packages_path=data.get("packages"),
+        )
+        if data.get("start") is not None:
+            operations.start = datetime.strptime(data["start"], "%Y-%m-%d")
+        if operations.days < 1:
+            raise ValueError("days must be at least 1")
+        if operations.truck_speed <= 0:
+            raise ValueError("truck_speed must be positive")
+        return operations
+
+
+def load_operations(path):
+    """Read a JSON operations file into an Operations. O(file size)."""
+    with open(path, encoding="utf-8") as f:
+        return Operations.from_dict(json.load(f))
+
+
+class DepotDayStats:
+    """
+    Results of one depot on one day.
+
+    Fields:
+      - day: simulated date; depot: depot name
+      - packages: workload (received + carried over) routed to the depot
+      - delivered / late: delivered packages, and those after their
+        deadline (on the day they were received)
+      - carried: packages left for the next day
+      - unroutable: received packages whose street is not in the table
+      - miles: fleet mileage that day; trucks: trucks that drove
+    """
+
+    def __init__(self, day, depot):
+        self.day = day
+        self.depot = depot
+        self.packages = 0
+        self.delivered = 0
+        self.late = 0
+        self.carried = 0
+        self.unroutable = 0
+        self.miles = 0.0
+        self.trucks = 0
+
+
+def _daily_csv(path):
+    """
+    Yield (day index, [(package, ready_time override)]) from a daily package CSV.
+
+    Process: rows are "day,id,street,city,state,zip,deadline,weight[,notes]";
+    rows of one day must be contiguous and days increasing, so only one
+    day is held in memory.
+    Complexity: O(rows of the day) per yield.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = (row for row in csv.reader(f) if row and row[0].strip())
+        last = 0
+        for day_number, day_rows in groupby(rows, key=lambda row: int(row[0])):
+            if day_number <= last:
+                raise ValueError(f"{path}: day {day_number} out of order")
+            last = day_number
+            yield day_number - 1, [(package_from_row(row[1:]), None) for row in day_rows]
+
+
+def _repeated_file(start, days):
+    """
+    Yield (day index, [(package, ready_time override)]): the package file every day.
+
+    Process: copy each package with id (d - 1) * stride + id (must-go-with
+    notes renumbered the same way); a package with an entry in
+    main.ADDRESS_CORRECTIONS gets the corrected address and is ready at its
+    correction time on that day.
+    Complexity: O(p) per day.
+    """
+    base, _ = main.load_input_data()
+    items = sorted(base.items(), key=lambda item: item[0])
+    stride = 10 ** len(str(max((pid for pid, _ in items), default=0)))
+    for index in range(days):
+        day = start + timedelta(days=index)
+        packages = []
+        for pid, source in items:
+            package = Package(index * stride + pid, source.address, source.deadline, source.weight,
+                              source.truck_number, _renumber_notes(source.notes, index * stride))
+            ready = None
+            fix = main.ADDRESS_CORRECTIONS.get(pid)
+            if fix is not None:
+                fixed_at, street, city, zip_code = fix
+                package.address = Address(street, city, source.address.state, zip_code)
+                ready = _on_day(fixed_at, day)
+            packages.append((package, ready))
+        yield index, packages
+
+
+def _renumber_notes(notes, offset):
+    """Add offset to the package ids of a must-go-with note. O(len(notes))."""
+    if not offset or not notes:
+        return notes
+    return _MUST_GO_WITH.sub(
+        lambda match: match.group(0).replace(
+            match.group(1), re.sub(r"\d+", lambda pid: str(int(pid.group(0)) + offset), match.group(1))),
+        notes,
+    )
+
+
+def _reset(package):
+    """Put an undelivered package back at its depot for the next day. O(1)."""
+    package.package_status = PackageStatus.AT_HUB
+    package.assigned_truck_number = None
+    package.delivery_time = None
+    package.load_time = None
+
+
+def simulate_days(operations, export=None):
+    """
+    Simulate every day of operations and return [DepotDayStats], day by day.
+
+    Process (per day):
+      - Add the day's received packages to the carry-over, resolve each new
+        one's matrix row and nearest depot, and note when it is ready
+        (start of day, delayed-until note or correction time).
+      - For each depot, run one DeliverySimulation fed with its workload in
+        loading order (see module docstring) until end of day.
+      - Count delivered and late packages; reset and carry the rest.
+    Flow: raises ValueError if a depot street is not in the distance table.
+    With `export` (a delivery_export.ColumnarWriter) every depot-day is
+    recorded as a DeliveryTimeline and appended to the writer's tables.
+    Complexity: see module docstring.
+    """
+    _, (_, address_index, distances) = main.load_input_data()
+    depots = operations.depots
+    depot_rows = []
+    for depot in depots:
+        row = address_index.get(depot.street)
+        if row is None:
+            raise ValueError(f"Depot {depot.name!r} address {depot.street!r} is not in the distance table")
+        depot_rows.append(row)
+
+    if operations.packages_path is not None:
+        source = _daily_csv(operations.packages_path)
+    else:
+        source = _repeated_file(operations.start, operations.days)
+    pending = next(source, None)
+
+    optimizer = main._cached_optimizer(main.ROUTE_OPTIMIZER)
+    speed = operations.truck_speed
+    # package id -> day received; only for undelivered packages
+    received = {}
+    carried = [[] for _ in depots]
+    results = []
+    for index in range(operations.days):
+        day = operations.start + timedelta(days=index)
+        end_time = _on_day(main.END_OF_DAY, day)
+        stats = [DepotDayStats(day, depot.name) for depot in depots]
+        # depot position -> [(ready time, package)]; carry-over is ready at once
+        workload = [[(day, package) for package in carried[d]] for d in range(len(depots))]
+
+        while pending is not None and pending[0] < index:
+            pending = next(source, None)
+        if pending is not None and pending[0] == index:
+            for package, ready in pending[1]:
+                row = address_index.get(package.address.street)
+                if row is None:
+                    stats[0].unroutable += 1
+                    continue
+                package.address_row = row
+                notes = parse_package_notes(package.notes, day)
+                eligible = [k for k in range(len(depots))
+                            if notes.truck_only is None or notes.truck_only <= len(depots[k].departures)]
+                d = min(eligible or range(len(depots)), key=lambda k: distances[depot_rows[k]][row])
+                received[package.id] = day
+                if ready is None:
+                    ready = notes.available_at or day
+                workload[d].append((ready, package))
+            pending = next(source, None)
+
+        for d, depot in enumerate(depots):
+            carried[d] = _run_depot(depot, depot_rows[d], workload[d], day, end_time, speed,
+                                    address_index, distances, optimizer, received, stats[d],
+                                    export, d)
+        results.extend(stats)
+    return results
+
+
+def _loading_order(workload, depot_row, distances):
+    """
+    Sort (ready, package) pairs into stream order.
+
+    Process: by ready time; among packages ready together, deadline
+    packages first, then by position in a nearest-neighbor chain of their
+    stops from the depot.
+    Complexity: O(r² + p log p) for r distinct stops.
+    """
+    chain = _order_rows([package.address_row for _, package in workload], depot_row, distances)
+    rank = {row: position for position, row in enumerate(chain)}
+    workload.sort(key=lambda item: (item[0], item[1].deadline_minutes is None, rank[item[1].address_row]))
+    return workload
+
+
+def _run_depot(depot, depot_row, workload, day, end_time, speed, address_index, distances,
+               optimizer, received, stats, export=None, depot_index=0):
+    """
+    Simulate one depot for one day; return the packages to carry over.
+
+    Flow: the workload is loaded up front when _assign_up_front() manages
+    to, else streamed in loading order. With `export`, the day is recorded
+    and written as depot_index.
+    Complexity: O(r² + p log p) ordering plus assignment and the simulation.
+    """
+    stats.packages = len(workload)
+    if not workload:
+        return []
+    records = _loading_order(workload, depot_row, distances)
+    trucks = [Truck(day.replace(hour=hh, minute=mm), depot.street) for hh, mm in depot.departures]
+    preloaded = _assign_up_front(records, trucks, depot, address_index, distances, day, speed)
+    recorder = None
+    if export is not None:
+        recorder = DeliveryTimeline()
+        for num, truck in enumerate(trucks, 1):
+            recorder.record_truck(num, truck)
+    simulation = DeliverySimulation(
+        trucks, address_index, distances, end_time, speed, depot.drivers,
+        lambda truck: main._start_truck_route(truck, address_index, distances, optimizer, speed,
+                                              main.USE_TIME_WINDOWS, None, depot.street),
+        recorder=recorder,
+        hub=depot.street,
+    )
+    store = CustomHashMap(len(records))
+    if preloaded:
+        for ready, package in records:
+            store.add(package.id, package)
+            if ready > day:
+                # Delayed or awaiting its address correction: the truck waits
+                package.package_status = PackageStatus.DELAYED
+                simulation.add_package_arrival(ready, package)
+    else:
+        simulation.add_package_stream(records, store)
+    simulation.run()
+    if recorder is not None:
+        recorder.record_packages(store)
+        export.write_timeline(recorder.finalize(), address_index, day, depot_index)
+
+    carry = []
+    for _, package in records:
+        if package.package_status == PackageStatus.DELIVERED:
+            received_day = received.pop(package.id)
+            stats.delivered += 1
+            due = main._deadline_time(package, received_day)
+            if due is not None and package.delivery_time > due:
+                stats.late += 1
+        else:
+            _reset(package)
+            carry.append(package)
+    stats.carried = len(carry)
+    stats.miles = sum(truck.miles_traveled_today for truck in trucks)
+    stats.trucks = sum(1 for truck in trucks if truck.miles_traveled_today)
+    return carry
+
+
+def _assign_up_front(records, trucks, depot, address_index, distances, day, speed):
+    """
+    Load a depot's (ready, package) workload onto its trucks before the day.
+
+    Flow: packages are assigned by truck_assignment.assign_packages() with
+    their ready times standing in for delays and address corrections.
+    Returns False, with the trucks left empty, when the workload is larger
+    than one load per truck or cannot be assigned (ValueError).
+    Complexity: that of assign_packages() for p packages.
+    """
+    if len(records) > len(trucks) * Truck.MAX_PACKAGES:
+        return False
+    ready = {package.id: at for at, package in records}
+    try:
+        assign_packages(
+            sorted((package for _, package in records), key=lambda package: package.id),
+            trucks,
+            address_index,
+            distances,
+            day,
+            correction_times=ready,
+            available_times=ready,
+            speed=speed,
+            hub=depot.street,
+        )
+    except ValueError:
+        for truck in trucks:
+            truck.get_packages().clear()
+        for _, package in records:
+            package.assigned_truck_number = None
+        return False
+    return True
+
+
+def format_table(results):
+    """
+    Render results as a fixed-width table with a total per day and overall.
+
+    Complexity: O(days · D).
+    """
+    name_width = max([len("Depot")] + [len(r.depot) for r in results])
+    header = (f"{'Day':<10} | {'Depot':<{name_width}} | {'Pkgs':>5} | {'Deliv':>5} | {'Late':>4}"
+              f" | {'Carry':>5} | {'Miles':>8} | {'Trucks':>6}")
+    lines = [header, "-" * len(header)]
+
+    def line(label, name, rows):
+        return (f"{label:<10} | {name:<{name_width}} | {sum(r.packages for r in rows):>5}"
+                f" | {sum(r.delivered for r in rows):>5} | {sum(r.late for r in rows):>4}"
+                f" | {rows[-1].carried if len(rows) == 1 else sum(r.carried for r in rows):>5}"
+                f" | {sum(r.miles for r in rows):>8.1f} | {sum(r.trucks for r in rows):>6}")
+
+    days = [list(group) for _, group in groupby(results, key=lambda r: r.day)]
+    for rows in days:
+        label = rows[0].day.strftime("%Y-%m-%d")
+        for r in rows:
+            lines.append(line(label, r.depot, [r]))
+        if len(rows) > 1:
+            lines.append(line(label, "(all)", rows))
+    if len(days) > 1:
+        lines.append("-" * len(header))
+        totals = (f"{'Total':<10} | {'':<{name_width}} | {'':>5} | {sum(r.delivered for r in results):>5}"
+                  f" | {sum(r.late for r in results):>4} | {sum(r.carried for r in days[-1]):>5}"
+                  f" | {sum(r.miles for r in results):>8.1f} | {'':>6}")
+        lines.append(totals)
+    unroutable = sum(r.unroutable for r in results)
+    if unroutable:
+        lines.append(f"{unroutable} package(s) had an address not in the distance table and were skipped")
+    return "\n".join(lines)
+
+
+def run(argv=None):
+    """Command-line entry point: simulate the operations and print the table."""
+    parser = argparse.ArgumentParser(description="Simulate several days across several depots.")
+    parser.add_argument("operations_file", nargs="?", help="JSON operations file (default: one HUB depot)")
+    parser.add_argument("--days", type=int, default=None, help="number of days (overrides the file)")
+    args = parser.parse_args(argv)
+
+    try:
+        operations = load_operations(args.operations_file) if args.operations_file else Operations()
+        if args.days is not None:
+            if args.days < 1:
+                raise ValueError("--days must be at least 1")
+            operations.days = args.days
+        results = simulate_days(operations)
+    except (OSError, ValueError) as exc:
+        print(f"Could not run operations: {exc}", file=sys.stderr)
+        return 2
+    print(format_table(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
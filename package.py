@@ -2,6 +2,8 @@
 
 Process:
   - Represent a WGUPS package with id, address, deadline, weight and status.
+  - The deadline text ("10:30 AM", "EOD") is parsed once into
+    deadline_minutes (minutes after midnight, None for EOD).
   - Provide small helper methods to set status and convert value types for easier printing to console.
 
 Flow:
@@ -15,6 +17,32 @@ Complexity:
 from Enums.package_status import PackageStatus
 from datetime import datetime
 
+# deadline text -> minutes after midnight (deadline texts repeat a lot)
+_DEADLINE_MINUTES = {}
+
+
+def parse_deadline(text):
+    """
+    Return a deadline text such as "10:30 AM" as minutes after midnight.
+
+    Flow: "EOD" or an empty deadline returns None; dots and spaces are
+    ignored, so "10:30AM" and "10:30 a.m." parse too. Each distinct text is
+    parsed once.
+    Complexity: O(1).
+    """
+    minutes = _DEADLINE_MINUTES.get(text, False)
+    if minutes is not False:
+        return minutes
+    clean = (text or "").replace(".", "").replace(" ", "").upper()
+    if not clean or clean == "EOD":
+        minutes = None
+    else:
+        parsed = datetime.strptime(clean, "%I:%M%p")
+        minutes = parsed.hour * 60 + parsed.minute
+    _DEADLINE_MINUTES[text] = minutes
+    return minutes
+
+
 class Package:
     """
     Container for package data and light helpers.
@@ -24,16 +52,32 @@ class Package:
 
     Flow:
       - Created in parse_package_csv()
+      - Attributes are fixed with __slots__; see package_table.PackageView
+        for the columnar equivalent.
     """
-    def __init__(self, id, address, deadline, weight, truck_number=None):
+    __slots__ = (
+        "id", "deadline", "deadline_minutes", "weight", "address", "truck_number", "notes",
+        "package_status", "delivery_time", "assigned_truck_number",
+        "address_row", "load_time",
+    )
+
+    def __init__(self, id, address, deadline, weight, truck_number=None, notes=""):
         self.id = id
         self.deadline = deadline
+        self.deadline_minutes = parse_deadline(deadline)
         self.weight = weight
         self.address = address
         self.truck_number = truck_number
+        # Special-notes column from the package file (constraints for assignment)
+        self.notes = notes
         self.package_status = PackageStatus.AT_HUB
         self.delivery_time = None
         self.assigned_truck_number = None
+        # Distance matrix row of the address, set when the package file is loaded
+        # (AddressIndex.resolve_packages()) or a streamed package is ingested
+        self.address_row = None
+        # Time the package left the hub on a truck still driving to it (snapshots only)
+        self.load_time = None
 
     def set_package_status(self, status):
         """Set the package status.
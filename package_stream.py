@@ -0,0 +1,136 @@
+"""Streaming Package Ingestion for WGUPS Simulator
+
+Process:
+  - Read package records one at a time from any line source: a list or
+    generator of strings, an open file, a pipe (sys.stdin) or a file that is
+    still being written (tail_lines()).
+  - A stream record is the package CSV row prefixed with the simulated time
+    the package reaches the hub:
+        HH:MM,id,street,city,state,zip,deadline,weight[,notes]
+
+Flow:
+  - read_package_stream() turns lines into (arrival_time, Package) pairs
+    lazily; nothing is read ahead, so a blocking source (pipe, tail) only
+    blocks when the simulation actually needs the next record.
+  - DeliverySimulation.add_package_stream() consumes the pairs during
+    run(): each package is added to the live package store and loaded onto a
+    truck that is at, or on its way back to, the hub.
+  - package_from_row() is shared with parse_package_csv(), so streamed and
+    file-loaded packages are built the same way.
+
+Complexity:
+  - O(1) per record (plus the record's length); memory is one record.
+"""
+from address import Address
+from package import Package
+from datetime import datetime
+import csv
+import os
+import sys
+import time
+
+
+def package_from_row(row):
+    """
+    Build a Package from one package CSV row (id, street, city, state, zip,
+    deadline, weight[, notes]).
+
+    Complexity: O(1).
+    """
+    address = Address(
+        street=row[1].strip(),
+        city=row[2].strip(),
+        state=row[3].strip(),
+        zip_code=row[4].strip()
+    )
+    return Package(
+        id=int(row[0]),
+        address=address,
+        deadline=row[5].strip(),
+        weight=int(row[6]),
+        notes=row[7].strip() if len(row) > 7 else "",
+    )
+
+
+def parse_stream_record(row, day):
+    """
+    Turn one stream CSV row into (arrival_time, Package).
+
+    Process: the first column is the hub arrival time (HH:MM, military time)
+    on `day`; the rest is a package row.
+    Flow: raises ValueError for a malformed row.
+    Complexity: O(1).
+    """
+    if len(row) < 8:
+        raise ValueError(f"Stream record needs a time and 7 package columns: {row!r}")
+    clock = datetime.strptime(row[0].strip(), "%H:%M")
+    arrival = day.replace(hour=clock.hour, minute=clock.minute, second=0, microsecond=0)
+    return arrival, package_from_row(row[1:])
+
+
+def read_package_stream(lines, day):
+    """
+    Yield (arrival_time, Package) for each record in an iterable of lines.
+
+    Flow: blank lines and lines starting with "#" are skipped. Records are
+    expected in arrival order; DeliverySimulation treats an earlier time as
+    "arrives now".
+    Complexity: O(1) per line, nothing buffered.
+    """
+    for line in lines:
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        for row in csv.reader([line]):
+            yield parse_stream_record(row, day)
+
+
+def tail_lines(path, poll_interval=0.5, idle_timeout=None):
+    """
+    Yield lines from path as they are appended, like `tail -f`.
+
+    Process: read whatever is in the file, then poll for more every
+    poll_interval seconds. A trailing partial line is held until its newline
+    arrives.
+    Flow: stops once no new line has arrived for idle_timeout seconds
+    (never, if None), yielding any held partial line first.
+    Complexity: O(1) per line; one read per poll.
+    """
+    with open(path, encoding="utf-8") as f:
+        pending = ""
+        last_data = time.monotonic()
+        while True:
+            chunk = f.readline()
+            if chunk:
+                pending += chunk
+                if pending.endswith("\n"):
+                    yield pending
+                    pending = ""
+                last_data = time.monotonic()
+                continue
+            if idle_timeout is not None and time.monotonic() - last_data >= idle_timeout:
+                if pending:
+                    yield pending
+                return
+            time.sleep(poll_interval)
+
+
+def open_package_stream(source, day, follow=False):
+    """
+    Return a record generator for a CLI source: "-" for stdin, else a path.
+
+    Flow: with follow=True a path is tailed (until idle for 5 seconds).
+    Complexity: O(1); records are read lazily.
+    """
+    if source == "-":
+        return read_package_stream(sys.stdin, day)
+    if not os.path.exists(source):
+        raise FileNotFoundError(source)
+    if follow:
+        return read_package_stream(tail_lines(source, idle_timeout=5.0), day)
+    return _read_file_stream(source, day)
+
+
+def _read_file_stream(path, day):
+    """Yield records from a finished file, closing it when exhausted. O(1) per line."""
+    with open(path, encoding="utf-8") as f:
+        yield from read_package_stream(f, day)
@@ -0,0 +1,353 @@
+"""Columnar Package Store for WGUPS Simulator
+
+Process:
+  - Keep every package field in a typed column (array module) instead of one
+    Package + Address object pair per package: ids, weights, deadlines as
+    minutes after midnight, status codes, truck numbers, distance matrix rows
+    and delivery/load times as microseconds after the start of the day.
+  - Addresses, deadline texts and notes are pooled: each distinct value is
+    stored once and the columns hold its index.
+
+Flow:
+  - PackageTable offers the read side of the CustomHashMap API (get, items,
+    keys, __getitem__, __contains__, __len__), so simulate_truck_deliveries()
+    can run on it unchanged (main.USE_PACKAGE_TABLE).
+  - get() returns a PackageView: a two-slot object that reads and writes the
+    table's columns and has the Package attributes and methods. Views are
+    created on first access and reused, so identity checks and id()-keyed
+    lookups (StopSet) keep working.
+  - Columns are public for code that wants to scan them directly, e.g.
+    table.status_codes or table.deadline_minutes.
+
+Complexity:
+  - append/add: amortized O(1). get: O(1) average. items/keys: O(n).
+  - Memory: about 60 bytes of column data per package plus one pooled
+    Address per distinct address; views cost ~56 bytes each once touched.
+"""
+from address import Address
+from hashmap import CustomHashMap
+from package import Package, parse_deadline
+from Enums.package_status import PackageStatus
+from array import array
+from datetime import timedelta
+import sys
+
+# Column value used for "no value" (EOD deadline, no truck, no time, no row)
+MISSING = -1
+
+_STATUS_BY_CODE = {status.value: status for status in PackageStatus}
+
+
+def deadline_minutes(text):
+    """
+    Return a deadline text such as "10:30 AM" as minutes after midnight.
+
+    Flow: "EOD" or an empty deadline returns MISSING.
+    Complexity: O(1).
+    """
+    minutes = parse_deadline(text)
+    return MISSING if minutes is None else minutes
+
+
+class PackageTable:
+    """
+    Struct-of-arrays package store keyed by package id.
+
+    Fields (one entry per package, in insertion order):
+      - ids, weights: package id and weight
+      - deadline_minutes: minutes after midnight, MISSING for EOD
+      - status_codes: PackageStatus values
+      - truck_numbers / assigned_trucks: CSV truck column / loaded truck
+      - address_ids: index into `addresses` (shared Address objects)
+      - address_rows: distance matrix row, MISSING until resolved
+      - delivery_us / load_us: microseconds after `day`, MISSING if unset
+    """
+
+    def __init__(self, day):
+        self.day = day
+        self.ids = array("q")
+        self.weights = array("i")
+        self.deadline_minutes = array("i")
+        self.status_codes = array("b")
+        self.truck_numbers = array("i")
+        self.assigned_trucks = array("i")
+        self.address_ids = array("i")
+        self.address_rows = array("i")
+        self.delivery_us = array("q")
+        self.load_us = array("q")
+        self.addresses = []
+        self._deadline_codes = array("i")
+        self._note_codes = array("i")
+        self._address_codes = {}
+        self._texts = []
+        self._text_codes = {}
+        self._minutes_by_code = {}
+        self._row_of = CustomHashMap()
+        self._views = []
+
+    @classmethod
+    def from_packages(cls, items, day):
+        """
+        Build a table from (id, Package) pairs, e.g. CustomHashMap.items().
+
+        Complexity: O(n).
+        """
+        table = cls(day)
+        for key, package in items:
+            table.add(key, package)
+        return table
+
+    # ----- pools -----------------------------------------------------------
+
+    def _text_code(self, text):
+        """Return the pool index of text, adding it if new. O(1)."""
+        code = self._text_codes.get(text)
+        if code is None:
+            code = len(self._texts)
+            self._texts.append(sys.intern(text))
+            self._text_codes[text] = code
+        return code
+
+    def address_code(self, address):
+        """Return the pool index of an Address (by value), adding it if new. O(1)."""
+        key = (address.street, address.city, address.state, address.zip_code)
+        code = self._address_codes.get(key)
+        if code is None:
+            code = len(self.addresses)
+            self.addresses.append(address if type(address) is Address else Address(*key))
+            self._address_codes[key] = code
+        return code
+
+    def _deadline_minutes(self, code):
+        """Return minutes for a pooled deadline text, parsing each text once. O(1)."""
+        minutes = self._minutes_by_code.get(code)
+        if minutes is None:
+            minutes = deadline_minutes(self._texts[code])
+            self._minutes_by_code[code] = minutes
+        return minutes
+
+    # ----- building --------------------------------------------------------
+
+    def append(self, id, street, city, state, zip_code, deadline, weight, truck_number=None, notes=""):
+        """
+        Add one package from raw field values (no Package object is built).
+
+        Flow: a repeated id replaces that package's row. Returns the row.
+        Complexity: amortized O(1).
+        """
+        address_id = self._address_codes.get((street, city, state, zip_code))
+        if address_id is None:
+            address_id = self.address_code(Address(street, city, state, zip_code))
+        deadline_code = self._text_code(deadline)
+
+        row = self._row_of.get(id)
+        if row is not None:
+            self._set_row(row, id, address_id, deadline_code, weight, truck_number, notes)
+            return row
+
+        row = len(self.ids)
+        self.ids.append(id)
+        self.weights.append(weight)
+        self._deadline_codes.append(deadline_code)
+        self.deadline_minutes.append(self._deadline_minutes(deadline_code))
+        self.status_codes.append(PackageStatus.AT_HUB.value)
+        self.truck_numbers.append(MISSING if truck_number is None else truck_number)
+        self.assigned_trucks.append(MISSING)
+        self.address_ids.append(address_id)
+        self.address_rows.append(MISSING)
+        self.delivery_us.append(MISSING)
+        self.load_us.append(MISSING)
+        self._note_codes.append(self._text_code(notes or ""))
+        self._views.append(None)
+        self._row_of.add(id, row)
+        return row
+
+    def _set_row(self, row, id, address_id, deadline_code, weight, truck_number, notes):
+        """Overwrite the static fields of an existing row. O(1)."""
+        self.ids[row] = id
+        self.weights[row] = weight
+        self._deadline_codes[row] = deadline_code
+        self.deadline_minutes[row] = self._deadline_minutes(deadline_code)
+        self.truck_numbers[row] = MISSING if truck_number is None else truck_number
+        self.address_ids[row] = address_id
+        self._note_codes[row] = self._text_code(notes or "")
+
+    def add(self, key, package):
+        """
+        Copy a Package (or PackageView) into the table under key.
+
+        Complexity: amortized O(1).
+        """
+        addr = package.address
+        row = self.append(key, addr.street, addr.city, addr.state, addr.zip_code,
+                          package.deadline, package.weight, package.truck_number, package.notes)
+        view = self.view(row)
+        view.package_status = package.package_status
+        view.assigned_truck_number = package.assigned_truck_number
+        view.address_row = package.address_row
+        view.delivery_time = package.delivery_time
+        view.load_time = package.load_time
+        return True
+
+    # ----- map API ---------------------------------------------------------
+
+    def row_of(self, key):
+        """Return the row of package id key, or None. O(1) average."""
+        return self._row_of.get(key)
+
+    def view(self, row):
+        """Return the (cached) PackageView of row. O(1)."""
+        view = self._views[row]
+        if view is None:
+            view = PackageView(self, row)
+            self._views[row] = view
+        return view
+
+    def get(self, key):
+        """Return the PackageView for package id key, or None. O(1) average."""
+        row = self._row_of.get(key)
+        return None if row is None else self.view(row)
+
+    def keys(self):
+        """Return package ids in insertion order. O(n)."""
+        return list(self.ids)
+
+    def items(self):
+        """Return (id, PackageView) pairs in insertion order. O(n)."""
+        return [(pid, self.view(row)) for row, pid in enumerate(self.ids)]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, key):
+        return self._row_of.get(key) is not None
+
+    def __getitem__(self, key):
+        row = self._row_of.get(key)
+        if row is None:
+            raise KeyError(key)
+        return self.view(row)
+
+    # ----- column helpers --------------------------------------------------
+
+    def text(self, code):
+        """Return a pooled string by index. O(1)."""
+        return self._texts[code]
+
+    def status_counts(self):
+        """
+        Return {PackageStatus: count} straight from the status column.
+
+        Complexity: O(n).
+        """
+        counts = {}
+        for code in self.status_codes:
+            status = _STATUS_BY_CODE[code]
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def _to_time(self, micros):
+        return None if micros == MISSING else self.day + timedelta(microseconds=micros)
+
+    def _from_time(self, value):
+        if value is None:
+            return MISSING
+        delta = value - self.day
+        return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class PackageView:
+    """
+    Package-compatible view of one PackageTable row.
+
+    Process: every attribute is a property over the table's columns, so
+    assigning e.g. view.package_status updates the table in place.
+    """
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    @property
+    def id(self):
+        return self._table.ids[self._row]
+
+    @property
+    def weight(self):
+        return self._table.weights[self._row]
+
+    @property
+    def deadline(self):
+        return self._table._texts[self._table._deadline_codes[self._row]]
+
+    @property
+    def deadline_minutes(self):
+        value = self._table.deadline_minutes[self._row]
+        return None if value == MISSING else value
+
+    @property
+    def notes(self):
+        return self._table._texts[self._table._note_codes[self._row]]
+
+    @property
+    def truck_number(self):
+        value = self._table.truck_numbers[self._row]
+        return None if value == MISSING else value
+
+    @property
+    def address(self):
+        return self._table.addresses[self._table.address_ids[self._row]]
+
+    @address.setter
+    def address(self, address):
+        self._table.address_ids[self._row] = self._table.address_code(address)
+
+    @property
+    def package_status(self):
+        return _STATUS_BY_CODE[self._table.status_codes[self._row]]
+
+    @package_status.setter
+    def package_status(self, status):
+        self._table.status_codes[self._row] = status.value
+
+    @property
+    def assigned_truck_number(self):
+        value = self._table.assigned_trucks[self._row]
+        return None if value == MISSING else value
+
+    @assigned_truck_number.setter
+    def assigned_truck_number(self, number):
+        self._table.assigned_trucks[self._row] = MISSING if number is None else number
+
+    @property
+    def address_row(self):
+        value = self._table.address_rows[self._row]
+        return None if value == MISSING else value
+
+    @address_row.setter
+    def address_row(self, row):
+        self._table.address_rows[self._row] = MISSING if row is None else row
+
+    @property
+    def delivery_time(self):
+        return self._table._to_time(self._table.delivery_us[self._row])
+
+    @delivery_time.setter
+    def delivery_time(self, value):
+        self._table.delivery_us[self._row] = self._table._from_time(value)
+
+    @property
+    def load_time(self):
+        return self._table._to_time(self._table.load_us[self._row])
+
+    @load_time.setter
+    def load_time(self, value):
+        self._table.load_us[self._row] = self._table._from_time(value)
+
+    # Same behavior as Package; both only read the attributes above
+    set_package_status = Package.set_package_status
+    get_status_str = Package.get_status_str
+
+    def __repr__(self):
+        return f"PackageView(id={self.id}, status={self.package_status.name})"
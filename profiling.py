@@ -0,0 +1,200 @@
+"""Profiling and Hot-Path Instrumentation for WGUPS Simulator
+
+Process:
+  - Collect counters and timers from the simulator's hot paths into one
+    Metrics object: CSV parsing, CustomHashMap probes and resizes,
+    _find_nearest_delivery calls, route planning and each truck's delivery
+    legs.
+  - Instrumentation is opt-in. Every hook first reads the module global
+    ACTIVE and does nothing else while it is None, so a run without metrics
+    pays one global lookup per hook.
+  - Optional outputs: a cProfile stats file (readable with pstats or
+    snakeviz) and a Chrome trace JSON (chrome://tracing, Perfetto) of the
+    timed sections.
+
+Flow:
+  - enable() installs a fresh Metrics as ACTIVE and returns it; disable()
+    removes it. main.py's command line does this for `--metrics` and
+    `--trace FILE`; `--profile FILE` runs the query under profiled().
+  - Hooks call ACTIVE.count(), ACTIVE.observe() (a value distribution:
+    calls, total, max) or wrap a section in span(), which is a shared no-op
+    context while disabled.
+  - Metrics.report() lists everything; to_dict() gives the same data for
+    JSON; write_chrome_trace() saves the spans as trace events.
+
+Complexity:
+  - Disabled: O(1) per hook, no allocation. Enabled: O(1) per event plus
+    one stored trace event per span when tracing.
+"""
+from contextlib import contextmanager
+import cProfile
+import json
+import os
+import time
+
+# The Metrics collecting hot-path data, or None while instrumentation is off
+ACTIVE = None
+
+
+class Metrics:
+    """
+    Counters, value distributions and timers of one instrumented run.
+
+    Fields:
+      - counters: {name: count}
+      - values: {name: [observations, total, max]} (e.g. probe lengths)
+      - timers: {name: [calls, seconds]}
+      - events: Chrome trace events, only when trace is set
+    """
+
+    def __init__(self, trace=False):
+        self.counters = {}
+        self.values = {}
+        self.timers = {}
+        self.trace = trace
+        self.events = []
+        self._origin = time.perf_counter()
+
+    def count(self, name, n=1):
+        """Add n to counter name. O(1)."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        """Record one observation of name (count, total and max are kept). O(1)."""
+        entry = self.values.get(name)
+        if entry is None:
+            self.values[name] = [1, value, value]
+            return
+        entry[0] += 1
+        entry[1] += value
+        if value > entry[2]:
+            entry[2] = value
+
+    def add_time(self, name, start, end):
+        """Add one timed call of name that ran from start to end (perf_counter). O(1)."""
+        entry = self.timers.get(name)
+        if entry is None:
+            entry = self.timers[name] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += end - start
+        if self.trace:
+            self.events.append({
+                "name": name, "ph": "X", "pid": os.getpid(), "tid": 0,
+                "ts": (start - self._origin) * 1e6, "dur": (end - start) * 1e6,
+            })
+
+    def to_dict(self):
+        """Return the counters, values and timers as plain JSON data. O(m) for m names."""
+        return {
+            "counters": dict(sorted(self.counters.items())),
+            "values": {name: {"count": c, "total": t, "max": m, "mean": t / c}
+                       for name, (c, t, m) in sorted(self.values.items())},
+            "timers": {name: {"calls": c, "seconds": s}
+                       for name, (c, s) in sorted(self.timers.items())},
+        }
+
+    def report(self):
+        """Return printable lines, timers slowest first. O(m log m)."""
+        lines = []
+        for name, (calls, seconds) in sorted(self.timers.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<32} {calls:>9} calls {seconds * 1000:>11.3f} ms"
+                         f" {seconds / calls * 1e6:>10.1f} us/call")
+        for name, (count, total, peak) in sorted(self.values.items()):
+            lines.append(f"{name:<32} {count:>9} obs   mean {total / count:>8.3f}  max {peak}")
+        for name, count in sorted(self.counters.items()):
+            lines.append(f"{name:<32} {count:>9}")
+        return lines
+
+    def write_chrome_trace(self, path):
+        """
+        Write the recorded spans as a Chrome trace JSON file.
+
+        Flow: counters are added as one "C" (counter) event at the end of
+        the trace, so they show up alongside the timeline.
+        Complexity: O(events).
+        """
+        end = (time.perf_counter() - self._origin) * 1e6
+        events = list(self.events)
+        if self.counters:
+            events.append({"name": "counters", "ph": "C", "pid": os.getpid(), "tid": 0,
+                           "ts": end, "args": dict(self.counters)})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+class _Span:
+    """Context manager timing one section into a Metrics."""
+
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.add_time(self.name, self.start, time.perf_counter())
+        return False
+
+
+class _NoSpan:
+    """Shared do-nothing context used while instrumentation is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name):
+    """
+    Return a context manager timing `name` into ACTIVE (a no-op when disabled).
+
+    Complexity: O(1).
+    """
+    if ACTIVE is None:
+        return _NO_SPAN
+    return _Span(ACTIVE, name)
+
+
+def enable(trace=False):
+    """Start collecting into a new Metrics (spans kept for a trace if set); return it. O(1)."""
+    global ACTIVE
+    ACTIVE = Metrics(trace)
+    return ACTIVE
+
+
+def disable():
+    """Stop collecting and return the Metrics that was active (or None). O(1)."""
+    global ACTIVE
+    metrics, ACTIVE = ACTIVE, None
+    return metrics
+
+
+@contextmanager
+def profiled(path):
+    """
+    Run the body under cProfile and dump pstats data to path.
+
+    Flow: with path None the body runs unprofiled.
+    Complexity: cProfile's per-call overhead while the body runs.
+    """
+    if path is None:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
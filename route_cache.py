@@ -0,0 +1,336 @@
+"""Persistent Route Cache for WGUPS Simulator
+
+Process:
+  - Remember the tours the route optimizer produced for a truck, keyed by a
+    canonical hash of the stop set: the hub row, the sorted matrix rows of
+    the stops, the distance-table version and the optimizer's name. Order
+    and duplicates in the seed tour do not change the key.
+  - Entries live in an in-memory LRU (OrderedDict, most recent last) backed
+    by an SQLite file, so the best known tours survive between runs.
+  - A dispatch whose exact stop set is cached skips routing entirely. One
+    that differs from a cached set by a few stops (a small symmetric
+    difference) warm-starts the optimizer from the cached tour: stops that
+    left are dropped, new ones are put in with cheapest insertion.
+
+Flow:
+  - CachedRouteOptimizer(inner, cache) is a RouteOptimizer, so it plugs into
+    main._plan_truck_route like any other; main.py wraps ROUTE_OPTIMIZER in
+    one when ROUTE_CACHE_FILE is set.
+  - candidates() returns the cached candidate tours on a hit; otherwise it
+    asks `inner` (from the warm-start tour when there is a near match) and
+    stores the result. _plan_truck_route still checks each tour against the
+    truck's deadlines, so a cached tour is never accepted blindly.
+  - The distance-table version is a SHA-256 of the table's cells, computed
+    once per table object; any edit to the table starts a fresh key space.
+
+Complexity:
+  - Key: O(k log k) for k stops. Hit: O(1) in memory, one indexed SQLite
+    read otherwise.
+  - Near-match search: O(c·k) over the c cached entries with the same hub
+    and table version; insertion warm start O(k·d) for d new stops.
+"""
+from collections import OrderedDict
+from array import array
+from route_optimizer import RouteOptimizer, tour_length
+import hashlib
+import json
+import math
+import sqlite3
+import profiling
+
+# Entries kept in memory (and loaded from the file when it is opened)
+DEFAULT_CAPACITY = 1024
+# Largest symmetric difference of stop sets that still warm-starts a route
+NEAR_MATCH_STOPS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS routes (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    hub INTEGER NOT NULL,
+    stops TEXT NOT NULL,
+    tours TEXT NOT NULL,
+    miles REAL NOT NULL,
+    used INTEGER NOT NULL
+)
+"""
+
+
+def table_version(distances):
+    """
+    Return a hex SHA-256 of every cell of a distance table.
+
+    Flow: reads the backing NumPy array of a DistanceMatrix in one pass;
+    other tables (lists of lists, packed or memory-mapped matrices) are
+    hashed row by row as float64, with None cells hashed as NaN.
+    Complexity: O(n²).
+    """
+    h = hashlib.sha256()
+    whole = distances.as_array() if hasattr(distances, "as_array") else None
+    if whole is not None:
+        h.update(whole.astype("<f8").tobytes())
+        return h.hexdigest()
+    for i in range(len(distances)):
+        row = distances[i]
+        h.update(array("d", (math.nan if cell is None else float(cell) for cell in row)).tobytes())
+    return h.hexdigest()
+
+
+def route_key(hub, stops, version, namespace=""):
+    """Return the canonical hex key of a stop set. Complexity: O(k log k)."""
+    text = f"{namespace}|{version}|{hub}|{','.join(map(str, sorted(set(stops))))}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def warm_start(tour, stops, distances):
+    """
+    Adapt a cached tour to a new stop set.
+
+    Process: keep the cached tour's order for the stops still present, then
+    insert each new stop where it adds the least distance.
+    Flow: returns a closed tour starting and ending at the cached hub row.
+    Complexity: O(k·d) for k stops and d new stops.
+    """
+    stops = set(stops)
+    result = [tour[0]] + [row for row in tour[1:-1] if row in stops] + [tour[-1]]
+    present = set(result[1:-1])
+    for row in sorted(stops - present):
+        best_at, best_cost = 1, math.inf
+        for i in range(len(result) - 1):
+            a, b = result[i], result[i + 1]
+            cost = distances[a][row] + distances[row][b] - distances[a][b]
+            if cost < best_cost:
+                best_at, best_cost = i + 1, cost
+        result.insert(best_at, row)
+    return result
+
+
+class RouteEntry:
+    """
+    One cached stop set.
+
+    Fields:
+      - version / hub / stops: what the entry was computed for (stops frozen)
+      - tours: candidate tours, best first
+      - miles: length of the best tour
+    """
+
+    __slots__ = ("version", "hub", "stops", "tours", "miles")
+
+    def __init__(self, version, hub, stops, tours, miles):
+        self.version = version
+        self.hub = hub
+        self.stops = frozenset(stops)
+        self.tours = tours
+        self.miles = miles
+
+
+class RouteCache:
+    """
+    LRU of RouteEntry objects by key, optionally persisted to an SQLite file.
+
+    Fields:
+      - path: the SQLite file (None = memory only)
+      - capacity: entries kept in memory; the file keeps every entry
+      - near_match: largest symmetric difference accepted by nearest()
+      - hits / near_hits / misses: lookup counts since construction
+    """
+
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY, near_match=NEAR_MATCH_STOPS):
+        self.path = path
+        self.capacity = int(capacity)
+        self.near_match = int(near_match)
+        self.hits = self.near_hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._versions = []
+        self._clock = 0
+        self._db = None
+        if path is not None:
+            self._open(path)
+
+    def _open(self, path):
+        """Open the file and load its most recently used entries. O(capacity)."""
+        self._db = sqlite3.connect(path)
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+        self._clock = self._db.execute("SELECT COALESCE(MAX(used), 0) FROM routes").fetchone()[0]
+        rows = self._db.execute(
+            "SELECT key, version, hub, stops, tours, miles FROM routes ORDER BY used DESC LIMIT ?",
+            (self.capacity,),
+        ).fetchall()
+        for key, version, hub, stops, tours, miles in reversed(rows):
+            self._entries[key] = RouteEntry(version, hub, json.loads(stops), json.loads(tours), miles)
+
+    def close(self):
+        """Close the backing file (the in-memory entries stay usable). O(1)."""
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def version(self, distances):
+        """
+        Return the version of a distance table, hashing each table object once.
+
+        Complexity: O(1) for a table seen before, O(n²) the first time.
+        """
+        for table, version in self._versions:
+            if table is distances:
+                return version
+        version = table_version(distances)
+        self._versions.append((distances, version))
+        return version
+
+    def _touch(self, key):
+        """
+        Record key as used in the file.
+
+        Flow: committed with the next put() or close(), so a hit never
+        waits on a disk sync.
+        Complexity: O(log entries).
+        """
+        if self._db is not None:
+            self._clock += 1
+            self._db.execute("UPDATE routes SET used = ? WHERE key = ?", (self._clock, key))
+
+    def get(self, key):
+        """
+        Return the RouteEntry for key, or None.
+
+        Flow: an entry found only in the file is moved into memory.
+        Complexity: O(1) in memory, one indexed read otherwise.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self._db is not None:
+            row = self._db.execute(
+                "SELECT version, hub, stops, tours, miles FROM routes WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            version, hub, stops, tours, miles = row
+            entry = RouteEntry(version, hub, json.loads(stops), json.loads(tours), miles)
+            self._remember(key, entry)
+        else:
+            return None
+        self._touch(key)
+        return entry
+
+    def put(self, key, entry):
+        """
+        Store entry under key, keeping the shorter best tour if key exists.
+
+        Complexity: O(1) plus one file write.
+        """
+        known = self._entries.get(key)
+        if known is not None and known.miles <= entry.miles:
+            self._entries.move_to_end(key)
+            return known
+        self._remember(key, entry)
+        if self._db is not None:
+            self._clock += 1
+            self._db.execute(
+                "INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.version, entry.hub, json.dumps(sorted(entry.stops)),
+                 json.dumps(entry.tours), entry.miles, self._clock),
+            )
+            self._db.commit()
+        return entry
+
+    def _remember(self, key, entry):
+        """Insert into the LRU, evicting the least recently used entry. O(1)."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def nearest(self, version, hub, stops):
+        """
+        Return the in-memory entry whose stop set differs least from stops.
+
+        Flow: only entries with the same version and hub whose symmetric
+        difference is at most near_match (and smaller than the stop set
+        itself) are considered; returns None when there is none.
+        Complexity: O(c·k) for c entries in memory.
+        """
+        stops = frozenset(stops)
+        limit = min(self.near_match, len(stops) - 1)
+        best, best_diff = None, limit + 1
+        for entry in reversed(self._entries.values()):
+            if entry.version != version or entry.hub != hub:
+                continue
+            if abs(len(entry.stops) - len(stops)) >= best_diff:
+                continue
+            diff = len(entry.stops ^ stops)
+            if diff < best_diff:
+                best, best_diff = entry, diff
+                if diff == 1:
+                    break
+        return best
+
+
+class CachedRouteOptimizer(RouteOptimizer):
+    """
+    Route optimizer that answers repeat stop sets from a RouteCache.
+
+    Fields:
+      - inner: the optimizer run on a cache miss
+      - cache: the RouteCache (shared between optimizers is fine; keys
+        include the inner optimizer's class name)
+    """
+
+    def __init__(self, inner, cache):
+        self.inner = inner
+        self.cache = cache
+        self._namespace = type(inner).__name__
+
+    def improve(self, tour, distances):
+        return self.candidates(tour, distances)[0]
+
+    def candidates(self, tour, distances):
+        """
+        Return the cached candidate tours for this stop set, computing them
+        with `inner` (warm-started from a near match when possible) on a miss.
+
+        Complexity: O(k log k) on a hit; the inner optimizer's cost on a miss.
+        """
+        hub, stops = tour[0], tour[1:-1]
+        if len(stops) < 2:
+            return self.inner.candidates(tour, distances)
+        version = self.cache.version(distances)
+        key = route_key(hub, stops, version, self._namespace)
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.cache.hits += 1
+            _count("route_cache.hit")
+            return [list(candidate) for candidate in entry.tours]
+
+        seed, warm = tour, None
+        near = self.cache.nearest(version, hub, stops)
+        if near is not None:
+            self.cache.near_hits += 1
+            _count("route_cache.near")
+            warm = warm_start(near.tours[0], stops, distances)
+            if tour_length(warm, distances) < tour_length(tour, distances):
+                seed = warm
+        else:
+            self.cache.misses += 1
+            _count("route_cache.miss")
+        tours = [[int(row) for row in candidate] for candidate in self.inner.candidates(seed, distances)]
+        if seed is warm:
+            tours.append(warm)
+        best = min(tours, key=lambda candidate: tour_length(candidate, distances))
+        tours.remove(best)
+        tours.insert(0, best)
+        self.cache.put(key, RouteEntry(version, hub, stops, tours, tour_length(best, distances)))
+        return [list(candidate) for candidate in tours]
+
+
+def _count(name):
+    """Count a cache outcome into the active profiling Metrics, if any. O(1)."""
+    if profiling.ACTIVE is not None:
+        profiling.ACTIVE.count(name)
@@ -0,0 +1,175 @@
+"""Route Optimizer for WGUPS Simulator
+
+Process:
+  - Improve a truck's nearest-neighbor tour with local search: 2-opt (reverse
+    a segment) and Or-opt (move a run of 1-3 stops elsewhere, optionally
+    reversed).
+  - Every candidate move is scored with an O(1) delta against the distance
+    matrix; only candidates next to each stop's k nearest neighbors are tried.
+
+Flow:
+  - A tour is a list of distance matrix rows that starts and ends at the hub
+    row, e.g. [hub, 5, 12, 3, hub]. The end points never move.
+  - RouteOptimizer.improve(tour, distances) returns a new tour no longer than
+    the input. The base class is a no-op so callers can plug in any strategy.
+  - candidates(tour, distances) lists tours best first, for callers that
+    may reject one (e.g. because it makes a deadline package late); by
+    default it is just improve()'s tour.
+  - LocalSearchOptimizer repeats improving passes until no move helps or its
+    time budget runs out.
+
+Complexity:
+  - Setup is O(m² log m) for the local matrix and neighbor lists (m stops).
+  - A pass evaluates O(m·k) moves, each O(1); applying a move is O(m).
+"""
+import time
+
+
+def tour_length(tour, distances):
+    """Return the total length of tour. Complexity: O(m)."""
+    return sum(distances[tour[i]][tour[i + 1]] for i in range(len(tour) - 1))
+
+
+class RouteOptimizer:
+    """Base optimizer: returns the seed tour unchanged."""
+
+    def improve(self, tour, distances):
+        return list(tour)
+
+    def candidates(self, tour, distances):
+        """Return improved tours to try in order, best first. O(improve)."""
+        return [self.improve(tour, distances)]
+
+
+class LocalSearchOptimizer(RouteOptimizer):
+    """
+    2-opt + Or-opt local search on a closed hub-to-hub tour.
+
+    Fields:
+      - time_budget: seconds allowed per improve() call
+      - neighbor_count: size of each stop's candidate neighbor list
+      - max_segment: longest run of stops Or-opt will relocate
+    """
+
+    def __init__(self, time_budget=0.05, neighbor_count=8, max_segment=3):
+        self.time_budget = float(time_budget)
+        self.neighbor_count = int(neighbor_count)
+        self.max_segment = int(max_segment)
+
+    def improve(self, tour, distances):
+        """
+        Return an improved copy of tour.
+
+        Process: translate the tour's rows to local indices 0..m so distance
+        lookups are plain list indexing, run 2-opt and Or-opt passes until
+        neither finds an improving move, then translate back.
+        Complexity: see module docstring.
+        """
+        if len(tour) < 4:
+            return list(tour)
+
+        # Local node ids: 0 is the hub, 1..m are the stops in seed order
+        rows = [tour[0]] + list(tour[1:-1])
+        m = len(rows)
+        d = [[float(distances[a][b]) for b in rows] for a in rows]
+        k = min(self.neighbor_count, m - 1)
+        neighbors = [
+            sorted((b for b in range(m) if b != a), key=lambda b: d[a][b])[:k]
+            for a in range(m)
+        ]
+
+        local = list(range(m)) + [0]
+        deadline = time.perf_counter() + self.time_budget
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = self._two_opt_pass(local, d, neighbors)
+            improved = self._or_opt_pass(local, d, neighbors) or improved
+
+        return [rows[node] for node in local]
+
+    @staticmethod
+    def _positions(local):
+        """Map node -> position (hub mapped to position 0). O(m)."""
+        pos = [0] * (len(local) - 1)
+        for i in range(1, len(local) - 1):
+            pos[local[i]] = i
+        return pos
+
+    def _two_opt_pass(self, local, d, neighbors):
+        """
+        One first-improvement 2-opt sweep.
+
+        Process: for stop a and each near neighbor c, try replacing edges
+        (a, next a) and (c, next c) with (a, c) and (next a, next c), i.e.
+        reversing the path between them.
+        Delta: d(a,c) + d(a',c') - d(a,a') - d(c,c'), O(1).
+        """
+        found = False
+        pos = self._positions(local)
+        last = len(local) - 1
+        for a in range(len(pos)):
+            for c in neighbors[a]:
+                i, j = pos[a], pos[c]
+                lo, hi = (i, j) if i < j else (j, i)
+                if hi - lo < 2 or hi >= last:
+                    continue
+                p, q = local[lo], local[lo + 1]
+                r, s = local[hi], local[hi + 1]
+                delta = d[p][r] + d[q][s] - d[p][q] - d[r][s]
+                if delta < -1e-9:
+                    local[lo + 1:hi + 1] = local[lo + 1:hi + 1][::-1]
+                    pos = self._positions(local)
+                    found = True
+        return found
+
+    def _or_opt_pass(self, local, d, neighbors):
+        """
+        One first-improvement Or-opt sweep.
+
+        Process: take a run of 1..max_segment stops and reinsert it (forward
+        or reversed) next to a near neighbor of either end of the run.
+        Delta: removal gain plus insertion cost, O(1); node positions are
+        rebuilt (O(m)) only after an accepted move.
+        """
+        found = False
+        last = len(local) - 1
+        pos = self._positions(local)
+        for seg_len in range(1, self.max_segment + 1):
+            start = 1
+            while start + seg_len <= last:
+                end = start + seg_len - 1
+                prev, nxt = local[start - 1], local[end + 1]
+                first, tail = local[start], local[end]
+                removal = d[prev][first] + d[tail][nxt] - d[prev][nxt]
+
+                best = None
+                for anchor in neighbors[first] + neighbors[tail]:
+                    ap = pos[anchor]
+                    # insertion edges (anchor, after) and (before, anchor)
+                    for left in (ap, ap - 1):
+                        if left < 0 or left >= last or start - 1 <= left <= end:
+                            continue
+                        u, v = local[left], local[left + 1]
+                        fwd = d[u][first] + d[tail][v] - d[u][v]
+                        rev = d[u][tail] + d[first][v] - d[u][v]
+                        for cost, reverse in ((fwd, False), (rev, True)):
+                            delta = cost - removal
+                            if delta < -1e-9 and (best is None or delta < best[0]):
+                                best = (delta, left, reverse)
+
+                if best is None:
+                    start += 1
+                    continue
+
+                _, left, reverse = best
+                segment = local[start:end + 1]
+                if reverse:
+                    segment.reverse()
+                rest = local[:start] + local[end + 1:]
+                insert_at = left + 1 if left < start else left + 1 - seg_len
+                local[:] = rest[:insert_at] + segment + rest[insert_at:]
+                # Positions only change when a move is made
+                pos = self._positions(local)
+                found = True
+                start += 1
+        return found
@@ -0,0 +1,218 @@
+"""Incremental Route Repair for WGUPS Simulator
+
+Process:
+  - Keep a dispatched truck's remaining stops as an explicit RoutePlan so an
+    event during the day edits that one route in place: a stop is removed,
+    or inserted at its cheapest position, against the distance matrix.
+    Nothing is re-planned from scratch and no other truck is touched.
+  - RouteEvent describes what happened (an address change, a package delay
+    or a truck breakdown); RouteChange reports what the repair did,
+    including the change in the truck's remaining miles.
+
+Flow:
+  - DeliverySimulation.apply_route_event() (or add_route_event() for a
+    scheduled time) finds the affected truck, edits its RoutePlan and
+    records a RouteChange.
+  - A RoutePlan is also the truck's stop selector: calling it returns the
+    next (package, distance) leg, so it plugs into on_dispatch() like the
+    nearest-neighbor selector does.
+  - Remaining miles always run from the truck's current stop through the
+    remaining stops and back to the hub.
+
+Complexity:
+  - remove/insert: O(k) for k remaining stops; remaining_miles(): O(k).
+"""
+
+ADDRESS_CHANGED = "address_changed"
+PACKAGE_DELAYED = "package_delayed"
+TRUCK_BROKEN_DOWN = "truck_broken_down"
+EVENT_KINDS = (ADDRESS_CHANGED, PACKAGE_DELAYED, TRUCK_BROKEN_DOWN)
+
+
+class RouteEvent:
+    """
+    Something that invalidates part of a route.
+
+    Fields:
+      - kind: one of EVENT_KINDS
+      - package_id: affected package (address change, delay)
+      - truck_number: affected truck (breakdown)
+      - street/city/zip_code: the new address (address change)
+      - until: datetime the delayed package is back at the hub
+    """
+
+    def __init__(self, kind, package_id=None, truck_number=None,
+                 street=None, city=None, zip_code=None, until=None):
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown route event {kind!r}; expected one of {', '.join(EVENT_KINDS)}")
+        self.kind = kind
+        self.package_id = package_id
+        self.truck_number = truck_number
+        self.street = street
+        self.city = city
+        self.zip_code = zip_code
+        self.until = until
+
+    @classmethod
+    def address_changed(cls, package_id, street, city, zip_code):
+        return cls(ADDRESS_CHANGED, package_id=package_id, street=street, city=city, zip_code=zip_code)
+
+    @classmethod
+    def package_delayed(cls, package_id, until):
+        return cls(PACKAGE_DELAYED, package_id=package_id, until=until)
+
+    @classmethod
+    def truck_broken_down(cls, truck_number):
+        return cls(TRUCK_BROKEN_DOWN, truck_number=truck_number)
+
+    def __repr__(self):
+        target = f"truck {self.truck_number}" if self.package_id is None else f"package {self.package_id}"
+        return f"RouteEvent({self.kind}, {target})"
+
+
+class RouteChange:
+    """
+    Outcome of one repair.
+
+    Fields:
+      - time, event: when and what
+      - truck_number: truck whose route was edited, or None
+      - applied: False if nothing could be changed (see message)
+      - stranded: ids of packages the repair left undeliverable (a
+        "Can only be on truck N" note naming a broken-down truck)
+      - miles_before/miles_after: the truck's remaining miles (stops + hub)
+      - elapsed_ms: wall-clock time the repair took
+    """
+
+    def __init__(self, time, event):
+        self.time = time
+        self.event = event
+        self.truck_number = None
+        self.applied = False
+        self.message = ""
+        self.stranded = []
+        self.miles_before = 0.0
+        self.miles_after = 0.0
+        self.elapsed_ms = 0.0
+
+    @property
+    def delta(self):
+        """Change in the truck's remaining miles (negative = shorter)."""
+        return self.miles_after - self.miles_before
+
+    def __str__(self):
+        clock = self.time.strftime("%H:%M")
+        if not self.applied:
+            return f"{clock} {self.event}: not applied ({self.message})"
+        text = (f"{clock} {self.event}: truck {self.truck_number} "
+                f"{self.miles_before:.1f} -> {self.miles_after:.1f} miles "
+                f"({self.delta:+.1f}) in {self.elapsed_ms:.2f} ms")
+        if self.stranded:
+            text += f"; undeliverable: package(s) {', '.join(map(str, self.stranded))}"
+        return text
+
+
+class RoutePlan:
+    """
+    Ordered remaining stops of one truck, editable in place.
+
+    Fields:
+      - stops: packages in driving order (each carries address_row)
+      - location_row: matrix row the truck leaves from next
+      - hub_row: row the truck returns to when stops run out
+    """
+
+    def __init__(self, packages, location_row, hub_row, distances):
+        self.stops = list(packages)
+        self.location_row = location_row
+        self.hub_row = hub_row
+        self.distances = distances
+
+    @classmethod
+    def nearest_neighbor(cls, packages, location_row, hub_row, distances):
+        """
+        Build a plan by repeatedly taking the nearest remaining stop.
+
+        Flow: used to make a nearest-neighbor truck's implicit route explicit
+        the first time it needs a repair. Ties keep load order.
+        Complexity: O(k²).
+        """
+        remaining = [p for p in packages if p.address_row is not None]
+        order = []
+        row = location_row
+        while remaining:
+            best = min(range(len(remaining)), key=lambda k: distances[row][remaining[k].address_row])
+            package = remaining.pop(best)
+            order.append(package)
+            row = package.address_row
+        return cls(order, location_row, hub_row, distances)
+
+    def __call__(self):
+        """Pop the next stop and return (package, distance); (None, inf) when done. O(k)."""
+        if not self.stops:
+            return None, float("inf")
+        package = self.stops.pop(0)
+        distance = self.distances[self.location_row][package.address_row]
+        self.location_row = package.address_row
+        return package, distance
+
+    def __len__(self):
+        return len(self.stops)
+
+    def __contains__(self, package):
+        return any(stop is package for stop in self.stops)
+
+    def _row(self, position):
+        """Row of the stop before `position` (the truck's location for 0). O(1)."""
+        return self.location_row if position == 0 else self.stops[position - 1].address_row
+
+    def remaining_miles(self):
+        """Miles from the current location through every stop back to the hub. O(k)."""
+        d = self.distances
+        row = self.location_row
+        total = 0.0
+        for package in self.stops:
+            total += d[row][package.address_row]
+            row = package.address_row
+        return total + d[row][self.hub_row]
+
+    def remove(self, package):
+        """
+        Drop package from the plan, joining its neighbors directly.
+
+        Flow: returns the change in remaining miles (<= 0 on a metric table),
+        or None if the package is not in the plan.
+        Complexity: O(k).
+        """
+        for position, stop in enumerate(self.stops):
+            if stop is package:
+                break
+        else:
+            return None
+        d = self.distances
+        prev_row = self._row(position)
+        next_row = self.stops[position + 1].address_row if position + 1 < len(self.stops) else self.hub_row
+        row = package.address_row
+        del self.stops[position]
+        return d[prev_row][next_row] - d[prev_row][row] - d[row][next_row]
+
+    def insert(self, package):
+        """
+        Insert package where it adds the fewest miles (cheapest insertion).
+
+        Flow: returns (position, added miles).
+        Complexity: O(k).
+        """
+        d = self.distances
+        row = package.address_row
+        best_position, best_cost = 0, None
+        prev_row = self.location_row
+        for position in range(len(self.stops) + 1):
+            next_row = self.stops[position].address_row if position < len(self.stops) else self.hub_row
+            cost = d[prev_row][row] + d[row][next_row] - d[prev_row][next_row]
+            if best_cost is None or cost < best_cost:
+                best_position, best_cost = position, cost
+            prev_row = next_row
+        self.stops.insert(best_position, package)
+        return best_position, best_cost
+
@@ -0,0 +1,181 @@
+"""Scenario Model for WGUPS Simulator
+
+Process:
+  - Describe one "what-if" variant of the delivery day: truck speed, truck
+    departure times, number of drivers, how packages are assigned, which
+    packages are delayed, whether the route optimizer runs and whether
+    routes are planned around deadline time windows.
+  - Read a file of scenario definitions (JSON) into Scenario objects.
+
+Flow:
+  - Every field left as None falls back to the CONST VARS in main.py, so an
+    empty Scenario() reproduces the normal simulation.
+  - simulate_truck_deliveries(..., scenario=...) reads the settings through
+    Scenario.setting(); scenario_runner.py runs many scenarios in parallel.
+
+Scenario file format (a list, or {"scenarios": [...]}):
+    [
+      {"name": "fast trucks", "truck_speed": 25},
+      {"name": "late flight", "delays": {"6": "10:15", "25": "10:15"}},
+      {"name": "four trucks", "departures": ["08:00", "08:00", "09:05", "10:20"],
+       "drivers": 3},
+      {"name": "hand lists", "assignment": "manual", "optimizer": false},
+      {"name": "exact routes", "optimizer": "exact"},
+      {"name": "deadline windows", "time_windows": true},
+      {"name": "custom", "assignment": {"1": [1, 13, 14], "2": [3, 18, 36]}}
+    ]
+
+Complexity:
+  - Parsing is O(s + d) for s scenarios and d listed delays/assignments.
+"""
+import json
+
+# Accepted values for a named assignment strategy
+ASSIGNMENT_MODES = ("auto", "manual")
+
+
+def _clock(text, day):
+    """Parse 'HH:MM' into a datetime on day. O(1)."""
+    try:
+        hh, mm = map(int, str(text).split(":"))
+        return day.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    except ValueError:
+        raise ValueError(f"Invalid time {text!r}; use HH:MM (e.g. 09:05)") from None
+
+
+def _typed(name, field, value, types):
+    """
+    Return value if it is an instance of types, else raise ValueError.
+
+    Flow: bool is not accepted where a number is expected (JSON true is not 1).
+    Complexity: O(1).
+    """
+    if isinstance(value, types) and (types is bool or not isinstance(value, bool)):
+        return value
+    raise ValueError(f"{name}: invalid {field} value {value!r}")
+
+
+def _time(name, field, value, day):
+    """Parse an 'HH:MM' string of field into a datetime on day; ValueError names both. O(1)."""
+    value = _typed(name, field, value, str)
+    try:
+        return _clock(value, day)
+    except ValueError as exc:
+        raise ValueError(f"{name}: {field}: {exc}") from None
+
+
+def _number(name, field, value):
+    """Return a package/truck number given as an int or a numeric JSON key. O(1)."""
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return _typed(name, field, value, int)
+
+
+class Scenario:
+    """
+    One simulation variant; None means "use the main.py default".
+
+    Fields:
+      - name: label shown in result tables
+      - truck_speed: miles per hour
+      - departures: list of earliest departure datetimes, one per truck
+      - drivers: drivers available at the hub
+      - assignment: "auto", "manual" or dict truck number -> package id list
+      - delays: dict package id -> datetime the package reaches the hub
+        (None = not delayed), replacing the notes' delayed-until times
+      - optimizer: True/False to force the route optimizer on or off, or
+        "exact" for exact per-truck tours (exact_routes.py)
+      - time_windows: True/False to force deadline time-window routing
+    """
+
+    def __init__(self, name="baseline", truck_speed=None, departures=None, drivers=None,
+                 assignment=None, delays=None, optimizer=None, time_windows=None):
+        self.name = name
+        self.truck_speed = truck_speed
+        self.departures = departures
+        self.drivers = drivers
+        self.assignment = assignment
+        self.delays = delays
+        self.optimizer = optimizer
+        self.time_windows = time_windows
+
+    def setting(self, field, default):
+        """Return the scenario's value for field, or default when unset. O(1)."""
+        value = getattr(self, field)
+        return default if value is None else value
+
+    @classmethod
+    def from_dict(cls, data, day):
+        """
+        Build a Scenario from one parsed JSON object.
+
+        Process: convert HH:MM strings to datetimes on day and string keys
+        (JSON objects only have string keys) to package/truck numbers.
+        Flow: raises ValueError on an unknown field or malformed value.
+        Complexity: O(d), d = listed delays/assignments.
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"Scenario must be an object, not {type(data).__name__}")
+        known = {"name", "truck_speed", "departures", "drivers", "assignment", "delays", "optimizer",
+                 "time_windows"}
+        scenario = cls(name=str(data.get("name", "scenario")))
+        name = scenario.name
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"{name}: unknown scenario field(s): {', '.join(sorted(unknown))}")
+        if data.get("truck_speed") is not None:
+            scenario.truck_speed = float(_typed(name, "truck_speed", data["truck_speed"], (int, float)))
+            if scenario.truck_speed <= 0:
+                raise ValueError(f"{name}: truck_speed must be positive")
+        if data.get("departures") is not None:
+            departures = _typed(name, "departures", data["departures"], list)
+            scenario.departures = [_time(name, "departures", t, day) for t in departures]
+        if data.get("drivers") is not None:
+            scenario.drivers = _typed(name, "drivers", data["drivers"], int)
+
+        assignment = data.get("assignment")
+        if isinstance(assignment, dict):
+            scenario.assignment = {
+                _number(name, "assignment", num): [_number(name, "assignment", pid)
+                                                   for pid in _typed(name, "assignment", ids, list)]
+                for num, ids in assignment.items()
+            }
+        elif assignment is not None:
+            if assignment not in ASSIGNMENT_MODES:
+                raise ValueError(f"{name}: assignment must be one of {ASSIGNMENT_MODES} or a mapping")
+            scenario.assignment = assignment
+
+        if data.get("delays") is not None:
+            if not isinstance(data["delays"], dict):
+                raise ValueError(f"{name}: delays must map package ids to HH:MM times or null")
+            scenario.delays = {
+                _number(name, "delays", pid): None if at is None else _time(name, "delays", at, day)
+                for pid, at in data["delays"].items()
+            }
+        optimizer = data.get("optimizer")
+        if optimizer == "exact":
+            scenario.optimizer = optimizer
+        elif optimizer is not None:
+            if not isinstance(optimizer, bool):
+                raise ValueError(f"{name}: optimizer must be true, false or \"exact\"")
+            scenario.optimizer = optimizer
+        if data.get("time_windows") is not None:
+            scenario.time_windows = _typed(name, "time_windows", data["time_windows"], bool)
+        return scenario
+
+
+def load_scenarios(path, day):
+    """
+    Read a JSON scenario file and return its list of Scenario objects.
+
+    Flow: raises ValueError for a malformed file or scenario (json's
+    JSONDecodeError is a ValueError).
+    Complexity: O(file size).
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("scenarios", [])
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a list of scenarios")
+    return [Scenario.from_dict(entry, day) for entry in data]
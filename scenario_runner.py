@@ -0,0 +1,177 @@
+"""Batch Scenario Runner for WGUPS Simulator
+
+Process:
+  - Run many Scenario variants of the full delivery day in parallel with a
+    concurrent.futures.ProcessPoolExecutor and summarize each one: total
+    mileage, on-time rate and each truck's finish time.
+
+Flow:
+  - run_scenarios() loads the input data once in the parent before the pool
+    starts. With the "fork" start method the workers inherit main.py's
+    LoaderCache (parsed packages and the DistanceMatrix) copy-on-write, so
+    only the small Scenario objects are pickled per task. Where fork is not
+    available each worker loads the data once in its initializer (from the
+    compiled matrix file), never once per task.
+  - Every worker calls main.simulate_truck_deliveries() to END_OF_DAY with a
+    DeliveryTimeline recorder and reads the results from that log.
+  - A scenario that cannot be simulated (e.g. its trucks lack capacity)
+    reports its error in the table instead of stopping the batch.
+
+CLI (run from the project root):
+    python scenario_runner.py scenarios.json [--workers N]
+
+Complexity:
+  - One full-day simulation per scenario, spread across the workers.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from timeline import DeliveryTimeline
+from scenario import load_scenarios
+import multiprocessing
+import argparse
+import os
+import sys
+import main
+
+
+class ScenarioResult:
+    """
+    Summary of one simulated scenario.
+
+    Fields:
+      - name: scenario name
+      - total_miles: fleet mileage at end of day
+      - truck_miles: each truck's mileage at end of day
+      - packages / on_time: package count and packages delivered by deadline
+      - late_ids / undelivered_ids: sorted package ids
+      - finish_times: per truck, the time it was back at the hub (None if never)
+      - error: message when the scenario failed, otherwise None
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.total_miles = 0.0
+        self.truck_miles = []
+        self.packages = 0
+        self.on_time = 0
+        self.late_ids = []
+        self.undelivered_ids = []
+        self.finish_times = []
+        self.error = None
+
+    @property
+    def on_time_rate(self):
+        """Share of all packages delivered by their deadline. O(1)."""
+        return self.on_time / self.packages if self.packages else 0.0
+
+
+def run_scenario(scenario):
+    """
+    Simulate one scenario for the whole day and summarize it.
+
+    Complexity: one simulate_truck_deliveries() run plus O(n) to summarize.
+    """
+    result = ScenarioResult(scenario.name)
+    timeline = DeliveryTimeline()
+    try:
+        packages = main.simulate_truck_deliveries(main.END_OF_DAY, recorder=timeline,
+                                                  verbose=False, scenario=scenario)
+    except ValueError as exc:
+        result.error = str(exc)
+        return result
+
+    _, trucks = timeline.finalize().snapshot(main.END_OF_DAY)
+    for truck in trucks:
+        result.truck_miles.append(truck.miles_traveled_today)
+        result.total_miles += truck.miles_traveled_today
+    result.finish_times = [log.return_time for log in timeline.trucks]
+
+    result.packages = len(packages)
+    for pid, package in sorted(packages.items()):
+        delivered = getattr(package, "delivery_time", None)
+        if delivered is None:
+            result.undelivered_ids.append(pid)
+            continue
+        due = main._deadline_time(package, main.SIMULATION_DAY)
+        if due is not None and delivered > due:
+            result.late_ids.append(pid)
+        else:
+            result.on_time += 1
+    return result
+
+
+def _init_worker():
+    """Load the input data once per worker (a no-op when inherited by fork)."""
+    main.load_input_data()
+
+
+def _pool_context():
+    """Prefer fork so workers share the parent's loaded data. O(1)."""
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def run_scenarios(scenarios, workers=None):
+    """
+    Run scenarios across a process pool and return results in input order.
+
+    Flow: a single scenario or workers=1 runs in-process without a pool;
+    large batches are handed to the workers in chunks to limit IPC.
+    Complexity: O(s) simulations over min(workers, s) processes.
+    """
+    scenarios = list(scenarios)
+    main.load_input_data()
+    workers = min(workers or os.cpu_count() or 1, max(1, len(scenarios)))
+    if workers == 1:
+        return [run_scenario(scenario) for scenario in scenarios]
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(),
+                             initializer=_init_worker) as pool:
+        return list(pool.map(run_scenario, scenarios, chunksize=max(1, len(scenarios) // (workers * 4))))
+
+
+def format_table(results):
+    """
+    Render results as a fixed-width text table, one row per scenario.
+
+    Complexity: O(s·t) for s scenarios and t trucks.
+    """
+    truck_count = max((len(r.finish_times) for r in results), default=0)
+    name_width = max([len("Scenario")] + [len(r.name) for r in results])
+    header = f"{'Scenario':<{name_width}} | {'Miles':>7} | {'On-time':>7} | {'Late':>4} | {'Undel':>5}"
+    for num in range(1, truck_count + 1):
+        header += f" | {'T' + str(num) + ' done':>7}"
+    lines = [header, "-" * len(header)]
+
+    for r in results:
+        if r.error is not None:
+            lines.append(f"{r.name:<{name_width}} | ERROR: {r.error}")
+            continue
+        line = (f"{r.name:<{name_width}} | {r.total_miles:>7.1f} | {r.on_time_rate:>7.1%}"
+                f" | {len(r.late_ids):>4} | {len(r.undelivered_ids):>5}")
+        for num in range(truck_count):
+            finish = r.finish_times[num] if num < len(r.finish_times) else None
+            line += f" | {finish.strftime('%H:%M') if finish is not None else '-':>7}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def run(argv=None):
+    """Command-line entry point: run a scenario file and print the table."""
+    parser = argparse.ArgumentParser(description="Run WGUPS what-if scenarios in parallel.")
+    parser.add_argument("scenario_file", help="JSON file with a list of scenario definitions")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU core)")
+    args = parser.parse_args(argv)
+
+    try:
+        scenarios = load_scenarios(args.scenario_file, main.SIMULATION_DAY)
+    except (OSError, ValueError) as exc:
+        print(f"Could not read scenarios: {exc}", file=sys.stderr)
+        return 2
+    print(format_table(run_scenarios(scenarios, args.workers)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
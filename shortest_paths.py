@@ -0,0 +1,241 @@
+"""All-Pairs Shortest Paths for WGUPS Simulator
+
+Process:
+  - Turn road-network distance data into the complete, metric distance table
+    the routing helpers expect: every pair of addresses gets the length of
+    the shortest road path between them.
+  - Two inputs are accepted: a distance matrix with gaps (a pair missing in
+    both directions has no direct road) and an edge list CSV
+        from,to,miles
+    where each line is one two-way road segment. Parallel segments keep the
+    shortest; addresses get rows in order of first appearance.
+  - Two solvers:
+      * Floyd-Warshall vectorized over NumPy: one n x n minimum per
+        intermediate node. Best for small or dense graphs.
+      * Dijkstra from every source with a binary heap (heapq) over adjacency
+        lists. Best for large sparse graphs, and the fallback without NumPy.
+
+Flow:
+  - complete_distance_table() takes the (addresses, address_index,
+    distances) tuple returned by parse_distance_csv() and returns the same
+    shape with every cell filled; parse_edge_list_csv() builds that tuple
+    from an edge list.
+  - main.DISTANCE_INPUT selects the loader mode (load_distance_table()):
+    TABLE (complete matrix, used as is), SPARSE_TABLE or EDGE_LIST.
+    LoaderCache persists the completed table in a compiled file per mode,
+    so the shortest paths are only computed again when the CSV changes.
+  - A pair with no connecting path raises ValueError, so routing never sees
+    an infinite or missing distance.
+
+Complexity:
+  - Floyd-Warshall: O(n³) arithmetic in n NumPy passes, O(n²) memory.
+  - Dijkstra: O(n·(n + E) log n) for E road segments.
+"""
+from address_index import AddressIndex
+from heapq import heappop, heappush
+import csv
+import re
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+INF = float("inf")
+
+FLOYD_WARSHALL = "floyd-warshall"
+DIJKSTRA = "dijkstra"
+AUTO = "auto"
+METHODS = (AUTO, FLOYD_WARSHALL, DIJKSTRA)
+
+# Distance CSV layouts (main.DISTANCE_INPUT)
+TABLE = "table"
+SPARSE_TABLE = "sparse-table"
+EDGE_LIST = "edges"
+DISTANCE_INPUTS = (TABLE, SPARSE_TABLE, EDGE_LIST)
+
+# AUTO uses Floyd-Warshall up to this many addresses (when NumPy is present)
+FLOYD_WARSHALL_MAX_NODES = 1000
+# ...and beyond it only for graphs with at least this share of all pairs as edges
+DENSE_GRAPH_RATIO = 0.25
+
+
+def table_edges(distances):
+    """
+    Yield (i, j, miles) for every known cell of a distance matrix with gaps.
+
+    Flow: None, empty and NaN cells are gaps; the diagonal is skipped.
+    Complexity: O(n²).
+    """
+    for i, row in enumerate(distances):
+        for j, cell in enumerate(row):
+            if cell is not None and cell == cell and i != j:
+                yield i, j, float(cell)
+
+
+def parse_edge_list_csv(path):
+    """
+    Load an edge list CSV (from,to,miles) as a distance table with gaps.
+
+    Process: a first row whose miles column is not a number is a header.
+    Street names are cleaned like parse_distance_csv() (quotes and "(ZIP)"
+    removed). Each segment fills both directions, keeping the shortest.
+    Flow: returns (addresses, address_index, distances) with None for pairs
+    without a direct segment; raises ValueError for a malformed row.
+    Complexity: O(n² + E).
+    """
+    addresses = []
+    address_index = {}
+    edges = []
+
+    def row_of(raw):
+        clean = re.sub(r"\(\d{5}\)", "", raw.replace('"', "")).strip()
+        row = address_index.get(clean)
+        if row is None:
+            row = len(addresses)
+            address_index[clean] = row
+            addresses.append(clean)
+        return row
+
+    with open(path, newline="", encoding="utf-8") as f:
+        for line_number, row in enumerate(csv.reader(f), 1):
+            if not row or not "".join(row).strip():
+                continue
+            if len(row) < 3:
+                raise ValueError(f"{path}:{line_number}: expected from,to,miles")
+            try:
+                miles = float(row[2])
+            except ValueError:
+                if line_number == 1:
+                    continue
+                raise ValueError(f"{path}:{line_number}: bad distance {row[2]!r}") from None
+            if miles < 0:
+                raise ValueError(f"{path}:{line_number}: negative distance {miles}")
+            edges.append((row_of(row[0]), row_of(row[1]), miles))
+
+    n = len(addresses)
+    distances = [[None] * n for _ in range(n)]
+    for i in range(n):
+        distances[i][i] = 0.0
+    for i, j, miles in edges:
+        if i != j and (distances[i][j] is None or miles < distances[i][j]):
+            distances[i][j] = distances[j][i] = miles
+    return addresses, AddressIndex(addresses), distances
+
+
+def all_pairs_shortest_paths(n, edges, method=AUTO):
+    """
+    Return the n x n shortest-path distances (list of lists) over two-way edges.
+
+    Process: edges are (i, j, miles); each is usable in both directions.
+    Flow: method is one of METHODS; AUTO picks by size and density (see
+    module docstring). Unreachable pairs are INF.
+    Complexity: see module docstring.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown shortest-path method {method!r}; expected one of {', '.join(METHODS)}")
+    edges = list(edges)
+    if method == AUTO:
+        dense = len(edges) >= DENSE_GRAPH_RATIO * n * n
+        method = FLOYD_WARSHALL if np is not None and (n <= FLOYD_WARSHALL_MAX_NODES or dense) else DIJKSTRA
+    if method == FLOYD_WARSHALL:
+        return _floyd_warshall(n, edges)
+    return _dijkstra_all(n, edges)
+
+
+def _floyd_warshall(n, edges):
+    """
+    Floyd-Warshall over a NumPy matrix, one vectorized relaxation per node.
+
+    Process: D = min(D, D[:, k] + D[k, :]) for k = 0..n-1; the broadcast
+    sum is computed in place into a scratch buffer to avoid allocations.
+    Complexity: O(n³) arithmetic, n Python-level iterations.
+    """
+    if np is None:
+        raise RuntimeError("Floyd-Warshall needs NumPy; use the Dijkstra method instead")
+    d = np.full((n, n), INF)
+    np.fill_diagonal(d, 0.0)
+    if edges:
+        rows, cols, miles = (np.asarray(column) for column in zip(*edges))
+        np.minimum.at(d, (rows, cols), miles)
+        np.minimum.at(d, (cols, rows), miles)
+    scratch = np.empty_like(d)
+    for k in range(n):
+        np.add(d[:, k, None], d[k, None, :], out=scratch)
+        np.minimum(d, scratch, out=d)
+    return d.tolist()
+
+
+def _dijkstra_all(n, edges):
+    """
+    Dijkstra from every source with a binary heap.
+
+    Process: adjacency lists keep the shortest of parallel edges. Each run
+    settles nodes in distance order and skips stale heap entries.
+    Complexity: O(n·(n + E) log n).
+    """
+    best = [{} for _ in range(n)]
+    for i, j, miles in edges:
+        if i == j:
+            continue
+        if miles < best[i].get(j, INF):
+            best[i][j] = miles
+            best[j][i] = miles
+    adjacency = [list(neighbors.items()) for neighbors in best]
+
+    result = []
+    for source in range(n):
+        dist = [INF] * n
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            du, u = heappop(heap)
+            if du > dist[u]:
+                continue
+            for v, miles in adjacency[u]:
+                candidate = du + miles
+                if candidate < dist[v]:
+                    dist[v] = candidate
+                    heappush(heap, (candidate, v))
+        result.append(dist)
+    return result
+
+
+def complete_distance_table(table, method=AUTO):
+    """
+    Fill every gap of an (addresses, address_index, distances) table with
+    shortest-path distances.
+
+    Process: known cells become two-way edges (a pair given in both
+    directions keeps the shorter), then all pairs are solved. Known cells
+    that are longer than a path through other addresses are shortened too,
+    so the result obeys the triangle inequality.
+    Flow: raises ValueError naming an address pair that no path connects.
+    Complexity: see all_pairs_shortest_paths().
+    """
+    addresses, address_index, distances = table
+    n = len(addresses)
+    complete = all_pairs_shortest_paths(n, table_edges(distances), method)
+    for i, row in enumerate(complete):
+        if INF in row:
+            j = row.index(INF)
+            raise ValueError(f"No road path between {addresses[i]!r} and {addresses[j]!r}")
+    return addresses, address_index, complete
+
+
+def load_distance_table(path, mode, table_parser, method=AUTO):
+    """
+    Load a distance CSV in one of DISTANCE_INPUTS.
+
+    Flow: TABLE returns table_parser(path) unchanged (the original complete
+    matrix); SPARSE_TABLE completes that matrix with shortest paths;
+    EDGE_LIST reads an edge list and completes it.
+    Complexity: parsing plus the shortest-path solve for the graph modes.
+    """
+    if mode == TABLE:
+        return table_parser(path)
+    if mode == SPARSE_TABLE:
+        return complete_distance_table(table_parser(path), method)
+    if mode == EDGE_LIST:
+        return complete_distance_table(parse_edge_list_csv(path), method)
+    raise ValueError(f"Unknown distance input {mode!r}; expected one of {', '.join(DISTANCE_INPUTS)}")
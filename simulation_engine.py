@@ -0,0 +1,561 @@
+"""Discrete-Event Simulation Core for WGUPS Simulator
+
+Process:
+  - Drive any number of trucks and drivers from one time-ordered event heap
+    instead of one hand-written while-loop per truck.
+  - Events: a truck's scheduled departure, a truck reaching a stop (and
+    choosing its next leg), a driver returning to the hub, a delayed package
+    arriving at the hub, an address correction becoming known, a streamed
+    package being ingested and a route event (route_repair.RouteEvent).
+
+Flow:
+  - The caller builds the simulation with loaded trucks, schedules package
+    arrivals and address corrections, then calls run().
+  - A truck is dispatched once it is scheduled to leave, every package on it
+    has arrived/been corrected and a driver is free at the hub.
+  - Stop selection is delegated to on_dispatch(truck), which returns a
+    function yielding (package, distance) for the truck's next leg, so the
+    nearest-neighbor and optimized-route strategies plug in unchanged.
+  - Events after end_time are never processed. A leg that starts before
+    end_time but arrives after it is driven partially, as the original
+    per-truck loops did.
+  - add_package_stream() feeds packages in during the day: each one is added
+    to the live package store and loaded onto the truck that is (or will
+    next be) at the hub with room, honoring "Can only be on truck N" notes.
+    A truck that has returned goes out again once it has packages; if every
+    truck is out and full the package waits in a backlog for the next one.
+  - With profiling.ACTIVE set, route planning (on_dispatch) and next-stop
+    selection are timed and every truck's delivery legs are counted.
+  - apply_route_event() repairs a truck's remaining route in place when an
+    address changes, a package is delayed or a truck breaks down during the
+    day (see route_repair.py). Delayed packages and a broken-down truck's
+    load go back through ingestion, so they end up on a hub-bound truck.
+
+Complexity:
+  - O(E log E) for E events (one per delivery leg plus a few per truck and
+    per delayed/corrected package).
+  - Ingest: O(log E + t) per streamed package for t trucks; the stream is
+    pulled one record at a time, so at most one pending record is held.
+  - Route repair: O(k) for the k stops left on the affected truck (O(k²)
+    once for a nearest-neighbor truck's first repair).
+"""
+from Enums.package_status import PackageStatus
+from address import Address
+from truck import Truck
+from truck_assignment import parse_package_notes
+from route_repair import RouteChange, RoutePlan, ADDRESS_CHANGED, PACKAGE_DELAYED
+from collections import deque
+from datetime import timedelta
+import heapq
+import profiling
+import time
+
+# Event kinds; the value breaks ties between events at the same time
+# (a package ingested at a truck's departure time still makes that trip)
+PACKAGE_INGESTED = 0
+TRUCK_SCHEDULED = 1
+PACKAGE_AVAILABLE = 2
+ADDRESS_CORRECTION = 3
+DRIVER_RETURNED = 4
+ROUTE_EVENT = 5
+TRUCK_AT_STOP = 6
+
+# Truck states; a truck is only loaded with streamed packages while not OUT
+WAITING = 0     # at the hub, waiting to be dispatched
+OUT = 1         # delivering
+RETURNING = 2   # empty, driving back to the hub
+IDLE = 3        # back at the hub with nothing to deliver
+BROKEN = 4      # broken down; never dispatched again
+
+
+class DeliverySimulation:
+    """
+    Heap-based event loop over a fleet of trucks.
+
+    Fields:
+      - trucks: loaded Truck objects; truck number = position + 1
+      - drivers: number of drivers initially free at the hub
+      - end_time: snapshot time the simulation stops at
+      - unroutable: streamed packages whose street is not in the distance
+        table; they are stored but never loaded
+      - stranded: packages whose "Can only be on truck N" note names a
+        truck that has broken down (or is not in the fleet); they are
+        never loaded again
+      - route_changes: RouteChange for every route event, in time order
+    """
+
+    def __init__(self, trucks, address_index, distances, end_time, speed,
+                 drivers, on_dispatch, recorder=None, hub="HUB"):
+        self.trucks = list(trucks)
+        self.address_index = address_index
+        self.distances = distances
+        self.end_time = end_time
+        self.speed = speed
+        self.free_drivers = drivers
+        self.on_dispatch = on_dispatch
+        self.recorder = recorder
+        self.hub = hub
+        self._events = []
+        self._seq = 0
+        # truck position -> outstanding package arrivals/corrections
+        self._blockers = [0] * len(self.trucks)
+        # package id -> its outstanding arrivals/corrections
+        self._pending = {}
+        self._scheduled = [False] * len(self.trucks)
+        self._waiting = list(range(len(self.trucks)))
+        self._selectors = {}
+        self._truck_of = {}
+        self._state = [WAITING] * len(self.trucks)
+        self._stream = None
+        self._store = None
+        self._backlog = deque()
+        self.unroutable = []
+        self.stranded = []
+        self.route_changes = []
+        # ids of packages on a partially driven final leg (already "in flight")
+        self._in_flight = set()
+        # package id -> status to restore when a route-delayed package is back
+        self._held_status = {}
+        for t, truck in enumerate(self.trucks):
+            for pkg in truck.get_packages():
+                self._truck_of[pkg.id] = t
+            self._push(truck.departure_time, TRUCK_SCHEDULED, t)
+
+    def _push(self, time, kind, payload):
+        """Schedule an event. Complexity: O(log E)."""
+        self._seq += 1
+        heapq.heappush(self._events, (time, kind, self._seq, payload))
+
+    def add_package_arrival(self, time, package):
+        """A delayed package reaches the hub at time; its truck waits for it."""
+        self._block(package)
+        self._push(time, PACKAGE_AVAILABLE, package)
+
+    def add_address_correction(self, time, package, street, city, zip_code):
+        """The correct address of package becomes known at time."""
+        self._block(package)
+        self._push(time, ADDRESS_CORRECTION, (package, street, city, zip_code))
+
+    def add_package_stream(self, records, store=None):
+        """
+        Ingest (arrival_time, Package) records while the day runs.
+
+        Flow: the next record is pulled only after the previous one has been
+        ingested, so lazy sources (pipes, tailed files) are read as the
+        simulated clock reaches them. Packages are added to `store` (the
+        live package map) when given.
+        Complexity: O(1) now; O(log E + t) per record during run().
+        """
+        self._stream = iter(records)
+        self._store = store
+        self._pull_stream(None)
+
+    def _pull_stream(self, now):
+        """Schedule the stream's next record; a late record arrives now. O(log E)."""
+        record = next(self._stream, None)
+        if record is None:
+            self._stream = None
+            return
+        arrival, package = record
+        if now is not None and arrival < now:
+            arrival = now
+        self._push(arrival, PACKAGE_INGESTED, (package, True))
+
+    def _ingest(self, package, now, new=True):
+        """
+        Add a streamed package to the store and load it onto a hub-bound truck.
+
+        Process: among trucks that are not out delivering and have room (and
+        match a truck-only note), take the one available at the hub soonest,
+        ties to the lowest truck number. An idle truck is queued for dispatch
+        again; otherwise the package joins the backlog.
+        Flow: new=False re-loads a package that was taken off a truck by a
+        route event; it is already in the store. Raises ValueError for a
+        streamed package whose id is already in the store.
+        Complexity: O(t) plus an amortized O(1) store insert.
+        """
+        if new:
+            if self._store is not None:
+                if self._store.get(package.id) is not None:
+                    raise ValueError(
+                        f"stream package {package.id} (ingested at {now:%H:%M}) reuses a known package id"
+                    )
+                self._store.add(package.id, package)
+                package = self._store.get(package.id)
+            if self.recorder is not None:
+                self.recorder.record_ingest(package, now)
+        else:
+            package.package_status = self._held_status.pop(package.id, package.package_status)
+        package.address_row = self.address_index.get(package.address.street)
+        if package.address_row is None:
+            self.unroutable.append(package)
+            return
+
+        only = parse_package_notes(package.notes, now).truck_only
+        if only is not None and (not 0 < only <= len(self.trucks) or self._state[only - 1] == BROKEN):
+            self.stranded.append(package)
+            return
+        best = None
+        for t, truck in enumerate(self.trucks):
+            if self._state[t] in (OUT, BROKEN) or len(truck.get_packages()) >= Truck.MAX_PACKAGES:
+                continue
+            if only is not None and only != t + 1:
+                continue
+            ready = max(truck.departure_time, now)
+            if best is None or ready < best[0]:
+                best = (ready, t)
+        if best is None:
+            self._backlog.append(package)
+            return
+        self._load(best[1], package, now)
+
+    def _load(self, t, package, now):
+        """Put a streamed package on truck t; requeue it if idle. O(w)."""
+        truck = self.trucks[t]
+        truck.add_package(package)
+        package.assigned_truck_number = t + 1
+        self._truck_of[package.id] = t
+        if self.recorder is not None:
+            self.recorder.record_load(truck, package, now)
+        if self._state[t] == IDLE:
+            self._requeue(t)
+
+    def _requeue(self, t):
+        """Put a truck back in the dispatch queue (kept in truck order). O(w)."""
+        self._state[t] = WAITING
+        self._waiting.append(t)
+        self._waiting.sort()
+
+    def _fill_from_backlog(self, t, now):
+        """
+        Load backlogged packages that may ride on truck t, oldest first, until
+        it is full.
+
+        Complexity: O(loaded + skipped) packages.
+        """
+        truck = self.trucks[t]
+        skipped = []
+        while self._backlog and len(truck.get_packages()) < Truck.MAX_PACKAGES:
+            package = self._backlog.popleft()
+            if parse_package_notes(package.notes, now).truck_only in (None, t + 1):
+                self._load(t, package, now)
+            else:
+                skipped.append(package)
+        self._backlog.extendleft(reversed(skipped))
+
+    def add_route_event(self, time, event):
+        """Apply a route_repair.RouteEvent when the clock reaches time. O(log E)."""
+        self._push(time, ROUTE_EVENT, event)
+
+    def apply_route_event(self, event, now):
+        """
+        Repair the affected truck's remaining route for event at `now`.
+
+        Process:
+          - Address changed: take the package out of its truck's plan, update
+            its address and insert it again at the cheapest position.
+          - Package delayed: take it off its truck and re-ingest it when it
+            is back at the hub (event.until).
+          - Truck broken down: the truck stops where it is for the rest of
+            the day and its remaining packages are re-ingested at once.
+        Flow: only a truck that is out delivering has a plan to repair; for a
+        truck still at the hub the change is made before its route is
+        planned. The package on the leg being driven cannot be rerouted.
+        Returns the RouteChange, which is also kept in route_changes.
+        Complexity: O(k) for the affected truck's k remaining stops.
+        """
+        started = time.perf_counter()
+        change = RouteChange(now, event)
+        if event.kind == ADDRESS_CHANGED:
+            self._change_address(event, change, now)
+        elif event.kind == PACKAGE_DELAYED:
+            self._delay_package(event, change, now)
+        else:
+            self._break_down(event, change, now)
+        change.elapsed_ms = (time.perf_counter() - started) * 1000.0
+        self.route_changes.append(change)
+        if self.recorder is not None:
+            self.recorder.record_route_change(change)
+        return change
+
+    def _plan(self, t):
+        """
+        Return truck t's RoutePlan, making a nearest-neighbor route explicit.
+
+        Complexity: O(1), or O(k²) the first time for a nearest-neighbor truck.
+        """
+        selector = self._selectors.get(t)
+        if not isinstance(selector, RoutePlan):
+            truck = self.trucks[t]
+            selector = RoutePlan.nearest_neighbor(
+                [p for p in truck.get_packages() if p.id not in self._in_flight],
+                self.address_index[truck.current_address],
+                self.address_index[self.hub],
+                self.distances,
+            )
+            self._selectors[t] = selector
+        return selector
+
+    def _find_loaded(self, package_id):
+        """Return (truck position, package) for an undelivered loaded package, or (None, None). O(k)."""
+        t = self._truck_of.get(package_id)
+        if t is None or package_id in self._in_flight:
+            return None, None
+        for package in self.trucks[t].get_packages():
+            if package.id == package_id:
+                return t, package
+        return None, None
+
+    def _change_address(self, event, change, now):
+        """Move one stop of a route to the package's new address. O(k)."""
+        row = self.address_index.get(event.street)
+        if row is None:
+            change.message = f"unknown address {event.street!r}"
+            return
+        t, package = self._find_loaded(event.package_id)
+        if package is None:
+            change.message = "package is not waiting on a truck"
+            return
+        change.truck_number = t + 1
+        plan = self._plan(t) if self._state[t] == OUT else None
+        if plan is not None:
+            change.miles_before = plan.remaining_miles()
+            plan.remove(package)
+        if self.recorder is not None:
+            self.recorder.record_address_correction(package, now)
+        package.address = Address(event.street, event.city or package.address.city,
+                                  package.address.state, event.zip_code or package.address.zip_code)
+        package.address_row = row
+        if plan is not None:
+            plan.insert(package)
+            change.miles_after = plan.remaining_miles()
+        change.applied = True
+
+    def _delay_package(self, event, change, now):
+        """Take a package off its truck until event.until. O(k)."""
+        t, package = self._find_loaded(event.package_id)
+        if package is None:
+            change.message = "package is not waiting on a truck"
+            return
+        change.truck_number = t + 1
+        plan = self._plan(t) if self._state[t] == OUT else None
+        if plan is not None:
+            change.miles_before = plan.remaining_miles()
+            plan.remove(package)
+            change.miles_after = plan.remaining_miles()
+        self._unload(t, package, now, event.until)
+        self._held_status[package.id] = package.package_status
+        package.package_status = PackageStatus.DELAYED
+        self._push(max(now, event.until), PACKAGE_INGESTED, (package, False))
+        change.applied = True
+
+    def _break_down(self, event, change, now):
+        """
+        Take truck event.truck_number out of service and re-ingest its load.
+
+        Flow: packages that may only ride on this truck (on it or in the
+        backlog) cannot be delivered any more; they are moved to stranded
+        and listed on the RouteChange instead of waiting forever.
+        Complexity: O(k + b) for k packages on the truck and b backlogged.
+        """
+        t = event.truck_number - 1
+        if not 0 <= t < len(self.trucks) or self._state[t] == BROKEN:
+            change.message = "no such truck in service"
+            return
+        change.truck_number = t + 1
+        truck = self.trucks[t]
+        if self._state[t] == OUT:
+            change.miles_before = self._plan(t).remaining_miles()
+            self._selectors[t] = RoutePlan([], 0, 0, self.distances)
+        elif self._state[t] == WAITING:
+            self._waiting.remove(t)
+        self._state[t] = BROKEN
+        for package in list(truck.get_packages()):
+            if package.id in self._in_flight:
+                continue
+            self._unload(t, package, now, now)
+            if parse_package_notes(package.notes, now).truck_only == t + 1:
+                self._strand(package, change)
+            else:
+                self._push(now, PACKAGE_INGESTED, (package, False))
+        kept = deque()
+        for package in self._backlog:
+            if parse_package_notes(package.notes, now).truck_only == t + 1:
+                self._strand(package, change)
+            else:
+                kept.append(package)
+        self._backlog = kept
+        change.applied = True
+
+    def _strand(self, package, change):
+        """Record package as undeliverable by change. O(1)."""
+        self.stranded.append(package)
+        change.stranded.append(package.id)
+
+    def _unload(self, t, package, now, until):
+        """Take package off truck t (it is back at the hub at until). O(k)."""
+        truck = self.trucks[t]
+        truck.get_packages().remove(package)
+        package.assigned_truck_number = None
+        del self._truck_of[package.id]
+        # The truck no longer waits for this package's arrival/correction
+        self._blockers[t] -= self._pending.pop(package.id, 0)
+        if self.recorder is not None:
+            self.recorder.record_unload(truck, package, now, until)
+
+    def _block(self, package):
+        t = self._truck_of.get(package.id)
+        if t is not None:
+            self._blockers[t] += 1
+            self._pending[package.id] = self._pending.get(package.id, 0) + 1
+
+    def _unblock(self, package):
+        t = self._truck_of.get(package.id)
+        if t is not None and self._pending.get(package.id):
+            self._blockers[t] -= 1
+            self._pending[package.id] -= 1
+
+    def run(self):
+        """
+        Process events in time order up to end_time.
+
+        Complexity: O(E log E).
+        """
+        while self._events and self._events[0][0] <= self.end_time:
+            now, kind, _, payload = heapq.heappop(self._events)
+            if kind == TRUCK_AT_STOP:
+                self._drive_leg(payload, now)
+                continue
+            if kind == TRUCK_SCHEDULED:
+                self._scheduled[payload] = True
+            elif kind == PACKAGE_AVAILABLE:
+                self._unblock(payload)
+            elif kind == ADDRESS_CORRECTION:
+                package, street, city, zip_code = payload
+                if self.recorder is not None:
+                    self.recorder.record_address_correction(package, now)
+                package.address = Address(street, city, package.address.state, zip_code)
+                package.address_row = self.address_index.get(street)
+                self._unblock(package)
+            elif kind == DRIVER_RETURNED:
+                self.free_drivers += 1
+                if self._state[payload] != BROKEN:
+                    if self.trucks[payload].get_packages():
+                        self._requeue(payload)
+                    else:
+                        self._state[payload] = IDLE
+            elif kind == ROUTE_EVENT:
+                self.apply_route_event(payload, now)
+            elif kind == PACKAGE_INGESTED:
+                package, new = payload
+                self._ingest(package, now, new)
+                if new:
+                    self._pull_stream(now)
+                # Load every package arriving this minute before a truck leaves
+                if self._events and self._events[0][0] == now and self._events[0][1] == PACKAGE_INGESTED:
+                    continue
+            self._dispatch(now)
+        return self.trucks
+
+    def _dispatch(self, now):
+        """
+        Send out waiting trucks (in truck order) that are ready and have a driver.
+
+        Complexity: O(w) for w waiting trucks.
+        """
+        if self.free_drivers <= 0:
+            return
+        still_waiting = []
+        for t in self._waiting:
+            if (self.free_drivers > 0 and self._scheduled[t] and self._blockers[t] == 0
+                    and self.trucks[t].get_packages()):
+                self.free_drivers -= 1
+                truck = self.trucks[t]
+                truck.departure_time = now
+                truck.is_in_use = True
+                self._state[t] = OUT
+                with profiling.span("route_planning"):
+                    self._selectors[t] = self.on_dispatch(truck)
+                self._push(now, TRUCK_AT_STOP, t)
+            else:
+                still_waiting.append(t)
+        self._waiting = still_waiting
+
+    def _drive_leg(self, t, now):
+        """
+        The truck is free at its current stop at `now`; start its next leg.
+
+        Process:
+          - When the truck is empty (it has reached its last stop), add the
+            trip back to the hub and free its driver at the return time;
+            backlogged streamed packages are loaded for its next trip.
+          - Stop if the snapshot time has been reached.
+          - Pick the next package; if the leg ends by end_time deliver it and
+            schedule the truck's arrival there, otherwise drive it partially
+            and stop. A truck stays OUT until it reaches its last stop, so a
+            run cut off mid-leg makes the same loading decisions as the full
+            day.
+        Complexity: O(log E) plus the selector's cost.
+        """
+        if self._state[t] == BROKEN:
+            return
+        truck = self.trucks[t]
+        if not truck.get_packages():
+            # Last stop reached (or route events emptied the truck)
+            self._return_to_hub(t, now)
+            return
+        if now >= self.end_time:
+            return
+        metrics = profiling.ACTIVE
+        if metrics is None:
+            package, distance = self._selectors[t]()
+        else:
+            start = time.perf_counter()
+            package, distance = self._selectors[t]()
+            metrics.add_time("select_next_stop", start, time.perf_counter())
+            metrics.count(f"truck{t + 1}.legs")
+        if package is None:
+            return
+
+        leg_duration = timedelta(minutes=(distance / self.speed) * 60.0)
+        arrival_time = now + leg_duration
+
+        # Partial leg: cannot finish before end_time -> advance partially and mark en route
+        if arrival_time > self.end_time:
+            fraction = min(1.0, (self.end_time - now).total_seconds() / leg_duration.total_seconds())
+            truck.miles_traveled_today += distance * fraction
+            package.package_status = PackageStatus.EN_ROUTE
+            self._in_flight.add(package.id)
+            if package.load_time is None:
+                package.load_time = truck.departure_time
+            truck.departure_time = self.end_time
+            return
+
+        # Deliver: advance clock, update miles, set package metadata
+        truck.miles_traveled_today += distance
+        truck.current_address = package.address.street
+        package.package_status = PackageStatus.DELIVERED
+        package.delivery_time = arrival_time
+        if self.recorder is not None:
+            self.recorder.record_leg(truck, package, now, arrival_time, distance)
+        truck.get_packages().remove(package)
+        truck.departure_time = arrival_time
+        # Even after the last delivery the truck stays out until it gets there
+        self._push(arrival_time, TRUCK_AT_STOP, t)
+
+    def _return_to_hub(self, t, arrival_time):
+        """Truck t is empty at its last stop: drive back and free the driver. O(log E)."""
+        truck = self.trucks[t]
+        # Truck is empty: return to HUB and hand the driver back
+        return_dist = self.distances[self.address_index[truck.current_address]][self.address_index[self.hub]]
+        return_time = arrival_time + timedelta(minutes=(return_dist / self.speed) * 60.0)
+        truck.miles_traveled_today += return_dist
+        truck.current_address = self.hub
+        truck.departure_time = return_time
+        truck.is_in_use = False
+        self._state[t] = RETURNING
+        if self.recorder is not None:
+            self.recorder.record_return(truck, arrival_time, return_time, return_dist)
+        self._push(return_time, DRIVER_RETURNED, t)
+        if self._backlog:
+            self._fill_from_backlog(t, arrival_time)
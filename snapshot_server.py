@@ -0,0 +1,262 @@
+"""Async Snapshot Query Server for WGUPS Simulator
+
+Process:
+  - Load the CSVs and simulate the day once (main.py's shared
+    DeliveryTimeline), then answer package and truck status queries over
+    HTTP/JSON from that in-memory state:
+        GET /packages?at=HH:MM        every package at that time
+        GET /packages/{id}?at=HH:MM   one package
+        GET /trucks?at=HH:MM          every truck's location and mileage
+    `at` accepts the same values as `main.py --at` (military time or EOD).
+  - Records are main.py's --format json records, so dashboards see the
+    same fields as the command line.
+
+Flow:
+  - One asyncio event loop serves every connection (HTTP/1.1 keep-alive,
+    pipelined requests answered in order).
+  - A snapshot is rendered once per timestamp in a single worker thread and
+    kept in a small LRU of rendered bodies. Concurrent requests for a
+    timestamp that is being rendered await the same future (request
+    coalescing) instead of rendering it again.
+  - Responses are bytes built once per snapshot; a cached /packages or
+    /trucks answer is a dictionary lookup plus one socket write.
+
+CLI (run from the project root):
+    python snapshot_server.py [--host 127.0.0.1] [--port 8080] [--stream FILE]
+
+Complexity:
+  - Render: O(n + t log L) per distinct timestamp (DeliveryTimeline.snapshot).
+  - Cached request: O(1) plus the response size; /packages/{id} is O(1)
+    from the rendered snapshot.
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import asyncio
+import json
+import sys
+import main
+
+# Rendered snapshots (one per distinct timestamp) kept in memory
+SNAPSHOT_CACHE_SIZE = 64
+# Longest request header block accepted, in lines
+MAX_HEADER_LINES = 100
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class RenderedSnapshot:
+    """
+    Response bodies of one timestamp.
+
+    Fields:
+      - packages: JSON array of every package record (bytes)
+      - trucks: JSON array of every truck record (bytes)
+      - records: package id -> record dict, for /packages/{id}
+    """
+
+    __slots__ = ("packages", "trucks", "records")
+
+    def __init__(self, packages, trucks):
+        self.records = {pid: main._package_record(pkg) for pid, pkg in packages.items()}
+        self.packages = json.dumps(list(self.records.values())).encode("utf-8")
+        self.trucks = json.dumps(
+            [main._truck_record(truck, num) for num, truck in enumerate(trucks, 1)]
+        ).encode("utf-8")
+
+    def package(self, pid):
+        """Return the JSON body of one package, or None if it is unknown. O(1)."""
+        record = self.records.get(pid)
+        return None if record is None else json.dumps(record).encode("utf-8")
+
+
+class SnapshotServer:
+    """
+    Snapshot queries against one recorded day.
+
+    Fields:
+      - timeline: the finalized DeliveryTimeline being served
+      - cache_size: rendered snapshots kept (LRU)
+      - renders / hits / coalesced: how each snapshot lookup was answered
+    """
+
+    def __init__(self, timeline, cache_size=SNAPSHOT_CACHE_SIZE):
+        self.timeline = timeline
+        self.cache_size = int(cache_size)
+        self.renders = self.hits = self.coalesced = 0
+        self._cache = OrderedDict()
+        self._pending = {}
+        # One thread: renders never race on the timeline, and the loop keeps
+        # answering cached requests while one runs
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def _render(self, moment):
+        """Render the snapshot at moment (runs on the worker thread). O(n + t log L)."""
+        packages, trucks = self.timeline.snapshot(moment)
+        return RenderedSnapshot(packages, trucks)
+
+    async def snapshot(self, moment):
+        """
+        Return the RenderedSnapshot for moment.
+
+        Flow: LRU hit, else join an in-flight render of the same moment,
+        else start one on the worker thread.
+        Complexity: O(1) on a hit; one render per distinct moment otherwise.
+        """
+        rendered = self._cache.get(moment)
+        if rendered is not None:
+            self._cache.move_to_end(moment)
+            self.hits += 1
+            return rendered
+        pending = self._pending.get(moment)
+        if pending is not None:
+            self.coalesced += 1
+            return await pending
+        loop = asyncio.get_running_loop()
+        pending = self._pending[moment] = loop.run_in_executor(self._executor, self._render, moment)
+        try:
+            rendered = await pending
+        finally:
+            del self._pending[moment]
+        self.renders += 1
+        self._cache[moment] = rendered
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return rendered
+
+    async def respond(self, method, target):
+        """
+        Answer one request; return (status, JSON body bytes).
+
+        Complexity: O(1) plus snapshot() for a valid query.
+        """
+        if method != "GET":
+            return 405, _error(f"method {method} not allowed")
+        parts = urlsplit(target)
+        path = parts.path.rstrip("/").split("/")[1:]
+        kind = path[0] if path else None
+        if kind not in ("packages", "trucks") or len(path) > (2 if kind == "packages" else 1):
+            return 404, _error(f"unknown path {parts.path}")
+        pid = None
+        if len(path) == 2:
+            try:
+                pid = int(path[1])
+            except ValueError:
+                return 400, _error(f"invalid package id {path[1]!r}")
+        at = parse_qs(parts.query).get("at")
+        if not at:
+            return 400, _error("missing at=HH:MM (or at=EOD)")
+        try:
+            moment = main._parse_snapshot_time(at[-1])
+        except ValueError:
+            return 400, _error(f"invalid at value {at[-1]!r}; use HH:MM (e.g. 09:05) or EOD")
+
+        rendered = await self.snapshot(moment)
+        if kind == "trucks":
+            return 200, rendered.trucks
+        if pid is None:
+            return 200, rendered.packages
+        body = rendered.package(pid)
+        if body is None:
+            return 404, _error(f"package {pid} not found")
+        return 200, body
+
+    async def handle(self, reader, writer):
+        """
+        Serve one connection until the client closes it or asks to.
+
+        Process: read a request line and headers, answer, repeat
+        (HTTP/1.1 keep-alive; HTTP/1.0 closes unless asked to keep alive).
+        Request bodies are not read; only GET is served.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                fields = request_line.decode("latin-1").split()
+                if not fields:
+                    continue
+                keep_alive = len(fields) == 3 and fields[2] == "HTTP/1.1"
+                for _ in range(MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "connection":
+                        keep_alive = value.strip().lower() == "keep-alive"
+                if len(fields) != 3:
+                    status, body = 400, _error("malformed request line")
+                    keep_alive = False
+                else:
+                    status, body = await self.respond(fields[0], fields[1])
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """Start listening and return the asyncio.Server (port 0 picks a free one)."""
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self):
+        """Stop the render thread. O(1)."""
+        self._executor.shutdown(wait=False)
+
+
+def _error(message):
+    """Return a JSON error body. O(len(message))."""
+    return json.dumps({"error": message}).encode("utf-8")
+
+
+async def serve(host, port, timeline):
+    """Serve timeline on host:port until cancelled."""
+    server = SnapshotServer(timeline)
+    listener = await server.start(host, port)
+    for sock in listener.sockets:
+        address = sock.getsockname()
+        print(f"Serving snapshots on http://{address[0]}:{address[1]}/", file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def run(argv=None):
+    """Command-line entry point: simulate the day once and serve it."""
+    parser = argparse.ArgumentParser(description="Serve WGUPS package and truck snapshots over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on (default: 8080)")
+    parser.add_argument("--stream", metavar="FILE",
+                        help="ingest packages during the day from FILE, as main.py --stream")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.stream:
+            timeline = main.build_day_timeline(main.open_package_stream(args.stream, main.SIMULATION_DAY))
+        else:
+            timeline = main._day_timeline()
+    except (OSError, ValueError) as exc:
+        print(f"Could not simulate the day: {exc}", file=sys.stderr)
+        return 2
+    try:
+        asyncio.run(serve(args.host, args.port, timeline))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
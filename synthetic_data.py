@@ -0,0 +1,123 @@
+"""Synthetic Input Generator for WGUPS Simulator
+
+Process:
+  - Write package and distance CSV files in the same layout as the files in
+    "Input Files", at any size, for benchmarks and load tests.
+  - Addresses are random points in a square service area; distances are the
+    straight-line miles times a road factor, rounded to 0.1 like the real
+    table. Only the lower triangle is written, as in the real file.
+
+Flow:
+  - The first 27 addresses are the real WGUPS addresses (HUB first), so the
+    simulator's special cases (package 9's correction, packages 25/26) still
+    resolve. Further addresses are named "<n> Synthetic Way".
+  - generate_dataset() writes both files into a directory and returns their
+    paths; the output is deterministic for a given seed.
+
+Complexity:
+  - O(a²) for a addresses (the distance triangle), O(p) for p packages.
+"""
+import csv
+import math
+import os
+import random
+
+# Real WGUPS streets in distance-table order; HUB must be row 0
+BASE_ADDRESSES = [
+    "HUB", "1060 Dalton Ave S", "1330 2100 S", "1488 4800 S", "177 W Price Ave",
+    "195 W Oakland Ave", "2010 W 500 S", "2300 Parkway Blvd", "233 Canyon Rd",
+    "2530 S 500 E", "2600 Taylorsville Blvd", "2835 Main St", "300 State St",
+    "3060 Lester St", "3148 S 1100 W", "3365 S 900 W",
+    "3575 W Valley Central Station bus Loop", "3595 Main St", "380 W 2880 S",
+    "410 S State St", "4300 S 1300 E", "4580 S 2300 E", "5025 State St",
+    "5100 South 2700 West", "5383 S 900 East #104", "600 E 900 South",
+    "6351 South 900 East",
+]
+# Side of the square service area and straight-line to road miles factor
+AREA_MILES = 12.0
+ROAD_FACTOR = 1.25
+# Share of packages with a morning deadline / a delayed-flight note
+DEADLINE_SHARE = 0.10
+DELAYED_SHARE = 0.02
+DELAYED_NOTE = "Delayed on flight---will not arrive to depot until 9:05 am"
+
+
+def synthetic_addresses(count):
+    """Return `count` street names, starting with BASE_ADDRESSES. O(count)."""
+    names = BASE_ADDRESSES[:count]
+    names.extend(f"{n} Synthetic Way" for n in range(len(names), count))
+    return names
+
+
+def synthetic_zip(index):
+    """Return the zip code of the address at row index (fixed per address). O(1)."""
+    return str(84100 + index * 37 % 100)
+
+
+def generate_distances(path, address_count, seed=0):
+    """
+    Write a lower-triangular distance CSV with address_count addresses.
+
+    Process: one title row like the real file, then one row per address:
+    a place name, " street\\n(zip)" and the distances to every earlier
+    address followed by 0.0; the upper triangle is left blank.
+    Flow: returns the list of street names in row order.
+    Complexity: O(a²).
+    """
+    rng = random.Random(seed)
+    streets = synthetic_addresses(address_count)
+    points = [(rng.uniform(0, AREA_MILES), rng.uniform(0, AREA_MILES)) for _ in streets]
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["DISTANCE BETWEEN HUBS IN MILES", ""] + streets)
+        blank = [""] * address_count
+        for i, street in enumerate(streets):
+            xi, yi = points[i]
+            cells = [
+                f"{round(math.hypot(xi - xj, yi - yj) * ROAD_FACTOR, 1):.1f}"
+                for xj, yj in points[:i]
+            ]
+            cells.append("0.0")
+            label = f" {street}" if i == 0 else f" {street}\n({synthetic_zip(i)})"
+            writer.writerow([street, label] + cells + blank[i + 1:])
+    return streets
+
+
+def generate_packages(path, package_count, streets, seed=0):
+    """
+    Write a package CSV with package_count rows addressed to streets[1:].
+
+    Process: ids 1..n, a random non-hub street, morning (10:30 AM) deadlines
+    for DEADLINE_SHARE of packages, EOD otherwise, and the delayed-flight
+    note on DELAYED_SHARE of them.
+    Complexity: O(p).
+    """
+    rng = random.Random(seed + 1)
+    first = 1 if len(streets) > 1 else 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for pid in range(1, package_count + 1):
+            index = rng.randrange(first, len(streets))
+            deadline = "10:30 AM" if rng.random() < DEADLINE_SHARE else "EOD"
+            notes = DELAYED_NOTE if rng.random() < DELAYED_SHARE else ""
+            writer.writerow([pid, streets[index], "Salt Lake City", "UT",
+                             synthetic_zip(index), deadline,
+                             rng.randint(1, 90), notes])
+
+
+def generate_dataset(directory, package_count, address_count, seed=0):
+    """
+    Write a package file and a distance file into directory.
+
+    Flow: returns (package_path, distance_path).
+    Complexity: O(p + a²).
+    """
+    if address_count < 2:
+        raise ValueError("A dataset needs the hub and at least one delivery address")
+    os.makedirs(directory, exist_ok=True)
+    package_path = os.path.join(directory, f"packages_{package_count}.csv")
+    distance_path = os.path.join(directory, f"distances_{address_count}.csv")
+    streets = generate_distances(distance_path, address_count, seed)
+    generate_packages(package_path, package_count, streets, seed)
+    return package_path, distance_path
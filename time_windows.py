@@ -0,0 +1,306 @@
+"""Deadline-Aware Routing with Time Windows for WGUPS Simulator
+
+Process:
+  - Treat each package's deadline (Package.deadline_minutes, minutes after
+    midnight) as the end of its delivery window; the window opens when the
+    truck leaves. Packages sharing an address form one stop whose deadline
+    is the earliest of theirs.
+  - Build the truck's order by insertion: deadline stops tightest first,
+    then EOD stops farthest first. Each stop goes where it adds the fewest
+    miles without making it or any stop after it late. Two tie orders for
+    equal deadlines and the plain nearest-neighbor order are scored (late
+    packages, then minutes late, then miles) and the best is kept; stops
+    still late are then moved earlier wherever that lowers the score.
+  - Earliest-arrival bound: departure time plus the direct drive from the
+    truck's start. On a metric distance table no schedule reaches a stop
+    sooner, so a stop whose bound is already past its deadline is reported
+    as infeasible before any routing is done.
+  - The same bound prunes the position scan: arrivals only grow along the
+    route, so once "arrival at the previous stop + direct leg" is past the
+    deadline no later position can work either and the scan stops.
+
+Flow:
+  - plan_time_windows() returns a TimeWindowPlan: the package order, each
+    stop's planned arrival, the provably infeasible package ids and the ids
+    the heuristic could not fit on time.
+  - main.USE_TIME_WINDOWS routes every dispatched truck this way.
+
+Complexity:
+  - O(k²) for k stops: each insertion scans at most k + 1 positions with an
+    O(1) feasibility test (forward time slack), then refreshes the arrival
+    and slack arrays in O(k). The local k x k distance block is O(k²).
+  - Moving late stops is O(l·k²) for l late stops (each move scored in O(k)),
+    but the arrival bound ends each scan early and scoring stops as soon as
+    a candidate has more late packages than the best route.
+"""
+from bisect import bisect_left
+
+INF = float("inf")
+# Minutes of float rounding tolerated before an arrival counts as late
+EPSILON = 1e-6
+
+
+class TimeWindowPlan:
+    """
+    Result of plan_time_windows().
+
+    Fields:
+      - order: packages in driving order
+      - arrivals: planned arrival (minutes after midnight) per package
+      - infeasible: ids no schedule can deliver on time (arrival bound)
+      - late: ids the plan delivers late although the bound allowed it
+    """
+
+    def __init__(self, order, arrivals, infeasible, late):
+        self.order = order
+        self.arrivals = arrivals
+        self.infeasible = infeasible
+        self.late = late
+
+
+def clock_minutes(moment):
+    """Return a datetime's time of day as minutes after midnight. O(1)."""
+    return moment.hour * 60 + moment.minute + moment.second / 60.0 + moment.microsecond / 60e6
+
+
+def _local_matrix(rows, distances):
+    """
+    Return the distances between `rows` as a list of lists.
+
+    Flow: one DistanceMatrix.submatrix() gather when NumPy is available,
+    element lookups otherwise.
+    Complexity: O(k²).
+    """
+    submatrix = getattr(distances, "submatrix", None)
+    block = submatrix(rows) if submatrix is not None else None
+    if block is not None:
+        return block.tolist()
+    return [[float(distances[a][b]) for b in rows] for a in rows]
+
+
+def plan_time_windows(packages, start_row, hub_row, start_minutes, distances, speed):
+    """
+    Order packages so deadlines are met, using deadline-window insertion.
+
+    Process:
+      - Group packages by address row; local node 0 is the start, 1 the hub.
+      - Compute each stop's earliest arrival; stops past their deadline are
+        infeasible and scheduled last among what remains.
+      - Build the candidate orders, keep the best-scoring one and move its
+        late stops earlier where that helps (see module docstring).
+    Flow: packages without an address_row are left out, like the other
+    planners.
+    Complexity: O(k²) plus O(l·k²) for l late stops.
+    """
+    groups = {}
+    for package in packages:
+        if package.address_row is not None:
+            groups.setdefault(package.address_row, []).append(package)
+    rows = [start_row, hub_row] + list(groups)
+    windows = _Windows(_local_matrix(rows, distances), list(groups.values()), start_minutes, speed)
+    stops = range(2, len(rows))
+
+    # Earliest-arrival bound: straight from the start, no schedule is faster
+    earliest = windows.earliest
+    due = windows.due
+    infeasible_stops = {s for s in stops if earliest[s] > due[s] + EPSILON}
+    timed = [s for s in stops if due[s] < INF and s not in infeasible_stops]
+    other = sorted((s for s in stops if due[s] == INF), key=lambda s: -earliest[s])
+    doomed = sorted(infeasible_stops, key=lambda s: due[s])
+
+    candidates = [
+        windows.insertion(sorted(timed, key=lambda s: (due[s], earliest[s])) + other + doomed),
+        windows.insertion(sorted(timed, key=lambda s: (due[s], -earliest[s])) + other + doomed),
+        windows.nearest_neighbor(list(stops)),
+    ]
+    route = min(candidates, key=windows.score)
+    route = windows.move_late_stops(route)
+
+    arrival = windows.arrivals(route)
+    order = [package for s in route for package in windows.members[s]]
+    arrivals = [arrival[i] for i, s in enumerate(route) for _ in windows.members[s]]
+    infeasible = {p.id for s in infeasible_stops for p in windows.members[s]
+                  if p.deadline_minutes is not None and earliest[s] > p.deadline_minutes + EPSILON}
+    late = set()
+    for package, arrived in zip(order, arrivals):
+        if (package.deadline_minutes is not None and arrived > package.deadline_minutes + EPSILON
+                and package.id not in infeasible):
+            late.add(package.id)
+    return TimeWindowPlan(order, arrivals, infeasible, late)
+
+
+class _Windows:
+    """
+    Local routing state of one plan: nodes are 0 = start, 1 = hub, 2.. = stops.
+
+    Fields:
+      - d: local distance block; members: packages per node
+      - due: earliest deadline per node (INF for none); deadlines: sorted
+        package deadlines per node, for counting late packages
+      - earliest: direct-arrival bound per node
+    """
+
+    def __init__(self, d, groups, start_minutes, speed):
+        self.d = d
+        self.members = [[], []] + groups
+        self.deadlines = [sorted(p.deadline_minutes for p in members if p.deadline_minutes is not None)
+                          for members in self.members]
+        self.due = [dl[0] if dl else INF for dl in self.deadlines]
+        self.start = start_minutes
+        self.per_mile = 60.0 / speed
+        self.earliest = [start_minutes + d[0][s] * self.per_mile for s in range(len(d))]
+
+    def arrivals(self, route):
+        """Planned arrival (minutes) at each stop of route. O(k)."""
+        d, per_mile = self.d, self.per_mile
+        out = []
+        prev, clock = 0, self.start
+        for s in route:
+            clock += d[prev][s] * per_mile
+            out.append(clock)
+            prev = s
+        return out
+
+    def score(self, route, limit=None):
+        """
+        Return (late packages, minutes late, miles) for route; lower is better.
+
+        Flow: with `limit` (a score), returns None as soon as the route has
+        more late packages than limit, since it cannot beat it.
+        Complexity: O(k log m) for m packages per stop.
+        """
+        d, per_mile, due = self.d, self.per_mile, self.due
+        max_late = INF if limit is None else limit[0]
+        late = 0
+        lateness = 0.0
+        miles = 0.0
+        prev, clock = 0, self.start
+        for s in route:
+            leg = d[prev][s]
+            miles += leg
+            clock += leg * per_mile
+            if clock > due[s] + EPSILON:
+                missed = bisect_left(self.deadlines[s], clock - EPSILON)
+                late += missed
+                if late > max_late:
+                    return None
+                lateness += (clock - due[s]) * missed
+            prev = s
+        return late, round(lateness, 6), miles + d[prev][1]
+
+    def insertion(self, order):
+        """
+        Insert stops in `order`, each at its cheapest on-time position.
+
+        Complexity: O(k²).
+        """
+        route, arrival, slack = [], [], []
+        for s in order:
+            route.insert(self._best_position(s, route, arrival, slack), s)
+            self._refresh(route, arrival, slack)
+        return route
+
+    def nearest_neighbor(self, stops):
+        """Return stops in nearest-neighbor order from the start. O(k²)."""
+        d = self.d
+        remaining = list(stops)
+        route = []
+        prev = 0
+        while remaining:
+            best = min(range(len(remaining)), key=lambda k: d[prev][remaining[k]])
+            prev = remaining.pop(best)
+            route.append(prev)
+        return route
+
+    def move_late_stops(self, route):
+        """
+        Move late stops earlier wherever that lowers the score.
+
+        Process: for each late stop, try the earlier positions it could reach
+        on time; the earliest-arrival bound (arrival at the previous stop +
+        direct leg) ends the scan at the first position that is too late.
+        Candidates are scored with the current best as a cut-off. Repeats
+        until no move helps.
+        Complexity: O(l·k²) for l late stops, usually far less.
+        """
+        d, per_mile, due = self.d, self.per_mile, self.due
+        route = list(route)
+        best_score = self.score(route)
+        improved = True
+        while improved and best_score[0] > 0:
+            improved = False
+            arrival = self.arrivals(route)
+            for i, s in enumerate(route):
+                if arrival[i] <= due[s] + EPSILON:
+                    continue
+                prev, clock = 0, self.start
+                for position in range(i):
+                    if clock + d[prev][s] * per_mile > due[s] + EPSILON:
+                        break
+                    candidate = route[:position] + [s] + route[position:i] + route[i + 1:]
+                    candidate_score = self.score(candidate, best_score)
+                    if candidate_score is not None and candidate_score < best_score:
+                        route, best_score, improved = candidate, candidate_score, True
+                        break
+                    prev, clock = route[position], arrival[position]
+                if improved:
+                    break
+        return route
+
+    def _best_position(self, s, route, arrival, slack):
+        """
+        Return the position at which to insert local stop s into route.
+
+        Process: walk positions front to back. A position is feasible when s
+        arrives by its deadline and the delay it adds to the next stop is
+        within that stop's slack; the cheapest feasible position wins. The
+        scan stops once the direct-arrival bound passes s's deadline.
+        Flow: with no feasible position, the earliest arrival that does not
+        delay later stops past their deadlines is used, else the end.
+        Complexity: O(k).
+        """
+        d, per_mile, due = self.d, self.per_mile, self.due[s]
+        best, best_cost = None, INF
+        fallback, fallback_arrival = len(route), INF
+        prev, prev_time = 0, self.start
+        for position in range(len(route) + 1):
+            reach = prev_time + d[prev][s] * per_mile
+            if position < len(route):
+                nxt = route[position]
+                fits = reach + d[s][nxt] * per_mile - arrival[position] <= slack[position] + EPSILON
+            else:
+                nxt = 1
+                fits = True
+            if fits:
+                if reach <= due + EPSILON:
+                    cost = d[prev][s] + d[s][nxt] - d[prev][nxt]
+                    if cost < best_cost:
+                        best, best_cost = position, cost
+                elif reach < fallback_arrival:
+                    fallback, fallback_arrival = position, reach
+            if reach > due + EPSILON and (best is not None or fallback_arrival < INF):
+                # Arrivals only grow from here: no later position is on time
+                # or arrives sooner than the ones already found
+                break
+            if position < len(route):
+                prev, prev_time = nxt, arrival[position]
+        return fallback if best is None else best
+
+    def _refresh(self, route, arrival, slack):
+        """
+        Recompute planned arrivals and forward slack for route.
+
+        Process: slack[i] is the least (deadline - arrival) over stops i..,
+        so an insertion before stop i may delay it by at most slack[i]. Late
+        stops count as zero slack.
+        Complexity: O(k).
+        """
+        arrival[:] = self.arrivals(route)
+        slack[:] = arrival
+        due = self.due
+        running = INF
+        for i in range(len(route) - 1, -1, -1):
+            spare = due[route[i]] - arrival[i]
+            if spare < running:
+                running = spare if spare > 0.0 else 0.0
+            slack[i] = running
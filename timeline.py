@@ -0,0 +1,378 @@
+"""Delivery Timeline for WGUPS Simulator
+
+Process:
+  - Record every timestamped event of one full-day simulation run: package
+    loads, delivery legs (start/arrival/miles), address corrections, streamed
+    package arrivals and every return-to-hub leg of each truck.
+  - Answer "state at time T" queries from that log instead of re-running the
+    simulation, producing the same Package/Truck state that
+    simulate_truck_deliveries(T) would.
+
+Flow:
+  - simulate_truck_deliveries() is run once with a DeliveryTimeline passed in
+    as its recorder; the loops call record_*() as each leg is driven.
+  - finalize() freezes the per-truck logs into sorted leg-start lists and
+    running mileage totals.
+  - A truck may make several trips when streamed packages are loaded after
+    it left; each return is keyed by the leg it follows. Streamed packages
+    are absent from snapshots taken before they were ingested.
+  - Route events (route_repair.py) may correct an address more than once,
+    take a package off a truck (DELAYED until it is back at the hub) or
+    load it onto another truck; route_changes keeps their RouteChange log.
+  - snapshot(T) / package_at(pid, T) binary-search those lists to rebuild
+    fresh Package and Truck objects for the requested time.
+  - fleet() flattens the log into a FleetSnapshot (fleet_snapshot.py) whose
+    status queries cover every package at once without building objects.
+
+Complexity:
+  - Recording is O(1) per event.
+  - package_at() is O(1), a truck's state is O(log L) and snapshot() is
+    O(n + t log L), where n is the number of packages, t the number of trucks
+    and L the legs per truck.
+"""
+from address import Address
+from package import Package
+from truck import Truck
+from Enums.package_status import PackageStatus
+from fleet_snapshot import FleetSnapshot, INF
+from bisect import bisect_left
+from datetime import datetime
+
+
+class _TruckLog:
+    """Per-truck event log: departure, loads, ordered legs and hub returns."""
+
+    def __init__(self, truck_num, truck):
+        self.truck_num = truck_num
+        self.departure_time = truck.departure_time
+        self.start_address = truck.current_address
+        self.package_ids = [p.id for p in truck.get_packages()]
+        # Parallel to package_ids: load time of a streamed package, else None,
+        # and the time a route event took the package off again, else None
+        self.load_times = [None] * len(self.package_ids)
+        self.unload_times = [None] * len(self.package_ids)
+        # Parallel lists, one entry per delivery leg in driving order
+        self.leg_starts = []
+        self.leg_arrivals = []
+        self.leg_miles = []
+        self.leg_addresses = []
+        self.leg_package_ids = []
+        # Truck mileage when each leg started, and the running total
+        self.start_miles = []
+        self.miles = 0
+        # Leg position -> (miles, arrival time) of a return to the hub after it
+        self.returns = {}
+        # Last return to the hub
+        self.return_miles = None
+        self.return_time = None
+
+    def state_at(self, end_time):
+        """
+        Return (legs_started, miles, current_address) at end_time.
+
+        Process: bisect the leg starts for legs that began strictly before
+        end_time (the simulator loop condition), then apply a partial leg or
+        a return-to-hub leg exactly like simulate_truck_deliveries().
+        Complexity: O(log L).
+        """
+        started = bisect_left(self.leg_starts, end_time)
+        if started == 0:
+            return 0, 0, self.start_address
+
+        last = started - 1
+        if self.leg_arrivals[last] > end_time:
+            # Partial leg: the truck stays at its previous stop address
+            available = (end_time - self.leg_starts[last]).total_seconds()
+            leg_seconds = (self.leg_arrivals[last] - self.leg_starts[last]).total_seconds()
+            fraction = min(1.0, available / leg_seconds)
+            miles = self.start_miles[last] + self.leg_miles[last] * fraction
+            return started, miles, self._address_before(last)
+
+        miles = self.start_miles[last] + self.leg_miles[last]
+        trip_end = self.returns.get(last)
+        if trip_end is not None:
+            # Trip's last package delivered, simulator always adds the trip back to HUB
+            return started, miles + trip_end[0], "HUB"
+        return started, miles, self.leg_addresses[last]
+
+    def _address_before(self, leg):
+        """Return where the truck was when leg started. O(1)."""
+        if leg == 0:
+            return self.start_address
+        if leg - 1 in self.returns:
+            return "HUB"
+        return self.leg_addresses[leg - 1]
+
+
+class DeliveryTimeline:
+    """
+    Event log of a simulated day with time-travel snapshot queries.
+
+    Process: collect events while the simulator runs, then serve snapshots.
+    Flow:
+      - record_packages() / record_address_correction() / record_truck() /
+        record_leg() / record_return() are called by the simulator.
+      - finalize() must be called before querying.
+    """
+
+    def __init__(self):
+        self.trucks = []
+        self._truck_logs = {}
+        # package id -> static Package fields plus its pre-departure status
+        self._package_fields = {}
+        # package id -> [(correction time, street, city, state, zip) before the fix]
+        self._address_corrections = {}
+        # package id -> [(from, until)] spans it was held off a truck as DELAYED
+        self._holds = {}
+        self.route_changes = []
+        # package id -> (truck log, leg position)
+        self._package_legs = {}
+        # package id -> status when loaded, before any leg was driven
+        self._initial_status = {}
+        # streamed package id -> (ingest time, Package)
+        self._ingested = {}
+        # package id -> [(time or None for start of day, truck number or None)]
+        # in event order: loads, and unloads by route events
+        self._assignments = {}
+        self._package_ids = []
+        self._fleet = None
+
+    # ----- recording -------------------------------------------------------
+
+    def record_address_correction(self, package, at_time):
+        """Remember a package's address prior to a correction effective at_time."""
+        addr = package.address
+        self._address_corrections.setdefault(package.id, []).append(
+            (at_time, addr.street, addr.city, addr.state, addr.zip_code)
+        )
+
+    def record_truck(self, truck_num, truck):
+        """Register a loaded truck before it departs. Complexity: O(k) packages."""
+        log = _TruckLog(truck_num, truck)
+        for pkg in truck.get_packages():
+            self._initial_status[pkg.id] = pkg.package_status
+            self._assignments[pkg.id] = [(None, truck_num)]
+        self.trucks.append(log)
+        self._truck_logs[id(truck)] = log
+
+    def record_ingest(self, package, at_time):
+        """Record a streamed package reaching the hub at at_time. O(1)."""
+        self._ingested[package.id] = (at_time, package)
+        self._initial_status[package.id] = package.package_status
+
+    def record_load(self, truck, package, at_time):
+        """Record a streamed package loaded onto an already registered truck. O(1)."""
+        log = self._truck_logs[id(truck)]
+        log.package_ids.append(package.id)
+        log.load_times.append(at_time)
+        log.unload_times.append(None)
+        self._assignments.setdefault(package.id, []).append((at_time, log.truck_num))
+
+    def record_unload(self, truck, package, at_time, until):
+        """Record a route event taking package off truck, DELAYED until `until`. O(k)."""
+        log = self._truck_logs[id(truck)]
+        for k in range(len(log.package_ids) - 1, -1, -1):
+            if log.package_ids[k] == package.id and log.unload_times[k] is None:
+                log.unload_times[k] = at_time
+                break
+        self._assignments.setdefault(package.id, []).append((at_time, None))
+        if until > at_time:
+            self._holds.setdefault(package.id, []).append((at_time, until))
+
+    def record_route_change(self, change):
+        """Keep a route_repair.RouteChange. O(1)."""
+        self.route_changes.append(change)
+
+    def record_leg(self, truck, package, start_time, arrival_time, distance):
+        """Record a completed delivery leg of `truck` to `package`. O(1)."""
+        log = self._truck_logs[id(truck)]
+        self._package_legs[package.id] = (log, len(log.leg_starts))
+        log.leg_starts.append(start_time)
+        log.leg_arrivals.append(arrival_time)
+        log.leg_miles.append(distance)
+        log.leg_addresses.append(package.address.street)
+        log.leg_package_ids.append(package.id)
+        log.start_miles.append(log.miles)
+        log.miles = log.miles + distance
+
+    def record_return(self, truck, start_time, arrival_time, distance):
+        """Record a return-to-hub leg of `truck` after its latest delivery. O(1)."""
+        log = self._truck_logs[id(truck)]
+        log.returns[len(log.leg_starts) - 1] = (distance, arrival_time)
+        log.miles = log.miles + distance
+        log.return_miles = distance
+        log.return_time = arrival_time
+
+    def record_packages(self, packages):
+        """
+        Capture the static fields of every package after the run.
+
+        Flow: streamed packages missing from `packages` (no live store was
+        given) are taken from the ingest log.
+        Complexity: O(n).
+        """
+        items = list(packages.items())
+        items.extend((pid, pkg) for pid, (_, pkg) in self._ingested.items() if pid not in packages)
+        for pid, pkg in items:
+            addr = pkg.address
+            initial_status = self._initial_status.get(pid, pkg.package_status)
+            self._package_fields[pid] = (
+                pkg.id, addr.street, addr.city, addr.state, addr.zip_code,
+                pkg.deadline, pkg.weight, initial_status,
+                pkg.truck_number, pkg.assigned_truck_number,
+            )
+        self._package_ids = sorted(self._package_fields)
+
+    def finalize(self):
+        """Sort truck logs by truck number. Complexity: O(t log t)."""
+        self.trucks.sort(key=lambda log: log.truck_num)
+        self._fleet = None
+        return self
+
+    def fleet(self):
+        """
+        Return the day's FleetSnapshot, building it on first use.
+
+        Process: one pass over the packages in id order collecting their
+        initial status, ingest time, delivery leg and DELAYED holds as
+        seconds after midnight of the first truck's departure day.
+        Complexity: O(n + h) once, then O(1).
+        """
+        if self._fleet is not None:
+            return self._fleet
+        origin = min((log.departure_time for log in self.trucks), default=None)
+        if origin is None:
+            origin = min((at for at, _ in self._ingested.values()), default=datetime(2000, 1, 1))
+        origin = origin.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        def seconds(moment):
+            return (moment - origin).total_seconds()
+
+        initial, visible_from, leg_start, arrival, holds = [], [], [], [], []
+        for k, pid in enumerate(self._package_ids):
+            initial.append(self._package_fields[pid][7].value)
+            ingested = self._ingested.get(pid)
+            visible_from.append(-INF if ingested is None else seconds(ingested[0]))
+            leg = self._package_legs.get(pid)
+            if leg is None:
+                leg_start.append(INF)
+                arrival.append(INF)
+            else:
+                log, pos = leg
+                leg_start.append(seconds(log.leg_starts[pos]))
+                arrival.append(seconds(log.leg_arrivals[pos]))
+            holds.extend((k, seconds(held_from), seconds(held_until))
+                         for held_from, held_until in self._holds.get(pid, ()))
+        self._fleet = FleetSnapshot(origin, self._package_ids, initial, visible_from, leg_start, arrival, holds)
+        return self._fleet
+
+    # ----- queries ---------------------------------------------------------
+
+    def package_at(self, package_id, end_time):
+        """
+        Build a fresh Package object describing package_id at end_time.
+
+        Process: restore the (possibly pre-correction) address, then compare
+        end_time to the package's delivery leg to pick its status.
+        Flow: returns None for an unknown package or one streamed in after
+        end_time.
+        Complexity: O(1) after the leg has been recorded.
+        """
+        fields = self._package_fields.get(package_id)
+        if fields is None:
+            return None
+        ingested = self._ingested.get(package_id)
+        if ingested is not None and end_time < ingested[0]:
+            return None
+        pid, street, city, state, zip_code, deadline, weight, status, truck_number, assigned = fields
+
+        for correction in self._address_corrections.get(pid, ()):
+            if end_time < correction[0]:
+                _, street, city, state, zip_code = correction
+                break
+
+        pkg = Package(pid, Address(street, city, state, zip_code), deadline, weight, truck_number)
+        pkg.assigned_truck_number = self._assigned_at(pid, end_time, assigned)
+        pkg.package_status = status
+        for held_from, held_until in self._holds.get(pid, ()):
+            if held_from <= end_time < held_until:
+                pkg.package_status = PackageStatus.DELAYED
+
+        leg = self._package_legs.get(pid)
+        if leg is not None:
+            log, pos = leg
+            start = log.leg_starts[pos]
+            arrival = log.leg_arrivals[pos]
+            if start < end_time:
+                if arrival <= end_time:
+                    pkg.package_status = PackageStatus.DELIVERED
+                    pkg.delivery_time = arrival
+                else:
+                    pkg.package_status = PackageStatus.EN_ROUTE
+                    pkg.load_time = start
+        return pkg
+
+    def _assigned_at(self, package_id, end_time, final):
+        """
+        Return the truck number package_id was assigned to at end_time.
+
+        Flow: walks the package's load/unload records (effective at their
+        own time, like the simulator's events); a package never loaded or
+        unloaded keeps its end-of-day assignment `final`.
+        Complexity: O(a) for a assignment changes of the package.
+        """
+        changes = self._assignments.get(package_id)
+        if changes is None:
+            return final
+        assigned = None
+        for at_time, truck_num in changes:
+            if at_time is not None and at_time > end_time:
+                break
+            assigned = truck_num
+        return assigned
+
+    def truck_at(self, log, end_time, packages=None):
+        """
+        Build a Truck object reflecting `log` at end_time.
+
+        Remaining packages are taken from `packages` (a snapshot dict) when
+        provided so the truck shares the same Package objects.
+        Complexity: O(log L + k).
+        """
+        started, miles, address = log.state_at(end_time)
+        delivered = set(log.leg_package_ids[:started])
+        if started and log.leg_arrivals[started - 1] > end_time:
+            delivered.discard(log.leg_package_ids[started - 1])
+
+        truck = Truck(log.departure_time, address)
+        truck.miles_traveled_today = miles
+        if started:
+            truck.departure_time = min(end_time, log.leg_arrivals[started - 1])
+            trip_end = log.returns.get(started - 1)
+            if trip_end is not None and log.leg_arrivals[started - 1] <= end_time:
+                truck.departure_time = trip_end[1]
+        for pid, loaded_at, unloaded_at in zip(log.package_ids, log.load_times, log.unload_times):
+            if loaded_at is not None and loaded_at > end_time:
+                continue
+            if unloaded_at is not None and unloaded_at <= end_time:
+                continue
+            if pid not in delivered:
+                pkg = packages.get(pid) if packages is not None else self.package_at(pid, end_time)
+                truck.packages.append(pkg)
+        return truck
+
+    def snapshot(self, end_time):
+        """
+        Return (packages, trucks) for end_time.
+
+        packages is a dict of id -> Package in id order, trucks a list of Truck
+        objects ordered by truck number.
+        Complexity: O(n + t log L).
+        """
+        packages = {}
+        for pid in self._package_ids:
+            pkg = self.package_at(pid, end_time)
+            if pkg is not None:
+                packages[pid] = pkg
+        trucks = [self.truck_at(log, end_time, packages) for log in self.trucks]
+        return packages, trucks
@@ -15,6 +15,8 @@ Complexity:
 class Truck:
     """Simple truck container used by the simulator.
 
+    MAX_PACKAGES is the truck's package capacity.
+
     Fields:
       - packages: list of Package objects currently loaded
       - current_address: string for the current street address only
@@ -22,6 +24,9 @@ class Truck:
       - is_in_use: flag indicating whether truck is active, 2 trucks active at the most
       - departure_time: scheduled departure time, timedate object
     """
+    MAX_PACKAGES = 16
+    __slots__ = ("packages", "current_address", "miles_traveled_today", "is_in_use", "departure_time")
+
     def __init__(self, departure_time, address):
         self.packages = []
         self.current_address = address
@@ -38,6 +43,6 @@ class Truck:
         Append a single package to the truck if capacity allows.
         Complexity: O(1) for append, O(n) if list resizing occurs internally.
         """
-        if len(self.packages) + 1 > 16:
+        if len(self.packages) + 1 > self.MAX_PACKAGES:
             return
         self.packages.append(package)
\ No newline at end of file
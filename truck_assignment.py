@@ -0,0 +1,561 @@
+"""Truck Assignment Engine for WGUPS Simulator
+
+Process:
+  - Read each package's special-notes column into constraints: truck-only,
+    delayed-until, must-go-with and wrong-address (with the time its
+    correction is known).
+  - Decide which trucks may carry each group of packages (truck number,
+    departure after the group is ready, deadline reachable from the hub).
+  - Cluster packages into truck loads with a Clarke-Wright savings heuristic
+    over the distance matrix, restricted to each stop's nearest neighbors,
+    then pack the loads into the trucks without exceeding Truck.MAX_PACKAGES.
+
+Flow:
+  - assign_packages() is given the packages and empty Truck objects (with
+    departure times) and fills the trucks in place, setting each package's
+    assigned_truck_number, as the hardcoded id lists in main.py used to.
+  - Must-go-with packages are merged into one unit first and never split.
+
+Complexity:
+  - O(n log n + n·k) for n packages and k neighbors per stop, plus O(a²)
+    for the neighbor search over a unique stop rows (vectorized with NumPy).
+"""
+from truck import Truck
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+import re
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+_TRUCK_ONLY = re.compile(r"can only be on truck\s+(\d+)", re.IGNORECASE)
+_DELAYED_UNTIL = re.compile(r"delayed.*?until\s+(\d{1,2}:\d{2}\s*[ap]\.?m\.?)", re.IGNORECASE)
+_MUST_GO_WITH = re.compile(r"must be delivered with\s+([\d,\sand]+)", re.IGNORECASE)
+_WRONG_ADDRESS = re.compile(r"wrong address(?: listed)?(?:.*?until\s+(\d{1,2}:\d{2}\s*[ap]\.?m\.?))?", re.IGNORECASE)
+
+
+def _clock_time(text, day):
+    """Parse a '9:05 am' style time from a notes column into a datetime on day. O(1)."""
+    clean = text.replace(".", "").upper().replace(" ", "")
+    parsed = datetime.strptime(clean, "%I:%M%p")
+    return day.replace(hour=parsed.hour, minute=parsed.minute, second=0, microsecond=0)
+
+
+class PackageConstraints:
+    """
+    Constraints parsed from a package's notes column.
+
+    Fields:
+      - truck_only: truck number the package must ride on, or None
+      - available_at: datetime the package reaches the hub, or None
+      - together_with: set of package ids that must share its truck
+      - wrong_address: True if the listed address is wrong
+      - address_fixed_at: datetime the corrected address is known, or None
+    """
+
+    def __init__(self):
+        self.truck_only = None
+        self.available_at = None
+        self.together_with = set()
+        self.wrong_address = False
+        self.address_fixed_at = None
+
+
+def parse_package_notes(notes, day):
+    """
+    Parse a notes string into PackageConstraints for the given day.
+
+    Complexity: O(len(notes)).
+    """
+    constraints = PackageConstraints()
+    notes = notes or ""
+    match = _TRUCK_ONLY.search(notes)
+    if match:
+        constraints.truck_only = int(match.group(1))
+    match = _DELAYED_UNTIL.search(notes)
+    if match:
+        constraints.available_at = _clock_time(match.group(1), day)
+    match = _MUST_GO_WITH.search(notes)
+    if match:
+        constraints.together_with = {int(x) for x in re.findall(r"\d+", match.group(1))}
+    match = _WRONG_ADDRESS.search(notes)
+    if match:
+        constraints.wrong_address = True
+        if match.group(1):
+            constraints.address_fixed_at = _clock_time(match.group(1), day)
+    return constraints
+
+
+class _Unit:
+    """Packages that must travel together, with their combined constraints."""
+
+    def __init__(self, packages):
+        self.packages = packages
+        self.eligible = None
+        self.rows = []
+
+
+class _Load:
+    """A Clarke-Wright route: ordered segments of units plus its open ends."""
+
+    def __init__(self, unit, rows):
+        self.units = [unit]
+        self.rows = list(rows)
+        self.count = len(unit.packages)
+        self.eligible = unit.eligible
+        self.head = self.rows[0]
+        self.tail = self.rows[-1]
+
+    def reverse(self):
+        self.units.reverse()
+        self.rows.reverse()
+        self.head, self.tail = self.tail, self.head
+
+
+def _union_groups(packages, constraints):
+    """
+    Merge must-go-with packages (transitively) into units.
+
+    Complexity: O(n α(n)) with a small union-find.
+    """
+    parent = {pkg.id: pkg.id for pkg in packages}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for pkg in packages:
+        for other in constraints[pkg.id].together_with:
+            if other in parent:
+                parent[find(pkg.id)] = find(other)
+
+    groups = {}
+    for pkg in packages:
+        groups.setdefault(find(pkg.id), []).append(pkg)
+    return [_Unit(members) for members in groups.values()]
+
+
+def _nearest_pairs(rows, distances, k):
+    """
+    Return (a, b) row pairs where b is among a's k nearest rows in `rows`.
+
+    Process: with NumPy, gather the sub-matrix in blocks (only those cells
+    are read, which matters for a memory-mapped matrix) and argpartition;
+    otherwise sort each row in Python.
+    Complexity: O(a²) distance reads, O(a·k) pairs out.
+    """
+    rows = list(rows)
+    k = min(k, len(rows) - 1)
+    if k <= 0:
+        return []
+    pairs = []
+    submatrix = None
+    if np is not None:
+        if hasattr(distances, "submatrix"):
+            submatrix = distances.submatrix
+        else:
+            try:
+                dense = np.asarray(distances, dtype=np.float64)
+                submatrix = lambda a, b: dense[np.ix_(a, b)]
+            except (TypeError, ValueError):
+                submatrix = None
+    if submatrix is not None:
+        idx = np.asarray(rows, dtype=np.intp)
+        for start in range(0, len(rows), 512):
+            block = submatrix(idx[start:start + 512], idx)
+            for offset in range(block.shape[0]):
+                block[offset, start + offset] = np.inf
+            nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+            for offset, cols in enumerate(nearest):
+                a = rows[start + offset]
+                pairs.extend((a, rows[c]) for c in cols)
+        return pairs
+    for a in rows:
+        ranked = sorted((b for b in rows if b != a), key=lambda b: distances[a][b])
+        pairs.extend((a, b) for b in ranked[:k])
+    return pairs
+
+
+def _order_rows(rows, hub, distances):
+    """Order a unit's distinct rows by nearest neighbor from the hub. O(r²)."""
+    remaining = list(dict.fromkeys(rows))
+    ordered = []
+    current = hub
+    while remaining:
+        nxt = min(remaining, key=lambda r: distances[current][r])
+        ordered.append(nxt)
+        remaining.remove(nxt)
+        current = nxt
+    return ordered
+
+
+def assign_packages(packages, trucks, address_index, distances, day,
+                    address_rows=None, correction_times=None,
+                    available_times=None, speed=18.0, hub="HUB", neighbor_count=10):
+    """
+    Fill `trucks` with `packages` respecting the notes-column constraints.
+
+    Process:
+      - Parse notes, union must-go-with groups and compute each unit's set
+        of eligible trucks (truck_only, ready time, reachable deadline).
+      - Start with one load per unit (units sharing a stop and eligibility
+        are pre-merged) and apply Clarke-Wright merges in decreasing
+        savings order over nearest-neighbor row pairs, keeping loads within
+        capacity and with a common eligible truck.
+      - Pack the loads into trucks, most constrained first, splitting a load
+        by unit only when no single truck has room for all of it.
+      - Repair: move any unit a nearest-neighbor drive would deliver late to
+        another eligible truck when that lowers the number of late packages.
+
+    Flow:
+      - address_rows: optional package id -> matrix row overrides (for
+        example a known corrected address).
+      - correction_times: package id -> datetime the corrected address is
+        known, for packages noted as "Wrong address listed".
+      - available_times: package id -> datetime the package reaches the hub
+        (None = already there), overriding the notes' delayed-until time.
+      - Raises ValueError when a unit fits no truck.
+      - Returns the trucks, each package's assigned_truck_number set to its
+        truck's position + 1.
+
+    Complexity: see module docstring.
+    """
+    packages = list(packages)
+    address_rows = address_rows or {}
+    correction_times = correction_times or {}
+    capacity = Truck.MAX_PACKAGES
+    hub_row = address_index[hub]
+
+    constraints = {pkg.id: parse_package_notes(getattr(pkg, "notes", ""), day) for pkg in packages}
+    for pid, available_at in (available_times or {}).items():
+        if pid in constraints:
+            constraints[pid].available_at = available_at
+
+    # Resolve rows and deadlines once per package; deadlines come from the
+    # minutes Package parsed at construction (one datetime per distinct value)
+    rows = {}
+    deadlines = {}
+    deadline_times = {None: None}
+    for pkg in packages:
+        row = address_rows.get(pkg.id)
+        if row is None:
+            row = getattr(pkg, "address_row", None)
+        if row is None:
+            row = address_index.get(pkg.address.street)
+        if row is None:
+            raise ValueError(f"Package {pkg.id} address {pkg.address.street!r} is not in the distance table")
+        rows[pkg.id] = row
+        minutes = pkg.deadline_minutes
+        if minutes not in deadline_times:
+            deadline_times[minutes] = day.replace(hour=minutes // 60, minute=minutes % 60,
+                                                  second=0, microsecond=0)
+        deadlines[pkg.id] = deadline_times[minutes]
+
+    def row_of(pkg):
+        return rows[pkg.id]
+
+    def deadline_of(pkg):
+        return deadlines[pkg.id]
+
+    # Eligible trucks are a departure-time range, so look them up by bisection
+    departures = sorted((truck.departure_time, t) for t, truck in enumerate(trucks))
+    departure_times = [d for d, _ in departures]
+    eligible_cache = {}
+
+    def eligible_between(earliest, latest, truck_only):
+        lo = 0 if earliest is None else bisect_left(departure_times, earliest)
+        hi = len(departures) if latest is None else bisect_right(departure_times, latest)
+        key = (lo, hi, truck_only)
+        cached = eligible_cache.get(key)
+        if cached is None:
+            cached = frozenset(t for _, t in departures[lo:hi]
+                               if truck_only is None or t + 1 == truck_only)
+            eligible_cache[key] = cached
+        return cached
+
+    units = _union_groups(packages, constraints)
+    for unit in units:
+        ready = None
+        latest = None
+        truck_only = set()
+        for pkg in unit.packages:
+            c = constraints[pkg.id]
+            times = [c.available_at]
+            if c.wrong_address:
+                fixed = c.address_fixed_at or correction_times.get(pkg.id)
+                if fixed is None:
+                    raise ValueError(f"Package {pkg.id} has a wrong address and no known correction time")
+                times.append(fixed)
+            for t in times:
+                if t is not None and (ready is None or t > ready):
+                    ready = t
+            if c.truck_only is not None:
+                truck_only.add(c.truck_only)
+            row = rows[pkg.id]
+            unit.rows.append(row)
+            due = deadlines[pkg.id]
+            if due is not None:
+                # Latest departure that can still reach this stop directly on time
+                leave_by = due - timedelta(hours=distances[hub_row][row] / speed)
+                if latest is None or leave_by < latest:
+                    latest = leave_by
+        if len(unit.packages) > capacity or len(truck_only) > 1:
+            raise ValueError(f"Packages {[p.id for p in unit.packages]} cannot share one truck")
+
+        only = next(iter(truck_only)) if truck_only else None
+        eligible = eligible_between(ready, latest, only)
+        if not eligible:
+            # No truck can make the deadline; deliver late rather than never
+            eligible = eligible_between(ready, None, only)
+        if not eligible:
+            raise ValueError(f"No truck can carry packages {[p.id for p in unit.packages]}")
+        unit.eligible = eligible
+
+    # Initial loads: multi-package units keep their own route, single-package
+    # units at the same stop with the same eligibility share one load
+    loads = []
+    shared = {}
+    for unit in units:
+        if len(unit.packages) == 1:
+            key = (unit.rows[0], unit.eligible)
+            load = shared.get(key)
+            if load is not None and load.count < capacity:
+                load.units.append(unit)
+                load.count += 1
+                continue
+            load = _Load(unit, unit.rows)
+            shared[key] = load
+        else:
+            load = _Load(unit, _order_rows(unit.rows, hub_row, distances))
+        loads.append(load)
+
+    # Clarke-Wright savings over nearest-neighbor pairs of load end rows
+    ends = {}
+    for load in loads:
+        ends.setdefault(load.head, []).append(load)
+        if load.tail != load.head:
+            ends.setdefault(load.tail, []).append(load)
+    pairs = _nearest_pairs(ends.keys(), distances, neighbor_count)
+    # Loads ending at the same stop are the best merge candidates of all
+    pairs.extend((row, row) for row, bucket in ends.items() if len(bucket) > 1)
+    savings = sorted(
+        ((distances[hub_row][a] + distances[hub_row][b] - distances[a][b], a, b) for a, b in pairs),
+        reverse=True,
+    )
+    alive = {id(load) for load in loads}
+    # Packages already committed to a single truck must still fit on it
+    pinned = [0] * len(trucks)
+    for load in loads:
+        if len(load.eligible) == 1:
+            pinned[next(iter(load.eligible))] += load.count
+    for saving, a, b in savings:
+        if saving <= 0:
+            break
+        for left in list(ends.get(a, ())):
+            for right in list(ends.get(b, ())):
+                if left is right or left.count + right.count > capacity:
+                    continue
+                eligible = left.eligible & right.eligible
+                if not eligible:
+                    continue
+                if len(eligible) == 1:
+                    t = next(iter(eligible))
+                    already = sum(l.count for l in (left, right) if l.eligible == eligible)
+                    if pinned[t] - already + left.count + right.count > capacity:
+                        continue
+                # Orient so that row a ends `left` and row b starts `right`
+                if left.tail != a:
+                    if left.head != a:
+                        continue
+                    left.reverse()
+                if right.head != b:
+                    if right.tail != b:
+                        continue
+                    right.reverse()
+                for end_row in (left.head, left.tail, right.head, right.tail):
+                    for lst_load in (left, right):
+                        bucket = ends.get(end_row)
+                        if bucket and lst_load in bucket:
+                            bucket.remove(lst_load)
+                if len(eligible) == 1:
+                    pinned[t] += left.count + right.count - already
+                left.units.extend(right.units)
+                left.rows.extend(right.rows)
+                left.count += right.count
+                left.eligible = eligible
+                left.tail = right.tail
+                alive.discard(id(right))
+                ends.setdefault(left.head, []).append(left)
+                if left.tail != left.head:
+                    ends.setdefault(left.tail, []).append(left)
+                break
+            else:
+                continue
+            break
+
+    merged = [load for load in loads if id(load) in alive]
+
+    # Pack loads into trucks: fewest eligible trucks first, then largest
+    room = [capacity - len(truck.get_packages()) for truck in trucks]
+    truck_rows = [[hub_row] for _ in trucks]
+    truck_units = [[] for _ in trucks]
+    open_trucks = {t for t in range(len(trucks)) if room[t] > 0}
+
+    def choose(fits, rows):
+        # Closest partly loaded truck, else the first empty one (hub distance)
+        best, best_cost = None, None
+        for t in fits:
+            if len(truck_rows[t]) == 1:
+                cost = distances[hub_row][rows[0]]
+            else:
+                cost = min(distances[a][b] for a in truck_rows[t] for b in (rows[0], rows[-1]))
+            if best is None or cost < best_cost:
+                best, best_cost = t, cost
+        return best
+
+    def place(t, unit_list):
+        for unit in unit_list:
+            for pkg in unit.packages:
+                pkg.assigned_truck_number = t + 1
+                trucks[t].add_package(pkg)
+            room[t] -= len(unit.packages)
+            truck_rows[t].extend(unit.rows)
+            truck_units[t].append(unit)
+            if room[t] <= 0:
+                open_trucks.discard(t)
+
+    def unplace(t, unit):
+        for pkg in unit.packages:
+            trucks[t].packages.remove(pkg)
+        room[t] += len(unit.packages)
+        truck_units[t].remove(unit)
+        open_trucks.add(t)
+
+    def place_with_eviction(unit):
+        """Free room on an eligible truck by moving units that can go elsewhere."""
+        need = len(unit.packages)
+        # (eligible set, size) pairs already known to have no open truck
+        blocked = set()
+        for t in sorted(unit.eligible):
+            moves = []
+            freed = room[t]
+            for other in truck_units[t]:
+                if freed >= need:
+                    break
+                key = (id(other.eligible), len(other.packages))
+                if key in blocked:
+                    continue
+                pool, member = ((open_trucks, other.eligible) if len(open_trucks) < len(other.eligible)
+                                else (other.eligible, open_trucks))
+                dest = next((d for d in pool if d in member and d != t
+                             and room[d] >= len(other.packages)), None)
+                if dest is not None:
+                    moves.append((other, dest))
+                    freed += len(other.packages)
+                elif len(other.eligible) > 1:
+                    blocked.add(key)
+            if freed >= need:
+                for other, dest in moves:
+                    unplace(t, other)
+                    place(dest, [other])
+                place(t, [unit])
+                return
+        raise ValueError(f"Not enough truck capacity for packages {[p.id for p in unit.packages]}")
+
+    for load in sorted(merged, key=lambda l: (len(l.eligible), -l.count)):
+        fits = [t for t in load.eligible if room[t] >= load.count]
+        if fits:
+            place(choose(fits, load.rows), load.units)
+            continue
+        for unit in sorted(load.units, key=lambda u: -len(u.packages)):
+            fits = [t for t in unit.eligible if room[t] >= len(unit.packages)]
+            if fits:
+                place(choose(fits, unit.rows), [unit])
+            else:
+                place_with_eviction(unit)
+
+    _repair_late_units(units, trucks, room, hub_row, distances, row_of, deadline_of, speed)
+    return trucks
+
+
+def _late_count(truck, hub_row, distances, row_of, deadline_of, speed):
+    """
+    Count packages a nearest-neighbor drive of truck would deliver late.
+
+    Process: replay the selection `_find_nearest_delivery` makes from the hub
+    at the truck's departure time and compare arrivals with deadlines.
+    Complexity: O(k²) for k packages on the truck.
+    """
+    stops = [(row_of(p), deadline_of(p)) for p in truck.get_packages()]
+    if all(due is None for _, due in stops):
+        return 0
+    clock = truck.departure_time
+    current = hub_row
+    late = 0
+    while stops:
+        drow = distances[current]
+        best, best_dist = 0, drow[stops[0][0]]
+        for i in range(1, len(stops)):
+            dist = drow[stops[i][0]]
+            if dist < best_dist:
+                best, best_dist = i, dist
+        row, due = stops.pop(best)
+        clock = clock + timedelta(minutes=(best_dist / speed) * 60.0)
+        current = row
+        if due is not None and clock > due:
+            late += 1
+    return late
+
+
+def _repair_late_units(units, trucks, room, hub_row, distances, row_of, deadline_of, speed, max_tries=8):
+    """
+    Move units that would be delivered late to another eligible truck.
+
+    Process: for each unit with a late package, try up to `max_tries` of its
+    other eligible trucks (earliest departure first) and keep the first move
+    that lowers the combined late count of both trucks. Each unit moves at
+    most once; per-truck late counts are cached between moves.
+    Complexity: O(u + l·max_tries·k²) for l late units; k <= 16.
+    """
+    truck_of = {}
+    for t, truck in enumerate(trucks):
+        for pkg in truck.get_packages():
+            truck_of[pkg.id] = t
+
+    late_cache = {}
+
+    def late(t):
+        if t not in late_cache:
+            late_cache[t] = _late_count(trucks[t], hub_row, distances, row_of, deadline_of, speed)
+        return late_cache[t]
+
+    for unit in units:
+        src = truck_of[unit.packages[0].id]
+        before_src = late(src)
+        if before_src == 0:
+            continue
+        candidates = sorted((t for t in unit.eligible if t != src and room[t] >= len(unit.packages)),
+                            key=lambda t: trucks[t].departure_time)[:max_tries]
+        for dst in candidates:
+            before = before_src + late(dst)
+            for pkg in unit.packages:
+                trucks[src].packages.remove(pkg)
+                trucks[dst].add_package(pkg)
+            late_cache.pop(src, None)
+            late_cache.pop(dst, None)
+            if late(src) + late(dst) < before:
+                for pkg in unit.packages:
+                    pkg.assigned_truck_number = dst + 1
+                    truck_of[pkg.id] = dst
+                room[src] += len(unit.packages)
+                room[dst] -= len(unit.packages)
+                break
+            for pkg in unit.packages:
+                trucks[dst].packages.remove(pkg)
+                trucks[src].add_package(pkg)
+            late_cache[src] = before_src
+            late_cache.pop(dst, None)